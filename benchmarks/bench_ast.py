@@ -0,0 +1,57 @@
+"""Memoria por nodo y velocidad de los recorridos: AST de objetos frente a arena.
+
+Analiza un programa generado de `--statements` sentencias, mide la memoria del
+AST de dataclasses y la de su copia en `AstArena`, y cronometra
+`SemanticAnalyzer` + `IRGenerator` sobre ambos.
+
+Uso:
+    python benchmarks/bench_ast.py
+    python benchmarks/bench_ast.py --statements 20000 --repeat 5
+"""
+import argparse
+import gc
+import tracemalloc
+
+from programs import best_of, expression_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.semantic import SemanticAnalyzer
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.arena import AstArena
+
+
+def traced(fn):
+    """Return fn() and the bytes it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--statements", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    source = expression_program(args.statements)
+    tokens = tokenize(source)
+    program, ast_bytes = traced(lambda: Parser(tokens).parse())
+    arena, arena_bytes = traced(lambda: AstArena.from_program(program))
+    nodes = len(arena)
+    print(f"{args.statements} statements, {len(source)} bytes of source, {nodes} nodes")
+    print(f"  objects: {ast_bytes / 1e6:7.1f} MB  {ast_bytes / nodes:6.1f} B/node")
+    print(f"  arena:   {arena_bytes / 1e6:7.1f} MB  {arena_bytes / nodes:6.1f} B/node"
+          f"  (arrays {arena.nbytes() / nodes:.1f} B/node)")
+
+    for name, root in (("objects", program), ("arena", arena.program())):
+        sem = best_of(args.repeat, lambda: SemanticAnalyzer().analyze(root))
+        ir = best_of(args.repeat, lambda: IRGenerator().generate(root))
+        print(f"  {name:>7}: semantic {sem:.3f} s ({sem / nodes * 1e9:.0f} ns/node), "
+              f"ir {ir:.3f} s ({ir / nodes * 1e9:.0f} ns/node)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Tiempo de construcción del CFG, dominadores y linealización.
+
+Mide `build_cfg`, `compute_dominators` (todas las regiones) y
+`ProgramCFG.linearize` sobre programas de tamaño creciente: si el coste es
+lineal, los ns por instrucción TAC se mantienen constantes.
+
+Uso:
+    python benchmarks/bench_cfg.py
+    python benchmarks/bench_cfg.py --sizes 25000 50000 100000 200000 --repeat 5
+"""
+import argparse
+
+from programs import best_of, call_program, expression_program, nested_program, tac_of
+from minilang_compiler.cfg import build_cfg
+
+
+def sized(make, per_unit, n_instrs):
+    """TAC from `make(units)`, with `units` chosen to give about `n_instrs`."""
+    return tac_of(make(max(1, n_instrs // per_unit)))
+
+
+def dominators(program):
+    for region in program.regions:
+        region.compute_dominators()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000],
+                    help="approximate TAC instructions per program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    # TAC instructions per unit of each generator, measured on a small sample
+    shapes = [
+        ("calls", call_program, len(tac_of(call_program(100))) // 100),
+        ("exprs", expression_program, max(1, len(tac_of(expression_program(1000))) // 1000)),
+        ("nested", nested_program, len(tac_of(nested_program(1000))) // 1000),
+    ]
+    for name, make, per_unit in shapes:
+        for size in args.sizes:
+            tac = sized(make, per_unit, size)
+            n = len(tac)
+            program = build_cfg(tac)
+            blocks = sum(len(r.blocks) for r in program.regions)
+            build = best_of(args.repeat, lambda: build_cfg(tac))
+            dom = best_of(args.repeat, lambda: dominators(program))
+            lin = best_of(args.repeat, program.linearize)
+            print(f"{name:6} {n:7} TAC {blocks:6} blocks  build {build / n * 1e9:4.0f}  "
+                  f"dominators {dom / n * 1e9:4.0f}  linearize {lin / n * 1e9:4.0f} ns/instr")
+
+
+if __name__ == "__main__":
+    main()
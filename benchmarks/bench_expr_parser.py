@@ -0,0 +1,46 @@
+"""Rendimiento del parser de expresiones: motor Pratt frente a la cadena parse_or → parse_factor.
+
+Uso:
+    python benchmarks/bench_expr_parser.py
+    python benchmarks/bench_expr_parser.py --statements 50000 --depth 100000
+"""
+import argparse
+import time
+
+from programs import expression_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+
+
+def parse(tokens, engine):
+    start = time.perf_counter()
+    try:
+        Parser(tokens, expr_engine=engine).parse()
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--statements", type=int, default=20000, help="statements in the throughput program")
+    ap.add_argument("--depth", type=int, default=50000, help="nesting of the parenthesized expression")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    tokens = tokenize(expression_program(args.statements))
+    print(f"throughput: {len(tokens)} tokens, {args.statements} statements")
+    for engine in ("chain", "pratt"):
+        best = min(parse(tokens, engine) for _ in range(args.repeat))
+        print(f"  {engine:>6}: {best:.3f} s  {len(tokens) / best:,.0f} tokens/s")
+
+    deep = "x = " + "(" * args.depth + "1" + ")" * args.depth + ";\nend\n"
+    tokens = tokenize(deep)
+    print(f"nesting: {args.depth} parentheses")
+    for engine in ("chain", "pratt"):
+        elapsed = parse(tokens, engine)
+        print(f"  {engine:>6}: " + ("RecursionError" if elapsed is None else f"{elapsed:.3f} s"))
+
+
+if __name__ == "__main__":
+    main()
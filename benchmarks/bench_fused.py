@@ -0,0 +1,42 @@
+"""Tiempos por fase: semántico + TAC por separado frente al front end fusionado.
+
+Uso:
+    python benchmarks/bench_fused.py
+    python benchmarks/bench_fused.py --blocks 50000 --repeat 5
+"""
+import argparse
+
+from programs import best_of, call_program, expression_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.semantic import SemanticAnalyzer
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.fused import FusedIRGenerator
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--blocks", type=int, default=20000, help="loop blocks in the call-heavy program")
+    ap.add_argument("--statements", type=int, default=20000, help="statements in the expression program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    programs = [
+        ("calls", call_program(args.blocks)),
+        ("exprs", expression_program(args.statements)),
+    ]
+    for name, source in programs:
+        tokens = tokenize(source)
+        program = Parser(tokens).parse()
+        assert [repr(i) for i in FusedIRGenerator().generate(program)] == \
+            [repr(i) for i in IRGenerator().generate(program)]
+        sem = best_of(args.repeat, lambda: SemanticAnalyzer().analyze(program))
+        ir = best_of(args.repeat, lambda: IRGenerator().generate(program))
+        fused = best_of(args.repeat, lambda: FusedIRGenerator().generate(program))
+        print(f"{name}: {len(tokens)} tokens")
+        print(f"  semantic {sem:.3f} s + ir {ir:.3f} s = {sem + ir:.3f} s")
+        print(f"  fused                          {fused:.3f} s  ({(sem + ir - fused) / (sem + ir):.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Efecto de la numeración de valores (`optimizer.value_numbering`).
+
+Sobre `programs.index_program` (bucles que repiten `i * n + j`) y los
+`tests/*.minilang`, compara la optimización completa sin numeración de
+valores, con numeración local (por bloque) y global (árbol de dominadores):
+cálculos eliminados, instrucciones TAC e instrucciones ejecutadas por la VM.
+También mide el tiempo de la pasada global.
+
+Uso:
+    python benchmarks/bench_gvn.py
+    python benchmarks/bench_gvn.py --loops 200 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, index_program, propagated_ssa, run, tac_of
+from minilang_compiler.ssa import from_ssa
+from minilang_compiler.optimizer import copy_propagation, dead_code_elimination, value_numbering
+
+
+def optimized(tac, mode):
+    """(TAC, computations removed) of the pipeline with `mode` None, 'local' or 'global'."""
+    program = propagated_ssa(tac)
+    removed = value_numbering(program, mode == 'global') if mode else 0
+    copy_propagation(program)
+    dead_code_elimination(program)
+    from_ssa(program)
+    return program.linearize(), removed
+
+
+def compare(name, tac):
+    out, steps = run(tac)
+    cells = []
+    for mode in (None, 'local', 'global'):
+        result, removed = optimized(tac, mode)
+        result_out, result_steps = run(result)
+        note = "" if result_out == out else "!"
+        cells.append(f"{removed:5} {len(result):6} {result_steps:8}{note}")
+    print(f"{name:24} {steps:8}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--loops", type=int, default=100, help="double loops in index_program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'':24} {'VM':>8}  {'no GVN':^21}  {'local':^21}  {'global':^21}")
+    print(f"{'program':24} {'instrs':>8}  " + "  ".join(["  rm.    TAC       VM"] * 3))
+    tac = tac_of(index_program(args.loops))
+    compare(f"index_program({args.loops})", tac)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac)
+
+    t = best_of(args.repeat, value_numbering, lambda: propagated_ssa(tac))
+    print(f"\nvalue_numbering: {t / len(tac) * 1e9:.0f} ns per TAC instruction "
+          f"({len(tac)} instructions)")
+
+
+if __name__ == "__main__":
+    main()
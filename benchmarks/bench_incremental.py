@@ -0,0 +1,61 @@
+"""Latencia de una edición de un carácter: `IncrementalParser.edit` frente a un análisis completo.
+
+Uso:
+    python benchmarks/bench_incremental.py                 # 2k, 20k y 200k líneas
+    python benchmarks/bench_incremental.py --lines 20000 --edits 500
+"""
+import argparse
+import random
+import time
+
+from programs import ROOT_DIR  # noqa: F401  (puts the package on sys.path)
+from minilang_compiler.incremental import IncrementalParser
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+
+
+def program_of_lines(n_lines: int) -> str:
+    lines = ["def twice(a) {", "    b = a * 2;", "    return b;", "}", "x = 0;"]
+    i = 0
+    while len(lines) < n_lines - 1:
+        lines.append(f"x = x + {i % 10} * twice({i});")
+        if i % 50 == 0:
+            lines.append(f"if x > {i} {{")
+            lines.append("    print x;")
+            lines.append("}")
+        i += 1
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", default="2000,20000,200000", help="comma separated program sizes in lines")
+    ap.add_argument("--edits", type=int, default=200, help="edits per size")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'lines':>8} {'full parse ms':>14} {'edit ms':>9} {'full reparses':>14}")
+    for n_lines in (int(x) for x in args.lines.split(",")):
+        text = program_of_lines(n_lines)
+        start = time.perf_counter()
+        Parser(tokenize(text)).parse()
+        full_ms = (time.perf_counter() - start) * 1000
+
+        ip = IncrementalParser(text)
+        reparses = ip.full_parses
+        # One-character edits: replace a digit with another digit.
+        digits = [i for i, ch in enumerate(text) if ch.isdigit()]
+        elapsed = 0.0
+        for _ in range(args.edits):
+            pos = rng.choice(digits)
+            start = time.perf_counter()
+            ip.edit(pos, pos + 1, str(rng.randrange(10)))
+            elapsed += time.perf_counter() - start
+        edit_ms = elapsed / args.edits * 1000
+        assert ip.program == Parser(tokenize(ip.text)).parse()
+        print(f"{n_lines:>8} {full_ms:>14.1f} {edit_ms:>9.3f} {ip.full_parses - reparses:>14}")
+
+
+if __name__ == "__main__":
+    main()
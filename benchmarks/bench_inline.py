@@ -0,0 +1,79 @@
+"""Efecto de la sustitución en línea de funciones (`optimizer.inline_functions`).
+
+Sobre `programs.call_program` (bucles que llaman a dos funciones pequeñas) y
+los `tests/*.minilang`, compara la optimización completa con y sin
+sustitución en línea: llamadas sustituidas, instrucciones TAC, instrucciones
+ejecutadas por la VM (que deben dar la misma salida) y tiempo de ejecución
+en la VM, donde cada `CALL` copia todas las variables de quien llama.
+
+Uso:
+    python benchmarks/bench_inline.py
+    python benchmarks/bench_inline.py --blocks 200 --max-size 40 --repeat 5
+"""
+import argparse
+import copy
+
+from programs import ROOT_DIR, best_of, call_program, run, tac_of
+from minilang_compiler.cfg import build_cfg
+from minilang_compiler.ssa import from_ssa, to_ssa
+from minilang_compiler.optimizer import (constant_propagation, copy_propagation,
+                                         dead_code_elimination, inline_functions,
+                                         loop_invariant_code_motion, loop_unrolling,
+                                         strength_reduction, value_numbering)
+
+
+def optimized(tac, max_size):
+    """(TAC, inlined calls) of the pipeline; `max_size` None skips inlining."""
+    program = build_cfg([copy.copy(instr) for instr in tac])
+    to_ssa(program)
+    inlined = inline_functions(program, max_size) if max_size is not None else 0
+    constant_propagation(program)
+    dead_code_elimination(program)
+    factor = 4
+    while loop_unrolling(program, factor):
+        constant_propagation(program)
+        dead_code_elimination(program)
+        factor = 1
+    loop_invariant_code_motion(program)
+    value_numbering(program)
+    strength_reduction(program)
+    copy_propagation(program)
+    dead_code_elimination(program)
+    from_ssa(program)
+    return program.linearize(), inlined
+
+
+def compare(name, tac, max_size, repeat):
+    out, steps = run(tac)
+    cells = []
+    for size in (None, max_size):
+        result, inlined = optimized(tac, size)
+        result_out, result_steps = run(result)
+        t = best_of(repeat, lambda: run(result))
+        note = "" if result_out == out else "!"
+        cells.append(f"{inlined:5} {len(result):6} {result_steps:8} {t * 1e3:8.2f}{note}")
+    print(f"{name:24} {steps:8}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--blocks", type=int, default=100, help="loops in call_program")
+    ap.add_argument("--max-size", type=int, default=20,
+                    help="largest function inlined (TAC instructions)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'':24} {'VM':>8}  {'no inlining':^30}  {'inlining':^30}")
+    print(f"{'program':24} {'instrs':>8}  " + "  ".join(["calls    TAC       VM   VM ms"] * 2))
+    tac = tac_of(call_program(args.blocks))
+    compare(f"call_program({args.blocks})", tac, args.max_size, args.repeat)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac, args.max_size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark de los motores del lexer: tokens/segundo de `RegexLexer` frente a `Lexer`.
+
+Uso:
+    python benchmarks/bench_lexer.py            # 1, 10 y 50 MB
+    python benchmarks/bench_lexer.py --sizes 1,5 --engines regex
+"""
+import argparse
+import time
+
+from programs import program_of_size
+from minilang_compiler.lexer import ENGINES
+
+
+def bench(engine: str, text: str):
+    start = time.perf_counter()
+    tokens = ENGINES[engine](text).tokenize()
+    elapsed = time.perf_counter() - start
+    return len(tokens), elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1,10,50", help="comma separated input sizes in MB")
+    ap.add_argument("--engines", default="char,regex", help="comma separated engines to run")
+    args = ap.parse_args()
+
+    engines = args.engines.split(",")
+    print(f"{'size':>8} {'engine':>7} {'tokens':>12} {'seconds':>9} {'tokens/s':>12}")
+    for mb in args.sizes.split(","):
+        text = program_of_size(int(float(mb) * 1024 * 1024))
+        rates = {}
+        for engine in engines:
+            count, elapsed = bench(engine, text)
+            rates[engine] = count / elapsed
+            print(f"{mb + ' MB':>8} {engine:>7} {count:>12} {elapsed:>9.2f} {rates[engine]:>12,.0f}")
+        if "char" in rates and "regex" in rates:
+            print(f"{'':>8} speedup regex/char: {rates['regex'] / rates['char']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Efecto del movimiento de código invariante (`optimizer.loop_invariant_code_motion`).
+
+Sobre `programs.index_program` (el bucle interior recalcula `i * n`) y los
+`tests/*.minilang`, compara la optimización completa con y sin la pasada:
+instrucciones sacadas de los bucles, instrucciones TAC e instrucciones
+ejecutadas por la VM. También mide el tiempo de la pasada.
+
+Uso:
+    python benchmarks/bench_licm.py
+    python benchmarks/bench_licm.py --loops 200 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, index_program, propagated_ssa, run, tac_of
+from minilang_compiler.ssa import from_ssa
+from minilang_compiler.optimizer import (copy_propagation, dead_code_elimination,
+                                         loop_invariant_code_motion, value_numbering)
+
+
+def optimized(tac, licm):
+    """(TAC, hoisted instructions) of the pipeline with or without LICM."""
+    program = propagated_ssa(tac)
+    hoisted = loop_invariant_code_motion(program) if licm else 0
+    value_numbering(program)
+    copy_propagation(program)
+    dead_code_elimination(program)
+    from_ssa(program)
+    return program.linearize(), hoisted
+
+
+def compare(name, tac):
+    out, steps = run(tac)
+    cells = []
+    for licm in (False, True):
+        result, hoisted = optimized(tac, licm)
+        result_out, result_steps = run(result)
+        note = "" if result_out == out else "!"
+        cells.append(f"{hoisted:5} {len(result):6} {result_steps:8}{note}")
+    print(f"{name:24} {steps:8}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--loops", type=int, default=100, help="double loops in index_program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'':24} {'VM':>8}  {'no LICM':^21}  {'LICM':^21}")
+    print(f"{'program':24} {'instrs':>8}  " + "  ".join(["hoist    TAC       VM"] * 2))
+    tac = tac_of(index_program(args.loops))
+    compare(f"index_program({args.loops})", tac)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac)
+
+    t = best_of(args.repeat, loop_invariant_code_motion, lambda: propagated_ssa(tac))
+    print(f"\nloop_invariant_code_motion: {t / len(tac) * 1e9:.0f} ns per TAC instruction "
+          f"({len(tac)} instructions)")
+
+
+if __name__ == "__main__":
+    main()
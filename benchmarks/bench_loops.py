@@ -0,0 +1,78 @@
+"""Efecto del desenrollado de bucles y la reducción de fuerza.
+
+Sobre `programs.counted_program` (bucles `for` con límites constantes y
+variables) y los `tests/*.minilang`, compara la optimización completa sin
+ninguna de las dos pasadas, solo con `optimizer.loop_unrolling` y con ella
+más `optimizer.strength_reduction`: instrucciones TAC e instrucciones
+ejecutadas por la VM (que deben dar la misma salida). También mide el tiempo
+de cada pasada.
+
+Uso:
+    python benchmarks/bench_loops.py
+    python benchmarks/bench_loops.py --loops 50 --factor 8 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, counted_program, propagated_ssa, run, tac_of
+from minilang_compiler.ssa import from_ssa
+from minilang_compiler.optimizer import (constant_propagation, copy_propagation,
+                                         dead_code_elimination, loop_invariant_code_motion,
+                                         loop_unrolling, strength_reduction, value_numbering)
+
+
+def optimized(tac, unroll, reduce, factor):
+    """TAC of the pipeline with or without each loop pass."""
+    program = propagated_ssa(tac)
+    if unroll and loop_unrolling(program, factor):
+        constant_propagation(program)
+        dead_code_elimination(program)
+    loop_invariant_code_motion(program)
+    value_numbering(program)
+    if reduce:
+        strength_reduction(program)
+    copy_propagation(program)
+    dead_code_elimination(program)
+    from_ssa(program)
+    return program.linearize()
+
+
+def compare(name, tac, factor):
+    out, steps = run(tac)
+    cells = []
+    for unroll, reduce in ((False, False), (True, False), (True, True)):
+        result = optimized(tac, unroll, reduce, factor)
+        result_out, result_steps = run(result)
+        note = "" if result_out == out else "!"
+        cells.append(f"{len(result):6} {result_steps:8}{note}")
+    print(f"{name:24} {steps:8}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--loops", type=int, default=20, help="loop groups in counted_program")
+    ap.add_argument("--factor", type=int, default=4, help="unrolling factor")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'':24} {'VM':>8}  {'neither':^15}  {'unrolling':^15}  {'+ reduction':^15}")
+    print(f"{'program':24} {'instrs':>8}  " + "  ".join(["   TAC       VM"] * 3))
+    tac = tac_of(counted_program(args.loops))
+    compare(f"counted_program({args.loops})", tac, args.factor)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac, args.factor)
+
+    print()
+    t = best_of(args.repeat, lambda program: loop_unrolling(program, args.factor),
+                lambda: propagated_ssa(tac))
+    print(f"loop_unrolling:     {t / len(tac) * 1e9:6.0f} ns per TAC instruction")
+    t = best_of(args.repeat, strength_reduction, lambda: propagated_ssa(tac))
+    print(f"strength_reduction: {t / len(tac) * 1e9:6.0f} ns per TAC instruction "
+          f"({len(tac)} instructions)")
+
+
+if __name__ == "__main__":
+    main()
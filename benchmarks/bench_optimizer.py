@@ -0,0 +1,62 @@
+"""Efecto y coste de `optimizer.optimize`.
+
+Para cada `tests/*.minilang` muestra las instrucciones TAC y las
+instrucciones que ejecuta la VM, sin optimizar y optimizadas, y comprueba que
+la salida no cambia (los `read` reciben valores fijos). Después mide el tiempo
+de `optimize` sobre programas sintéticos de tamaño creciente (ns por
+instrucción TAC).
+
+Uso:
+    python benchmarks/bench_optimizer.py
+    python benchmarks/bench_optimizer.py --sizes 25000 100000 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, call_program, expression_program, run, tac_of
+from minilang_compiler.optimizer import optimize
+
+
+def report_tests():
+    print(f"{'program':24} {'TAC':>13} {'VM instrs':>17}")
+    total_before = total_after = 0
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        optimized = optimize(tac)
+        out_before, before = run(tac)
+        out_after, after = run(optimized)
+        total_before += before
+        total_after += after
+        note = "" if out_before == out_after else "  OUTPUT DIFFERS"
+        print(f"{path.stem:24} {len(tac):5} -> {len(optimized):5} "
+              f"{before:7} -> {after:7}{note}")
+    print(f"{'total':24} {'':13} {total_before:7} -> {total_after:7} "
+          f"({100 * (total_before - total_after) / total_before:.0f}% fewer)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000],
+                    help="approximate TAC instructions per program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    report_tests()
+    print()
+    shapes = [
+        ("calls", call_program, len(tac_of(call_program(100))) // 100),
+        ("exprs", expression_program, max(1, len(tac_of(expression_program(1000))) // 1000)),
+    ]
+    for name, make, per_unit in shapes:
+        for size in args.sizes:
+            tac = tac_of(make(max(1, size // per_unit)))
+            n = len(tac)
+            t = best_of(args.repeat, lambda: optimize(tac))
+            print(f"{name} {n:7} TAC  optimize {t / n * 1e9:6.0f} ns/instr  "
+                  f"-> {len(optimize(tac))} TAC")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Coste y efecto de cada nivel de optimización (`optimizer.PIPELINES`).
+
+Para los `tests/*.minilang` y varios programas sintéticos compara `-O0`,
+`-O1` y `-O2`: tiempo de `optimize`, instrucciones TAC e instrucciones
+ejecutadas por la VM (con la misma salida que sin optimizar). Después
+muestra las estadísticas por pasada de `PassManager` (ejecuciones, tiempo,
+cambios y líneas TAC quitadas) para cada programa sintético a `-O2`.
+
+Uso:
+    python benchmarks/bench_passes.py
+    python benchmarks/bench_passes.py --scale 4 --repeat 5
+"""
+import argparse
+
+from programs import (ROOT_DIR, best_of, call_program, counted_program,
+                      expression_program, index_program, nested_program, run, tac_of,
+                      tail_call_program)
+from minilang_compiler.optimizer import PIPELINES, PassManager, optimize
+
+
+def compare(name, tac, repeat):
+    out, _ = run(tac)
+    cells = []
+    for level in sorted(PIPELINES):
+        t = best_of(repeat, lambda: optimize(tac, level))
+        result = optimize(tac, level)
+        result_out, steps = run(result)
+        note = "" if result_out == out else "!"
+        cells.append(f"{t * 1e3:8.2f} {len(result):6} {steps:8}{note}")
+    print(f"{name:24} " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", type=int, default=1, help="size multiplier of the synthetic programs")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    synthetic = [
+        (f"exprs({200 * args.scale})", expression_program(200 * args.scale)),
+        (f"nested({20 * args.scale})", nested_program(20 * args.scale)),
+        (f"calls({20 * args.scale})", call_program(20 * args.scale)),
+        (f"index({20 * args.scale})", index_program(20 * args.scale)),
+        (f"counted({20 * args.scale})", counted_program(20 * args.scale)),
+        (f"tail_calls({200 * args.scale})", tail_call_program(200 * args.scale)),
+    ]
+    print(f"{'':24} " + "  ".join(f"{f'-O{level}':^24}" for level in sorted(PIPELINES)))
+    print(f"{'program':24} " + "  ".join(["      ms    TAC       VM"] * len(PIPELINES)))
+    for name, source in synthetic:
+        compare(name, tac_of(source), args.repeat)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac, args.repeat)
+
+    for name, source in synthetic:
+        manager = PassManager(PIPELINES[2])
+        manager.run(tac_of(source))
+        print(f"\n{name} -O2")
+        for line in manager.report():
+            print("  " + line)
+
+
+if __name__ == "__main__":
+    main()
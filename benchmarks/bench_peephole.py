@@ -0,0 +1,72 @@
+"""Efecto de la optimización de mirilla (`peephole.peephole`).
+
+Para los `tests/*.minilang` y varios programas sintéticos, optimizados a
+`-O0` y a `-O2`, compara el ensamblador de `generate_asm` con el reescrito por
+`peephole`: líneas de ensamblador, instrucciones ejecutadas por la VM (con la
+misma salida) y tiempo de ejecución en la VM. Al final muestra cuántas veces
+se aplicó cada regla en cada nivel y el tiempo de `peephole`.
+
+Uso:
+    python benchmarks/bench_peephole.py
+    python benchmarks/bench_peephole.py --scale 4 --repeat 5
+"""
+import argparse
+
+from programs import (ROOT_DIR, best_of, call_program, counted_program, expression_program,
+                      index_program, nested_program, run_asm, tac_of)
+from minilang_compiler.optimizer import optimize
+from minilang_compiler.codegen_asm import generate_asm
+from minilang_compiler.peephole import peephole
+
+
+def compare(name, tac, repeat, hits, seconds):
+    cells = []
+    for level in (0, 2):
+        asm = generate_asm(optimize(tac, level))
+        rewritten = peephole(asm, hits[level])
+        seconds[level] += best_of(repeat, lambda: peephole(asm))
+        out, steps = run_asm(asm)
+        new_out, new_steps = run_asm(rewritten)
+        t = best_of(repeat, lambda: run_asm(asm))
+        new_t = best_of(repeat, lambda: run_asm(rewritten))
+        note = "" if new_out == out else "!"
+        cells.append(f"{len(asm):6} {len(rewritten):6} {steps:8} {new_steps:8}{note} "
+                     f"{t * 1e3:7.2f} {new_t * 1e3:7.2f}")
+    print(f"{name:24} " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", type=int, default=1, help="size multiplier of the synthetic programs")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    programs = [
+        (f"exprs({200 * args.scale})", expression_program(200 * args.scale)),
+        (f"nested({20 * args.scale})", nested_program(20 * args.scale)),
+        (f"calls({20 * args.scale})", call_program(20 * args.scale)),
+        (f"index({20 * args.scale})", index_program(20 * args.scale)),
+        (f"counted({20 * args.scale})", counted_program(20 * args.scale)),
+    ]
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        programs.append((path.stem, path.read_text(encoding="utf-8")))
+
+    hits = {0: {}, 2: {}}
+    seconds = {0: 0.0, 2: 0.0}
+    print(f"{'':24} " + "  ".join(f"{f'-O{level}':^51}" for level in (0, 2)))
+    print(f"{'program':24} " + "  ".join(["   asm   peep       VM     peep      ms    peep"] * 2))
+    for name, source in programs:
+        try:
+            tac = tac_of(source)
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(name, tac, args.repeat, hits, seconds)
+
+    print(f"\n{'rule':16} {'-O0':>8} {'-O2':>8}")
+    for name in dict.fromkeys(list(hits[0]) + list(hits[2])):
+        print(f"{name:16} {hits[0].get(name, 0):8} {hits[2].get(name, 0):8}")
+    print(f"{'peephole ms':16} {seconds[0] * 1e3:8.2f} {seconds[2] * 1e3:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
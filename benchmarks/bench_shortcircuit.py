@@ -0,0 +1,73 @@
+"""Efecto de la evaluación en cortocircuito de las condiciones (`IRGenerator.gen_cond`).
+
+Sobre `programs.condition_program` y los `tests/*.minilang` compara el TAC de
+`IRGenerator` (las condiciones con `and`, `or` y `not` se convierten en
+saltos) con el de antes, que calculaba la condición entera con `binop` y la
+comparaba con 0. Muestra, sin optimizar y a `-O2`, las instrucciones TAC, las
+instrucciones ejecutadas por la VM y el tiempo de ejecución en la VM. Con
+cortocircuito se saltan las llamadas de los operandos derechos que no hacen
+falta, así que un programa cuyas condiciones llaman a funciones con efectos
+puede dar otra salida: se marca con `*`.
+
+Uso:
+    python benchmarks/bench_shortcircuit.py
+    python benchmarks/bench_shortcircuit.py --iterations 2000 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, condition_program, run
+from minilang_compiler import ast_nodes as ast
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.ir import NEGATED, IRGenerator, Op, TACInstr
+from minilang_compiler.optimizer import optimize
+
+
+class ValueConditionIRGenerator(IRGenerator):
+    """The previous lowering: the condition is a value compared with 0."""
+
+    def gen_cond(self, cond, label, when):
+        if isinstance(cond, ast.BinaryOp) and cond.op in NEGATED:
+            left, oper, right = self.gen_expr(cond.left), cond.op, self.gen_expr(cond.right)
+        else:
+            left, oper, right = self.gen_expr(cond), '!=', 0
+        if not when:
+            oper = NEGATED[oper]
+        self.emit(TACInstr(Op.IFGOTO, None, left, right, oper, label))
+
+
+def compare(name, source, repeat):
+    program = Parser(tokenize(source)).parse()
+    outputs = set()
+    cells = []
+    for generator in (ValueConditionIRGenerator, IRGenerator):
+        tac = generator().generate(program)
+        for level in (0, 2):
+            code = optimize(tac, level)
+            out, steps = run(code)
+            outputs.add(out)
+            t = best_of(repeat, lambda: run(code))
+            cells.append(f"{len(code):5} {steps:8} {t * 1e3:7.2f}")
+    note = "" if len(outputs) == 1 else " *"
+    print(f"{name:24} " + "  ".join(cells) + note)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--iterations", type=int, default=500, help="loop iterations of condition_program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    heads = ["values -O0", "values -O2", "jumps -O0", "jumps -O2"]
+    print(f"{'':24} " + "  ".join(f"{head:^22}" for head in heads))
+    print(f"{'program':24} " + "  ".join(["  TAC       VM      ms"] * len(heads)))
+    compare(f"condition_program({args.iterations})", condition_program(args.iterations), args.repeat)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            compare(path.stem, path.read_text(encoding="utf-8"), args.repeat)
+        except Exception:
+            continue  # programs with errors on purpose
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Tiempo de conversión a SSA y de vuelta (`to_ssa` / `from_ssa`).
+
+Mide ambas fases sobre programas de tamaño creciente (ns por instrucción TAC
+constantes = coste lineal), también con miles de bucles anidados, y comprueba
+que el TAC resultante imprime lo mismo en la VM.
+
+Uso:
+    python benchmarks/bench_ssa.py
+    python benchmarks/bench_ssa.py --sizes 25000 100000 --repeat 5
+"""
+import argparse
+import copy
+
+from programs import best_of, call_program, expression_program, nested_program, run, tac_of
+from minilang_compiler.cfg import build_cfg
+from minilang_compiler.ssa import from_ssa, to_ssa
+
+
+def fresh_cfg(tac):
+    # The passes rewrite instructions in place: work on copies
+    return build_cfg([copy.copy(instr) for instr in tac])
+
+
+def in_ssa(tac):
+    program = fresh_cfg(tac)
+    to_ssa(program)
+    return program
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000],
+                    help="approximate TAC instructions per program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    shapes = [
+        ("calls", call_program, len(tac_of(call_program(100))) // 100),
+        ("exprs", expression_program, max(1, len(tac_of(expression_program(1000))) // 1000)),
+        # Liveness crosses every enclosing loop
+        ("nests", nested_program, len(tac_of(nested_program(100))) // 100),
+    ]
+    for name, make, per_unit in shapes:
+        for size in args.sizes:
+            tac = tac_of(make(max(1, size // per_unit)))
+            n = len(tac)
+            into = best_of(args.repeat, to_ssa, lambda: fresh_cfg(tac))
+            back = best_of(args.repeat, from_ssa, lambda: in_ssa(tac))
+            program = in_ssa(tac)
+            phis = sum(1 for r in program.regions for i in r.instructions() if i.op.name == 'PHI')
+            from_ssa(program)
+            result = program.linearize()
+            same = run(result)[0] == run(tac)[0]
+            print(f"{name} {n:7} TAC {phis:6} phis  to_ssa {into / n * 1e9:5.0f}  "
+                  f"from_ssa {back / n * 1e9:5.0f} ns/instr  -> {len(result)} TAC, "
+                  f"{'same output' if same else 'OUTPUT DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Memoria pico de lexer+parser: lista de tokens frente a `iter_tokens` + `StreamParser`.
+
+También mide `tokenize_compact` + `CompactParser` (tokens en arrays paralelos):
+la columna de segundos muestra lo que cuesta en tiempo cada representación.
+
+Uso:
+    python benchmarks/bench_stream.py            # programa de 4 MB
+    python benchmarks/bench_stream.py --size 16
+"""
+import argparse
+import gc
+import mmap
+import os
+import tempfile
+import time
+import tracemalloc
+
+from programs import program_of_size
+from minilang_compiler.lexer import tokenize, tokenize_compact, iter_tokens
+from minilang_compiler.parser import CompactParser, Parser, StreamParser
+
+
+def parse_list(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return Parser(tokenize(text)).parse()
+
+
+def parse_compact(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return CompactParser(tokenize_compact(text)).parse()
+
+
+def parse_stream(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return StreamParser(iter_tokens(mm)).parse()
+
+
+def measure(fn, path):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    program = fn(path)
+    elapsed = time.perf_counter() - start
+    ast_bytes, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return program, elapsed, ast_bytes, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size", type=float, default=4, help="program size in MB")
+    args = ap.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.minilang')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(program_of_size(int(args.size * 1024 * 1024)))
+        print(f"{'mode':>8} {'seconds':>9} {'AST MB':>9} {'peak MB':>9} {'peak/AST':>9}")
+        for name, fn in (("list", parse_list), ("compact", parse_compact), ("stream", parse_stream)):
+            program, elapsed, ast_bytes, peak = measure(fn, path)
+            del program
+            print(f"{name:>8} {elapsed:>9.2f} {ast_bytes / 2**20:>9.1f} {peak / 2**20:>9.1f} {peak / ast_bytes:>9.2f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
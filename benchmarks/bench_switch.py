@@ -0,0 +1,69 @@
+"""Efecto de convertir las cadenas `if x == c ... elif x == c'` en un `switch` (`IRGenerator.switch_cases`).
+
+Sobre `programs.elif_program` (`tests/test_elif_all_branches.minilang` con
+cientos de ramas, con valores de caso seguidos o separados por `--stride`)
+y los `tests/*.minilang` compara el TAC con la cadena de comparaciones, que
+hace una comparación por rama hasta dar con la buena, con el TAC con un
+`switch`, que la VM resuelve con una sola instrucción `SWITCH` (tabla de
+saltos si los valores son densos, búsqueda binaria si no). Muestra, sin
+optimizar y a `-O2`, las instrucciones TAC, las instrucciones ejecutadas por
+la VM (con la misma salida) y el tiempo de ejecución en la VM.
+
+Uso:
+    python benchmarks/bench_switch.py
+    python benchmarks/bench_switch.py --branches 100 500 --stride 7 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, best_of, elif_program, run
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.optimizer import optimize
+
+
+class ChainIRGenerator(IRGenerator):
+    """Every elif chain stays a chain of comparisons."""
+    min_switch_cases = float('inf')
+
+
+def compare(name, source, repeat):
+    program = Parser(tokenize(source)).parse()
+    outputs = set()
+    cells = []
+    for generator in (ChainIRGenerator, IRGenerator):
+        tac = generator().generate(program)
+        for level in (0, 2):
+            code = optimize(tac, level)
+            out, steps = run(code)
+            outputs.add(out)
+            t = best_of(repeat, lambda: run(code))
+            cells.append(f"{len(code):5} {steps:8} {t * 1e3:7.2f}")
+    note = "" if len(outputs) == 1 else " !"
+    print(f"{name:24} " + "  ".join(cells) + note)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--branches", type=int, nargs="+", default=[10, 100, 300],
+                    help="branches of elif_program")
+    ap.add_argument("--stride", type=int, default=7,
+                    help="distance between the case values of the sparse programs")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    heads = ["chain -O0", "chain -O2", "switch -O0", "switch -O2"]
+    print(f"{'':24} " + "  ".join(f"{head:^22}" for head in heads))
+    print(f"{'program':24} " + "  ".join(["  TAC       VM      ms"] * len(heads)))
+    for n in args.branches:
+        compare(f"elif({n})", elif_program(n), args.repeat)
+        compare(f"elif({n}, stride={args.stride})", elif_program(n, args.stride), args.repeat)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            compare(path.stem, path.read_text(encoding="utf-8"), args.repeat)
+        except Exception:
+            continue  # programs with errors on purpose
+
+
+if __name__ == "__main__":
+    main()
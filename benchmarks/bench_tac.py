@@ -0,0 +1,60 @@
+"""Memoria por instrucción TAC y tiempo de IR -> ASM.
+
+Mide los bytes asignados por instrucción al generar el TAC (tracemalloc) y el
+tiempo de generar el TAC, plegar constantes y emitir el ensamblador.
+
+Uso:
+    python benchmarks/bench_tac.py
+    python benchmarks/bench_tac.py --blocks 50000 --repeat 5
+"""
+import argparse
+import gc
+import tracemalloc
+
+from programs import best_of, call_program, expression_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.optimizer import constant_folding
+from minilang_compiler.codegen_asm import generate_asm
+
+
+def tac_bytes(program):
+    """Bytes still allocated by the TAC list of `program` (and its instructions)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tac = IRGenerator().generate(program)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return tac, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--blocks", type=int, default=20000, help="loop blocks in the call-heavy program")
+    ap.add_argument("--statements", type=int, default=20000, help="statements in the expression program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    programs = [
+        ("calls", call_program(args.blocks)),
+        ("exprs", expression_program(args.statements)),
+    ]
+    for name, source in programs:
+        program = Parser(tokenize(source)).parse()
+        tac, size = tac_bytes(program)
+        n = len(tac)
+        ir = best_of(args.repeat, lambda: IRGenerator().generate(program))
+        fold = best_of(args.repeat, lambda: constant_folding(tac))
+        folded = constant_folding(tac)
+        asm = best_of(args.repeat, lambda: generate_asm(folded))
+        total = ir + fold + asm
+        print(f"{name}: {n} TAC  {size / n:5.1f} B/instr  ir {ir * 1e3:6.1f} ms  "
+              f"fold {fold * 1e3:5.1f} ms  asm {asm * 1e3:6.1f} ms  "
+              f"total {total / n * 1e9:5.0f} ns/instr")
+
+
+if __name__ == "__main__":
+    main()
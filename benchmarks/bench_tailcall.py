@@ -0,0 +1,86 @@
+"""Efecto de la eliminación de llamadas de cola (`optimizer.tail_call_elimination`).
+
+Sobre `programs.tail_call_program` (funciones que se llaman a sí mismas en
+posición de cola) y los `tests/*.minilang`, compara el pipeline de `-O2` con
+y sin la pasada: llamadas de cola eliminadas, instrucciones ejecutadas
+por la VM (con la misma salida), profundidad máxima de `SimpleVM.call_stack`
+(cada marco guarda una copia de las variables) y tiempo de ejecución en la
+VM.
+
+Uso:
+    python benchmarks/bench_tailcall.py
+    python benchmarks/bench_tailcall.py --depth 5000 --repeat 5
+"""
+import argparse
+
+from programs import ROOT_DIR, CountingCode, best_of, execute, tac_of, tail_call_program
+from minilang_compiler.codegen_asm import generate_asm
+from minilang_compiler.codegen_machine import assemble
+from minilang_compiler.runtime_vm import SimpleVM
+from minilang_compiler.optimizer import PIPELINES, PassManager
+
+
+class DepthStack(list):
+    """Call stack that remembers its largest size."""
+
+    def __init__(self):
+        super().__init__()
+        self.deepest = 0
+
+    def append(self, frame):
+        list.append(self, frame)
+        self.deepest = max(self.deepest, len(self))
+
+
+def run(tac):
+    """(output, executed instructions, deepest call stack) of `tac` in the VM."""
+    code = CountingCode(assemble(generate_asm(tac)))
+    vm = SimpleVM(code)
+    vm.call_stack = DepthStack()
+    code.fetched = 0
+    return execute(vm), code.fetched, vm.call_stack.deepest
+
+
+def optimized(tac, tail_calls):
+    """(TAC, removed tail calls) of -O2 with or without the pass."""
+    pipeline = [step for step in PIPELINES[2]
+                if tail_calls or step != 'tail_call_elimination']
+    manager = PassManager(pipeline)
+    result = manager.run(tac)
+    stats = manager.stats.get('tail_call_elimination')
+    return result, stats.changes if stats else 0
+
+
+def compare(name, tac, repeat):
+    out, steps, depth = run(tac)
+    cells = []
+    for tail_calls in (False, True):
+        result, removed = optimized(tac, tail_calls)
+        result_out, result_steps, result_depth = run(result)
+        t = best_of(repeat, lambda: run(result))
+        note = "" if result_out == out else "!"
+        cells.append(f"{removed:5} {result_steps:8} {result_depth:6} {t * 1e3:8.2f}{note}")
+    print(f"{name:24} {steps:8} {depth:6}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--depth", type=int, default=2000, help="recursion depth of total()")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'':24} {'not optimized':>15}  {'no TCO':^30}  {'TCO':^30}")
+    print(f"{'program':24} {'VM':>8} {'depth':>6}  "
+          + "  ".join(["tails       VM  depth    VM ms"] * 2))
+    compare(f"tail_call_program({args.depth})", tac_of(tail_call_program(args.depth)),
+            args.repeat)
+    for path in sorted((ROOT_DIR / "tests").glob("*.minilang")):
+        try:
+            test_tac = tac_of(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue  # programs with errors on purpose
+        compare(path.stem, test_tac, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Bytes por token: lista de `Token` frente a `TokenStream` compacto.
+
+Uso:
+    python benchmarks/bench_token_memory.py            # programa de 2 MB
+    python benchmarks/bench_token_memory.py --size 8
+"""
+import argparse
+import gc
+import tracemalloc
+
+from programs import best_of, program_of_size
+from minilang_compiler.lexer import tokenize, tokenize_compact
+from minilang_compiler.parser import CompactParser, Parser
+
+
+def measure(fn, text):
+    gc.collect()
+    tracemalloc.start()
+    tokens = fn(text)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tokens, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size", type=float, default=2, help="program size in MB")
+    args = ap.parse_args()
+
+    text = program_of_size(int(args.size * 1024 * 1024))
+    print(f"{'representation':>16} {'tokens':>10} {'bytes/token':>12} {'parse s':>8}")
+    programs = []
+    for name, fn, parser in (("List[Token]", tokenize, Parser),
+                             ("TokenStream", tokenize_compact, CompactParser)):
+        tokens, size = measure(fn, text)
+        elapsed = best_of(3, lambda: parser(tokens).parse())
+        programs.append(parser(tokens).parse())
+        print(f"{name:>16} {len(tokens):>10} {size / len(tokens):>12.1f} {elapsed:>8.2f}")
+        del tokens
+    assert programs[0] == programs[1], "TokenStream produced a different AST"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Tiempo por nodo del análisis semántico y de la generación de TAC.
+
+Uso:
+    python benchmarks/bench_visitors.py
+    python benchmarks/bench_visitors.py --blocks 50000 --repeat 5
+"""
+import argparse
+
+from programs import best_of, call_program, expression_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.semantic import SemanticAnalyzer
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.arena import AstArena
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--blocks", type=int, default=20000, help="loop blocks in the call-heavy program")
+    ap.add_argument("--statements", type=int, default=20000, help="statements in the expression program")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    programs = [
+        ("calls", call_program(args.blocks)),
+        ("exprs", expression_program(args.statements)),
+    ]
+    for name, source in programs:
+        program = Parser(tokenize(source)).parse()
+        nodes = len(AstArena.from_program(program))
+        sem = best_of(args.repeat, lambda: SemanticAnalyzer().analyze(program))
+        ir = best_of(args.repeat, lambda: IRGenerator().generate(program))
+        print(f"{name}: {nodes} nodes  semantic {sem / nodes * 1e9:5.0f} ns/node  "
+              f"ir {ir / nodes * 1e9:5.0f} ns/node  total {(sem + ir) / nodes * 1e9:5.0f} ns/node")
+
+
+if __name__ == "__main__":
+    main()
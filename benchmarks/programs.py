@@ -0,0 +1,306 @@
+"""Generadores de programas MiniLang sintéticos y utilidades de los benchmarks.
+
+Cada generador devuelve texto fuente válido (pasa el análisis semántico).
+`best_of`, `tac_of` y `run` son las piezas comunes de los `bench_*.py`:
+medir, compilar a TAC y ejecutar en la VM contando instrucciones.
+"""
+import builtins
+import contextlib
+import copy
+import gc
+import io
+import sys
+import time
+from pathlib import Path
+
+# Make `minilang_compiler` importable when running `python benchmarks/xxx.py`.
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.semantic import SemanticAnalyzer
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.cfg import build_cfg
+from minilang_compiler.ssa import to_ssa
+from minilang_compiler.optimizer import constant_propagation, dead_code_elimination
+from minilang_compiler.codegen_asm import generate_asm
+from minilang_compiler.codegen_machine import assemble
+from minilang_compiler.runtime_vm import SimpleVM
+
+# Values typed at the `read`s of the test programs
+INPUTS = ['5', '10', '3', '4']
+
+
+class CountingCode(list):
+    """Machine code that counts the instructions the VM fetches."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.fetched = 0
+
+    def __getitem__(self, i):
+        self.fetched += 1
+        return list.__getitem__(self, i)
+
+
+def best_of(repeat, fn, setup=None):
+    """Best time of `fn()` in `repeat` runs.
+
+    With `setup`, times `fn(setup())` instead; `setup` runs outside the clock.
+    Like `timeit`, the cyclic GC is disabled while timing: its cost grows with
+    whatever the benchmark keeps alive, not with `fn`.
+    """
+    times = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn(*args)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def tac_of(source):
+    """TAC of `source`; raises on programs that fail semantic analysis."""
+    program = Parser(tokenize(source)).parse()
+    SemanticAnalyzer().analyze(program)
+    return IRGenerator().generate(program)
+
+
+def propagated_ssa(tac):
+    """CFG of a copy of `tac` in SSA, with constants propagated and dead code gone."""
+    program = build_cfg([copy.copy(instr) for instr in tac])
+    to_ssa(program)
+    constant_propagation(program)
+    dead_code_elimination(program)
+    return program
+
+
+def execute(vm):
+    """Output of `vm.run()`, with `INPUTS` answering its `read`s."""
+    inputs = iter(INPUTS)
+    out = io.StringIO()
+    saved_input = builtins.input
+    builtins.input = lambda *args: next(inputs, '0')
+    try:
+        with contextlib.redirect_stdout(out):
+            vm.run()
+    finally:
+        builtins.input = saved_input
+    return out.getvalue()
+
+
+def run_asm(asm):
+    """(output, executed instructions) of the assembly `asm` in the VM."""
+    code = CountingCode(assemble(asm))
+    vm = SimpleVM(code)
+    code.fetched = 0
+    return execute(vm), code.fetched
+
+
+def run(tac):
+    """(output, executed instructions) of `tac` in the VM."""
+    return run_asm(generate_asm(tac))
+
+
+_CHUNK = """// block {i}
+x{i} = {i} * 3 + (y - 7) % 5;
+if x{i} >= 10 and not x{i} == 42 {{
+    print "value of x{i}: ";
+    print x{i};
+}} elif x{i} < 0 {{
+    print 0;
+}} else {{
+    /* nothing to see
+       here */
+    y = y + 1;
+}}
+while y > 100 {{
+    y = y - x{i} / 2;
+}}
+"""
+
+
+def program_of_size(n_bytes: int) -> str:
+    """Return a program of roughly `n_bytes` characters."""
+    parts = ["y = 1;\n"]
+    size = len(parts[0])
+    i = 0
+    while size < n_bytes:
+        chunk = _CHUNK.format(i=i)
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append("end\n")
+    return "".join(parts)
+
+
+def expression_program(n_statements: int, seed: int = 0) -> str:
+    """Return `n_statements` assignments of mixed arithmetic/logical expressions."""
+    import random
+    rng = random.Random(seed)
+    names = ["a", "b", "c", "d"]
+    lines = [f"{name} = {i + 1};" for i, name in enumerate(names)]
+
+    def atom():
+        r = rng.random()
+        if r < 0.4:
+            return rng.choice(names)
+        if r < 0.85:
+            return str(rng.randrange(100))
+        return f"({expr(1)})"
+
+    def expr(depth):
+        if depth == 0:
+            return atom()
+        op = rng.choice(["+", "-", "*", "/", "%", "+", "*"])
+        return f"{expr(depth - 1)} {op} {atom()}"
+
+    for i in range(n_statements):
+        left = expr(3)
+        right = expr(2)
+        rel = rng.choice(["<", ">", "<=", ">=", "==", "!="])
+        if i % 4 == 0:
+            lines.append(f"if {left} {rel} {right} and not a == {i} {{ print {left}; }}")
+        else:
+            lines.append(f"{names[i % 4]} = {left};")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def nested_program(depth: int) -> str:
+    """Return `depth` nested if/while/for blocks (cycling) around one `print`.
+
+    Every block runs exactly once, so the program prints `depth` and then a
+    deeply parenthesized expression evaluating to `depth`.
+    """
+    opens = ["x = 0;\n"]
+    for k in range(depth):
+        kind = k % 3
+        if kind == 0:
+            opens.append("if x >= 0 {\n")
+        elif kind == 1:
+            opens.append(f"w{k} = 1;\nwhile w{k} > 0 {{\nw{k} = 0;\n")
+        else:
+            opens.append(f"for f{k} = 0; f{k} < 1; f{k} = f{k} + 1 {{\n")
+        opens.append("x = x + 1;\n")
+    inner = "print x;\nprint " + "(" * depth + "0" + " + 1)" * depth + ";\n"
+    return "".join(opens) + inner + "}\n" * depth + "end\n"
+
+
+def call_program(n_blocks: int) -> str:
+    """Return `n_blocks` for-loops calling small functions, plus reads/ifs/whiles.
+
+    Exercises every statement and expression node type, including the ones
+    that come last in an isinstance chain (`For`, `FuncCall`).
+    """
+    lines = [
+        "def scale(a, b) { return a * b + 1; }",
+        "def pick(a) { if a > 10 { return a - 10; } else { return not a; } }",
+        "s = 0;",
+        "read n;",
+    ]
+    for k in range(n_blocks):
+        lines.append(
+            f"for i{k} = 0; i{k} < {k % 5}; i{k} = i{k} + 1 {{ "
+            f"s = s + scale(i{k}, -{k}) % pick(s); }}"
+        )
+        lines.append(f"while s > {k} {{ s = s - (n + 1); }}")
+        lines.append(f"if s == {k} {{ print \"s\"; }} elif s < 0 {{ print s; }}")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def index_program(n_loops: int) -> str:
+    """Return `n_loops` double loops that repeat `i * n + j` in their body.
+
+    The repeated expression appears in straight-line statements and inside
+    an `if`, so both per-block and dominator-based reuse have work to do.
+    """
+    lines = ["n = 6;", "s = 0;"]
+    for k in range(n_loops):
+        lines.append(
+            f"for i = 0; i < n; i = i + 1 {{ for j = 0; j < n; j = j + 1 {{ "
+            f"a = i * n + j; b = (i * n + j) % {k + 2}; "
+            f"if i * n + j > b {{ s = s + (i * n + j) / 2 - a; }} }} }}"
+        )
+    lines.append("print s;")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def counted_program(n_loops: int) -> str:
+    """Return `n_loops` groups of `for` loops over an int induction variable.
+
+    Each group has a short loop with constant bounds, a long one and one
+    bounded by a variable, with `i * k`-style values in their bodies.
+    """
+    lines = ["read n;", "s = 0;"]
+    for k in range(n_loops):
+        lines.append(f"for i = 0; i < 4; i = i + 1 {{ print i * {k + 2} + 1; }}")
+        lines.append(f"for i = 1; i <= 100; i = i + 1 {{ s = s + i * {k + 3} - 1; }}")
+        lines.append(f"for i = 0; i < n; i = i + 1 {{ s = s + (2 * i + {k}) % 7; }}")
+    lines.append("print s;")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def tail_call_program(depth: int) -> str:
+    """Return a program whose functions recurse `depth` times in tail position."""
+    return "\n".join([
+        "def total(n, acc) { if n == 0 { return acc; } return total(n - 1, acc + n); }",
+        "def collatz(n, steps) { if n == 1 { return steps; } "
+        "if n % 2 == 0 { return collatz(n / 2, steps + 1); } "
+        "return collatz(3 * n + 1, steps + 1); }",
+        "read n;",
+        f"print total({depth}, 0);",
+        "print total(n, 0);",
+        f"for i = 1; i <= {depth} / 20; i = i + 1 {{ print collatz(i, 0); }}",
+        "end",
+    ]) + "\n"
+
+
+def condition_program(n_iterations: int) -> str:
+    """Return a loop of `n_iterations` whose conditions combine `and`, `or` and `not`.
+
+    The right operands call a function that loops, and most of the time the
+    left operand alone decides the condition.
+    """
+    return "\n".join([
+        "def costly(a) { s = 0; for j = 0; j < 10; j = j + 1 { s = s + (a + j) % 7; } return s; }",
+        "read n;",
+        "count = 0;",
+        f"for i = 0; i < {n_iterations}; i = i + 1 {{",
+        "    if i % 5 == 0 and costly(i) > 30 { count = count + 1; }",
+        "    if i % 4 != 0 or costly(i + n) > 25 { count = count + 2; }",
+        "    if not (i < 3) and (i != n or i == 7) { count = count + 3; }",
+        "}",
+        "k = 0;",
+        "while k < n and not (k == 1000) { k = k + 1; }",
+        "print count;",
+        "print k;",
+        "end",
+    ]) + "\n"
+
+
+def elif_program(n_branches: int, stride: int = 1) -> str:
+    """Return `tests/test_elif_all_branches.minilang` scaled to `n_branches` branches.
+
+    A loop runs one `if x == 0 ... elif x == ...` chain once with the value
+    of each branch (multiples of `stride`) and once with a value that takes
+    the `else`.
+    """
+    lines = ["total = 0;", "misses = 0;",
+             f"for i = 0; i <= {n_branches}; i = i + 1 {{",
+             f"    x = i * {stride};",
+             "    if x == 0 { total = total + 1; }"]
+    for k in range(1, n_branches):
+        lines.append(f"    elif x == {k * stride} {{ total = total + {k + 1}; }}")
+    lines += ["    else { misses = misses + 1; }", "}", "print total;", "print misses;", "end"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,66 @@
+"""Prueba de estrés: programas con decenas de miles de bloques anidados.
+
+Compila (lexer → parser → semántico → TAC → `-O` por defecto del compilador
+→ ASM → máquina) y ejecuta un programa generado con `--depth` bloques
+if/while/for anidados y una expresión con la misma profundidad de
+paréntesis, con el límite de recursión por defecto de Python, y comprueba la
+salida de la VM.
+
+Uso:
+    python benchmarks/stress_nesting.py
+    python benchmarks/stress_nesting.py --depth 200000
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+from programs import nested_program
+from minilang_compiler.lexer import tokenize
+from minilang_compiler.parser import Parser
+from minilang_compiler.semantic import SemanticAnalyzer
+from minilang_compiler.ir import IRGenerator
+from minilang_compiler.optimizer import DEFAULT_LEVEL, optimize
+from minilang_compiler.codegen_asm import generate_asm
+from minilang_compiler.codegen_machine import assemble
+from minilang_compiler.runtime_vm import SimpleVM
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--depth", type=int, default=50000, help="nesting levels")
+    args = ap.parse_args()
+
+    source = nested_program(args.depth)
+    print(f"depth {args.depth}: {len(source)} bytes, recursion limit {sys.getrecursionlimit()}")
+
+    def phase(name, fn, *fn_args):
+        start = time.perf_counter()
+        result = fn(*fn_args)
+        print(f"  {name:<9} {time.perf_counter() - start:7.3f} s")
+        return result
+
+    tokens = phase("lexer", tokenize, source)
+    program = phase("parser", lambda: Parser(tokens).parse())
+    phase("semantic", lambda: SemanticAnalyzer().analyze(program))
+    tac = phase("ir", lambda: IRGenerator().generate(program))
+    tac = phase("optimize", optimize, tac, DEFAULT_LEVEL)
+    asm = phase("asm", generate_asm, tac)
+    machine = phase("assemble", assemble, asm)
+    out = io.StringIO()
+
+    def run_vm():
+        with contextlib.redirect_stdout(out):
+            SimpleVM(machine).run()
+
+    phase("vm", run_vm)
+    lines = out.getvalue().split()
+    expected = [str(args.depth), str(args.depth)]
+    print(f"  output {lines} ({len(tac)} TAC instructions)")
+    if lines != expected:
+        sys.exit(f"unexpected output, wanted {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,18 @@ __all__ = [
     "lexer",
     "tokens",
     "parser",
+    "incremental",
     "ast_nodes",
+    "arena",
+    "visitor",
     "semantic",
     "ir",
+    "fused",
+    "cfg",
+    "ssa",
     "optimizer",
     "codegen_asm",
+    "peephole",
     "codegen_machine",
     "runtime_vm",
     "compiler",
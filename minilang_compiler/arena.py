@@ -0,0 +1,268 @@
+"""Representación compacta del AST en un "arena" de arrays planos.
+
+Cada nodo es un índice: `kinds[i]` guarda su tipo y `a[i]`..`d[i]` sus campos
+(índices de hijos, de constantes o de listas). Nombres, operadores y valores
+literales se guardan una sola vez en `consts`; las listas de hijos (bloques,
+argumentos, parámetros) viven en `lists` como `[n, e1, ..., en]` y un campo
+de lista guarda el desplazamiento de `n`.
+
+| nodo        | a            | b            | c            | d           |
+|-------------|--------------|--------------|--------------|-------------|
+| Program     | lista funcs  | lista sents  |              |             |
+| FuncDef     | const nombre | lista params | lista cuerpo |             |
+| Return      | expr         |              |              |             |
+| Read        | const var    |              |              |             |
+| Print       | expr         |              |              |             |
+| Assign      | const target | expr         |              |             |
+| If          | cond         | lista then   | lista elifs  | lista else  |
+| ElifBlock   | cond         | lista cuerpo |              |             |
+| While       | cond         | lista cuerpo |              |             |
+| For         | init         | cond         | update       | lista cuerpo|
+| BinaryOp    | const op     | left         | right        |             |
+| UnaryOp     | const op     | operand      |              |             |
+| Literal     | const valor  |              |              |             |
+| StringLit.  | const valor  |              |              |             |
+| Var         | const nombre |              |              |             |
+| FuncCall    | const nombre | lista args   |              |             |
+
+`If.d` vale -1 cuando no hay `else`. `AstArena.view(i)` devuelve una vista
+ligera que es instancia de la clase de `ast_nodes` correspondiente (p. ej.
+`IfView` hereda de `If`), así que `SemanticAnalyzer` e `IRGenerator` recorren
+el arena sin cambios; los hijos se crean como vistas bajo demanda.
+"""
+from array import array
+from operator import attrgetter
+from typing import Any, Dict, List
+
+from . import ast_nodes as ast
+
+
+# Node kind codes, in table order.
+_NODE_CLASSES = (
+    ast.Program, ast.FuncDef, ast.Return, ast.Read, ast.Print, ast.Assign,
+    ast.If, ast.ElifBlock, ast.While, ast.For, ast.BinaryOp, ast.UnaryOp,
+    ast.Literal, ast.StringLiteral, ast.Var, ast.FuncCall,
+)
+_KIND = {cls: code for code, cls in enumerate(_NODE_CLASSES)}
+
+_NO_LIST = -1
+
+
+class AstArena:
+    """Flat, array-backed copy of a `Program`."""
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.a = array('i')
+        self.b = array('i')
+        self.c = array('i')
+        self.d = array('i')
+        self.lists = array('i')
+        self.consts: List[Any] = []
+        self.root = -1
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def from_program(cls, program: ast.Program) -> 'AstArena':
+        """Copy `program` into a new arena (iteratively, any nesting depth)."""
+        arena = cls()
+        arena.root = arena._add(program)
+        return arena
+
+    def program(self) -> ast.Program:
+        """View of the root `Program` node."""
+        return self.view(self.root)
+
+    def view(self, i: int):
+        """Lightweight node view for index `i`."""
+        return _VIEW_CLASSES[self.kinds[i]](self, i)
+
+    def nbytes(self) -> int:
+        """Bytes used by the arrays (constants are shared objects, not counted)."""
+        arrays = (self.kinds, self.a, self.b, self.c, self.d, self.lists)
+        return sum(arr.itemsize * len(arr) for arr in arrays)
+
+    # -- building ---------------------------------------------------------------
+
+    def _add(self, root) -> int:
+        """Append `root` and its descendants; return the index of `root`.
+
+        Indices are allocated when a node is first reached, its fields are
+        filled in when it is popped from the work list.
+        """
+        work = []
+        const_index: Dict[Any, int] = {value: k for k, value in enumerate(self.consts)}
+
+        def const(value) -> int:
+            idx = const_index.get(value)
+            if idx is None:
+                idx = const_index[value] = len(self.consts)
+                self.consts.append(value)
+            return idx
+
+        def alloc(node) -> int:
+            i = len(self.kinds)
+            self.kinds.append(_KIND[type(node)])
+            self.a.append(0)
+            self.b.append(0)
+            self.c.append(0)
+            self.d.append(0)
+            work.append((node, i))
+            return i
+
+        def node_list(nodes) -> int:
+            offset = len(self.lists)
+            self.lists.append(len(nodes))
+            self.lists.extend([0] * len(nodes))
+            for k, node in enumerate(nodes):
+                self.lists[offset + 1 + k] = alloc(node)
+            return offset
+
+        def const_list(values) -> int:
+            offset = len(self.lists)
+            self.lists.append(len(values))
+            self.lists.extend([const(v) for v in values])
+            return offset
+
+        a, b, c, d = self.a, self.b, self.c, self.d
+        root_index = alloc(root)
+        while work:
+            node, i = work.pop()
+            cls = type(node)
+            if cls is ast.Program:
+                a[i] = node_list(node.functions)
+                b[i] = node_list(node.statements)
+            elif cls is ast.FuncDef:
+                a[i] = const(node.name)
+                b[i] = const_list(node.params)
+                c[i] = node_list(node.body)
+            elif cls is ast.Return or cls is ast.Print:
+                a[i] = alloc(node.expr)
+            elif cls is ast.Read:
+                a[i] = const(node.var)
+            elif cls is ast.Assign:
+                a[i] = const(node.target)
+                b[i] = alloc(node.expr)
+            elif cls is ast.If:
+                a[i] = alloc(node.cond)
+                b[i] = node_list(node.then_block)
+                c[i] = node_list(node.elif_blocks)
+                d[i] = _NO_LIST if node.else_block is None else node_list(node.else_block)
+            elif cls is ast.ElifBlock or cls is ast.While:
+                a[i] = alloc(node.cond)
+                b[i] = node_list(node.body)
+            elif cls is ast.For:
+                a[i] = alloc(node.init)
+                b[i] = alloc(node.cond)
+                c[i] = alloc(node.update)
+                d[i] = node_list(node.body)
+            elif cls is ast.BinaryOp:
+                a[i] = const(node.op)
+                b[i] = alloc(node.left)
+                c[i] = alloc(node.right)
+            elif cls is ast.UnaryOp:
+                a[i] = const(node.op)
+                b[i] = alloc(node.operand)
+            elif cls is ast.Literal or cls is ast.StringLiteral:
+                a[i] = const(node.value)
+            elif cls is ast.Var:
+                a[i] = const(node.name)
+            else:  # FuncCall
+                a[i] = const(node.name)
+                b[i] = node_list(node.args)
+        return root_index
+
+    # -- access helpers used by the views ---------------------------------------
+
+    def _nodes(self, offset: int) -> list:
+        if offset == _NO_LIST:
+            return None
+        lists = self.lists
+        kinds = self.kinds
+        n = lists[offset]
+        return [_VIEW_CLASSES[kinds[j]](self, j) for j in lists[offset + 1:offset + 1 + n]]
+
+    def _consts(self, offset: int) -> list:
+        lists = self.lists
+        consts = self.consts
+        n = lists[offset]
+        return [consts[j] for j in lists[offset + 1:offset + 1 + n]]
+
+
+# -- views ----------------------------------------------------------------------
+#
+# Each view subclasses its node class; properties shadow the dataclass slots
+# and decode the arena fields on access. Views are read-only.
+
+def _child(column):
+    get_column = attrgetter(column)
+
+    def fget(self):
+        arena = self._arena
+        j = get_column(arena)[self._i]
+        return _VIEW_CLASSES[arena.kinds[j]](arena, j)
+    return property(fget)
+
+
+def _const_field(column):
+    get_column = attrgetter(column)
+
+    def fget(self):
+        arena = self._arena
+        return arena.consts[get_column(arena)[self._i]]
+    return property(fget)
+
+
+def _node_list(column):
+    get_column = attrgetter(column)
+
+    def fget(self):
+        arena = self._arena
+        return arena._nodes(get_column(arena)[self._i])
+    return property(fget)
+
+
+def _const_list(column):
+    get_column = attrgetter(column)
+
+    def fget(self):
+        arena = self._arena
+        return arena._consts(get_column(arena)[self._i])
+    return property(fget)
+
+
+def _view_class(node_cls, **fields):
+    def __init__(self, arena: AstArena, i: int):
+        self._arena = arena
+        self._i = i
+
+    namespace = {'__slots__': ('_arena', '_i'), '__init__': __init__}
+    namespace.update(fields)
+    return type(node_cls.__name__ + 'View', (node_cls,), namespace)
+
+
+ProgramView = _view_class(ast.Program, functions=_node_list('a'), statements=_node_list('b'))
+FuncDefView = _view_class(ast.FuncDef, name=_const_field('a'), params=_const_list('b'), body=_node_list('c'))
+ReturnView = _view_class(ast.Return, expr=_child('a'))
+ReadView = _view_class(ast.Read, var=_const_field('a'))
+PrintView = _view_class(ast.Print, expr=_child('a'))
+AssignView = _view_class(ast.Assign, target=_const_field('a'), expr=_child('b'))
+IfView = _view_class(ast.If, cond=_child('a'), then_block=_node_list('b'),
+                     elif_blocks=_node_list('c'), else_block=_node_list('d'))
+ElifBlockView = _view_class(ast.ElifBlock, cond=_child('a'), body=_node_list('b'))
+WhileView = _view_class(ast.While, cond=_child('a'), body=_node_list('b'))
+ForView = _view_class(ast.For, init=_child('a'), cond=_child('b'), update=_child('c'), body=_node_list('d'))
+BinaryOpView = _view_class(ast.BinaryOp, op=_const_field('a'), left=_child('b'), right=_child('c'))
+UnaryOpView = _view_class(ast.UnaryOp, op=_const_field('a'), operand=_child('b'))
+LiteralView = _view_class(ast.Literal, value=_const_field('a'))
+StringLiteralView = _view_class(ast.StringLiteral, value=_const_field('a'))
+VarView = _view_class(ast.Var, name=_const_field('a'))
+FuncCallView = _view_class(ast.FuncCall, name=_const_field('a'), args=_node_list('b'))
+
+_VIEW_CLASSES = (
+    ProgramView, FuncDefView, ReturnView, ReadView, PrintView, AssignView,
+    IfView, ElifBlockView, WhileView, ForView, BinaryOpView, UnaryOpView,
+    LiteralView, StringLiteralView, VarView, FuncCallView,
+)
@@ -1,62 +1,72 @@
-"""AST node definitions for MiniLang."""
+"""AST node definitions for MiniLang.
+
+Nodes are slotted dataclasses (no per-instance `__dict__`); see `arena.py`
+for an even more compact, array-based representation.
+"""
 from dataclasses import dataclass
 from typing import List, Optional, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Program(Node):
     functions: List[Any]  # List of FuncDef
     statements: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class FuncDef(Node):
     name: str
     params: List[str]
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class Return(Node):
     expr: Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Read(Node):
     var: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Print(Node):
     expr: Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Node):
     target: str
     expr: Any
 
 
-@dataclass
+@dataclass(slots=True)
+class ElifBlock(Node):
+    cond: Any
+    body: List[Node]
+
+
+@dataclass(slots=True)
 class If(Node):
     cond: Any
     then_block: List[Node]
-    elif_blocks: List[tuple]  # List of (condition, block) tuples
+    elif_blocks: List[ElifBlock]
     else_block: Optional[List[Node]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class While(Node):
     cond: Any
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class For(Node):
     init: Any  # Assign node
     cond: Any  # Condition expression
@@ -64,35 +74,35 @@ class For(Node):
     body: List[Node]
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(Node):
     op: str
     left: Any
     right: Any
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Node):
     op: str
     operand: Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Node):
     value: int
 
 
-@dataclass
+@dataclass(slots=True)
 class StringLiteral(Node):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Var(Node):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class FuncCall(Node):
     name: str
     args: List[Any]
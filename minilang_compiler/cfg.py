@@ -0,0 +1,569 @@
+"""Grafo de flujo de control (CFG) sobre el TAC.
+
+`build_cfg` divide el TAC de un programa en regiones —una por función
+(`func_start` .. `func_end`) más el programa principal— y cada región en
+bloques básicos. Un bloque empieza en una etiqueta (o tras un salto o un
+`return`) y termina, como mucho, en un `goto`, `ifgoto`, `switch` o `return`:
+
+    BasicBlock.label    etiqueta del bloque (o None)
+    BasicBlock.instrs   instrucciones sin la etiqueta; el salto, si lo hay, al final
+    BasicBlock.succs    sucesores; para `ifgoto`, `[destino, siguiente]` (el mismo
+                        bloque dos veces si el salto va al bloque siguiente) y
+                        para `switch`, los destinos de los casos y el de por
+                        defecto, sin repetir
+    BasicBlock.preds    predecesores, sin repetir
+
+Salir por el final de una función o del programa principal no tiene sucesor.
+`FunctionCFG.compute_dominators` calcula el dominador inmediato de cada bloque
+alcanzable (algoritmo de Cooper, Harvey y Kennedy) y `ProgramCFG.linearize`
+vuelve a producir una lista de TAC: sin cambios en los bloques, la misma
+lista de entrada. Construir el CFG es lineal en el número de instrucciones.
+Los bloques comparten los objetos `TACInstr` de la lista de entrada y las
+pasadas (p. ej. `ssa.to_ssa`) los modifican en sitio.
+"""
+from typing import Dict, List, Optional
+
+from .ir import Label, Op, TACInstr, Temp, Var
+
+# Opcodes that end a basic block.
+_JUMPS = (Op.GOTO, Op.IFGOTO, Op.SWITCH, Op.RETURN)
+
+
+class BasicBlock:
+    __slots__ = ('index', 'label', 'instrs', 'succs', 'preds', 'idom',
+                 'dom_children', 'dom_pre', 'dom_post')
+
+    def __init__(self, index: int, label: Optional[Label] = None):
+        self.index = index
+        self.label = label
+        self.instrs: List[TACInstr] = []
+        self.succs: List['BasicBlock'] = []
+        self.preds: List['BasicBlock'] = []
+        # Filled in by FunctionCFG.compute_dominators
+        self.idom: Optional['BasicBlock'] = None
+        self.dom_children: List['BasicBlock'] = []
+        self.dom_pre = -1
+        self.dom_post = -1
+
+    @property
+    def terminator(self) -> Optional[TACInstr]:
+        """The final goto/ifgoto/switch/return, or None if the block falls through."""
+        if self.instrs and self.instrs[-1].op in _JUMPS:
+            return self.instrs[-1]
+        return None
+
+    @property
+    def fallthrough(self) -> Optional['BasicBlock']:
+        """Successor reached without jumping, or None."""
+        last = self.terminator
+        if last is None:
+            return self.succs[0] if self.succs else None
+        if last.op is Op.IFGOTO and len(self.succs) == 2:
+            return self.succs[1]
+        return None
+
+    def dominates(self, other: 'BasicBlock') -> bool:
+        """True if every path from the entry to `other` goes through this block."""
+        return 0 <= self.dom_pre <= other.dom_pre and other.dom_post <= self.dom_post
+
+    def __repr__(self) -> str:
+        return f"<B{self.index} {self.label or ''} {len(self.instrs)} instrs>"
+
+
+class Loop:
+    """A natural loop: its `header`, the `latches` that jump back to it and
+    the set of `blocks` in the loop (header and latches included)."""
+    __slots__ = ('header', 'latches', 'blocks')
+
+    def __init__(self, header: BasicBlock):
+        self.header = header
+        self.latches: List[BasicBlock] = []
+        self.blocks = {header}
+
+    def __repr__(self) -> str:
+        return f"<Loop B{self.header.index} {len(self.blocks)} blocks>"
+
+
+class FunctionCFG:
+    """Blocks of one function (`name`, `params`) or of the main program (`name` None)."""
+
+    def __init__(self, name: Optional[str] = None, params=None):
+        self.name = name
+        self.params = params if params is not None else []
+        self.blocks: List[BasicBlock] = []
+
+    @property
+    def entry(self) -> BasicBlock:
+        return self.blocks[0]
+
+    def block_map(self) -> Dict[str, BasicBlock]:
+        """Label -> block."""
+        return {b.label: b for b in self.blocks if b.label is not None}
+
+    def instructions(self):
+        """All instructions of the region, in block order (labels excluded)."""
+        for b in self.blocks:
+            yield from b.instrs
+
+    def renumber(self):
+        for i, b in enumerate(self.blocks):
+            b.index = i
+
+    def link(self):
+        """Rebuild succs/preds from the terminators and the block order."""
+        labels = self.block_map()
+        blocks = self.blocks
+        for b in blocks:
+            b.preds = []
+        for i, b in enumerate(blocks):
+            nxt = blocks[i + 1] if i + 1 < len(blocks) else None
+            last = b.instrs[-1] if b.instrs else None
+            op = last.op if last is not None else None
+            if op is Op.GOTO:
+                succs = [labels[last.label]]
+            elif op is Op.IFGOTO:
+                succs = [labels[last.label]] if nxt is None else [labels[last.label], nxt]
+            elif op is Op.SWITCH:
+                succs = [labels[label] for label in dict.fromkeys(last.targets())]
+            elif op is Op.RETURN or nxt is None:
+                succs = []
+            else:
+                succs = [nxt]
+            b.succs = succs
+            for s in succs:
+                if not s.preds or s.preds[-1] is not b:
+                    s.preds.append(b)
+
+    def remove_unreachable(self) -> int:
+        """Drop the blocks that cannot be reached from the entry; return how many.
+
+        Phi operands coming from removed blocks are dropped as well.
+        """
+        if not self.blocks:
+            return 0
+        reachable = {b.index for b in self.reverse_postorder()}
+        kept = [b for b in self.blocks if b.index in reachable]
+        removed = len(self.blocks) - len(kept)
+        if removed:
+            self.blocks = kept
+            self.renumber()
+            self.link()
+            self.prune_phis()
+        return removed
+
+    def prune_phis(self):
+        """Drop phi operands whose block is no longer a predecessor."""
+        for b in self.blocks:
+            for instr in b.instrs:
+                if instr.op is not Op.PHI:
+                    break
+                if len(instr.b) != len(b.preds) or any(p not in b.preds for p in instr.b):
+                    keep = [k for k, p in enumerate(instr.b) if p in b.preds]
+                    instr.a = [instr.a[k] for k in keep]
+                    instr.b = [instr.b[k] for k in keep]
+
+    def split_edges(self, program: 'ProgramCFG', edges) -> List[BasicBlock]:
+        """Put a new empty block on each (pred, succ) edge; return the new blocks.
+
+        The block of a jump edge jumps to `succ` and goes after the last
+        block that does not fall through (near the end of the region); the
+        block of a fallthrough edge goes right after `pred`. Phis of `succ`
+        are updated to come from the new block.
+        """
+        after: Dict[int, BasicBlock] = {}
+        at_end: List[BasicBlock] = []
+        new_blocks = []
+        for pred, succ in edges:
+            block = BasicBlock(-1)
+            last = pred.terminator
+            jumps = last is not None and succ.label in last.targets()
+            if jumps and pred.fallthrough is succ:
+                # ifgoto whose target is also the next block: both edges
+                last.retarget(succ.label, program.label_of(block))
+                after[pred.index] = block
+            elif jumps:
+                last.retarget(succ.label, program.label_of(block))
+                block.instrs.append(TACInstr(Op.GOTO, label=program.label_of(succ)))
+                at_end.append(block)
+            else:
+                after[pred.index] = block
+            for instr in succ.instrs:
+                if instr.op is not Op.PHI:
+                    break
+                instr.b = [block if p is pred else p for p in instr.b]
+            new_blocks.append(block)
+        blocks = []
+        for b in self.blocks:
+            blocks.append(b)
+            if b.index in after:
+                blocks.append(after[b.index])
+        if at_end:
+            # A region that falls off its end must still do so
+            at = len(blocks)
+            while at and self._falls_through(blocks[at - 1]):
+                at -= 1
+            if not at:
+                last = blocks[-1]
+                exit_block = BasicBlock(-1)
+                last.instrs.append(TACInstr(Op.GOTO, label=program.label_of(exit_block)))
+                blocks.append(exit_block)
+                at = len(blocks) - 1
+            blocks[at:at] = at_end
+        self.blocks = blocks
+        self.renumber()
+        self.link()
+        return new_blocks
+
+    @staticmethod
+    def _falls_through(block: BasicBlock) -> bool:
+        last = block.terminator
+        return last is None or last.op is Op.IFGOTO
+
+    def liveness(self):
+        """`(bits, live_in, live_out)`: the live names at each block boundary.
+
+        `live_in[i]` and `live_out[i]` are int bit masks for block index i,
+        where `bits` maps each name live at some boundary to its bit (names
+        used only in the block that defines them get none). A phi operand is
+        live out of its predecessor, not live into the phi's block. One
+        backward dataflow over the blocks, with use/def masks and a worklist.
+        """
+        blocks = self.blocks
+        upward = []   # names used before being defined, per block
+        defined = []
+        phi_uses = []  # (pred index, name)
+        for b in blocks:
+            names = set()
+            used = set()
+            for instr in b.instrs:
+                if instr.op is Op.PHI:
+                    for v, p in zip(instr.a, instr.b):
+                        if type(v) is Var or type(v) is Temp:
+                            phi_uses.append((p.index, v))
+                else:
+                    for u in instr.uses():
+                        if u not in names:
+                            used.add(u)
+                if instr.dest is not None:
+                    names.add(instr.dest)
+            upward.append(used)
+            defined.append(names)
+        bits: Dict[object, int] = {}
+        for used in upward:
+            for name in used:
+                if name not in bits:
+                    bits[name] = 1 << len(bits)
+        for _, name in phi_uses:
+            if name not in bits:
+                bits[name] = 1 << len(bits)
+        use = []
+        defs = []
+        for used, names in zip(upward, defined):
+            mask = 0
+            for name in used:
+                mask |= bits[name]
+            use.append(mask)
+            mask = 0
+            for name in names:
+                mask |= bits.get(name, 0)
+            defs.append(mask)
+        phi_out = [0] * len(blocks)
+        for i, name in phi_uses:
+            phi_out[i] |= bits[name]
+        live_out = [0] * len(blocks)
+
+        # A pass in postorder sees the final masks of all successors but
+        # those across back edges. The blocks with such an edge then start a
+        # worklist, outermost loop first, so that what is live around a loop
+        # reaches the loops inside it all at once.
+        order = [b.index for b in reversed(self.reverse_postorder())]
+        if len(order) < len(blocks):
+            reachable = set(order)
+            order += [i for i in range(len(blocks)) if i not in reachable]
+        rank = [-1] * len(blocks)
+        live_in = [0] * len(blocks)
+        queued = [False] * len(blocks)
+        work = []
+        for k, i in enumerate(order):
+            rank[i] = k
+            out = phi_out[i]
+            for s in blocks[i].succs:
+                out |= live_in[s.index]
+                if rank[s.index] < 0 or s.index == i:
+                    queued[i] = True
+            live_out[i] = out
+            live_in[i] = use[i] | (out & ~defs[i])
+            if queued[i]:
+                work.append(i)
+        work.reverse()
+        while work:
+            i = work.pop()
+            queued[i] = False
+            out = phi_out[i]
+            for s in blocks[i].succs:
+                out |= live_in[s.index]
+            live_out[i] = out
+            new = use[i] | (out & ~defs[i])
+            if new != live_in[i]:
+                live_in[i] = new
+                for p in blocks[i].preds:
+                    if not queued[p.index]:
+                        queued[p.index] = True
+                        work.append(p.index)
+        return bits, live_in, live_out
+
+    def reverse_postorder(self) -> List[BasicBlock]:
+        """Blocks reachable from the entry, in reverse postorder."""
+        if not self.blocks:
+            return []
+        order = []
+        seen = {self.entry.index}
+        stack = [(self.entry, iter(self.entry.succs))]
+        while stack:
+            block, succs = stack[-1]
+            for s in succs:
+                if s.index not in seen:
+                    seen.add(s.index)
+                    stack.append((s, iter(s.succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+    def compute_dominators(self) -> List[BasicBlock]:
+        """Set `idom` and the dominator tree of the reachable blocks.
+
+        Unreachable blocks get `idom` None and never dominate anything.
+        Returns the reachable blocks in reverse postorder.
+        """
+        rpo = self.reverse_postorder()
+        for b in self.blocks:
+            b.idom = None
+            b.dom_children = []
+            b.dom_pre = b.dom_post = -1
+        if not rpo:
+            return rpo
+        number = {b.index: i for i, b in enumerate(rpo)}
+        entry = rpo[0]
+        idom: List[int] = [-1] * len(rpo)
+        idom[0] = 0
+        changed = True
+        while changed:
+            changed = False
+            for i in range(1, len(rpo)):
+                new = -1
+                for p in rpo[i].preds:
+                    j = number.get(p.index)
+                    if j is None or idom[j] < 0:
+                        continue  # unreachable or not processed yet
+                    if new < 0:
+                        new = j
+                        continue
+                    # intersect: walk up both dominator chains
+                    while j != new:
+                        while j > new:
+                            j = idom[j]
+                        while new > j:
+                            new = idom[new]
+                if idom[i] != new:
+                    idom[i] = new
+                    changed = True
+        for i in range(1, len(rpo)):
+            b = rpo[i]
+            b.idom = rpo[idom[i]]
+            b.idom.dom_children.append(b)
+        # Pre/post numbering of the dominator tree for O(1) `dominates`
+        counter = 0
+        stack = [(entry, iter(entry.dom_children))]
+        entry.dom_pre = 0
+        while stack:
+            block, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                block.dom_post = counter
+            else:
+                counter += 1
+                child.dom_pre = counter
+                stack.append((child, iter(child.dom_children)))
+        return rpo
+
+    def dominance_frontiers(self) -> List[List[BasicBlock]]:
+        """Dominance frontier of each block, indexed by block index.
+
+        Uses the dominators from `compute_dominators`. The entry is never in a
+        frontier, so it should have no predecessors.
+        """
+        df: List[List[BasicBlock]] = [[] for _ in self.blocks]
+        for b in self.blocks:
+            if b.idom is None or len(b.preds) < 2:
+                continue
+            for p in b.preds:
+                runner = p
+                while runner is not b.idom and runner.dom_pre >= 0:
+                    frontier = df[runner.index]
+                    if not frontier or frontier[-1] is not b:
+                        frontier.append(b)
+                    runner = runner.idom
+        return df
+
+    def natural_loops(self) -> List[Loop]:
+        """The natural loops of the region, innermost first.
+
+        A back edge goes to a block that dominates its source; the back
+        edges to one header form one loop. Uses the dominators from
+        `compute_dominators`.
+        """
+        loops: Dict[int, Loop] = {}
+        for b in self.blocks:
+            for s in b.succs:
+                if s.dominates(b):
+                    loop = loops.get(s.index)
+                    if loop is None:
+                        loop = loops[s.index] = Loop(s)
+                    if b not in loop.latches:
+                        loop.latches.append(b)
+        for loop in loops.values():
+            body = loop.blocks
+            work = [b for b in loop.latches if b not in body]
+            body.update(work)
+            while work:
+                for p in work.pop().preds:
+                    if p not in body and p.dom_pre >= 0:
+                        body.add(p)
+                        work.append(p)
+        # A loop nested in another has fewer blocks
+        return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+    def linearize(self, program: 'ProgramCFG') -> List[TACInstr]:
+        """TAC of the blocks in order, adding gotos for displaced fallthroughs.
+
+        A block that leaves the region by falling off its end but is no
+        longer the last one jumps to a label placed at the end instead.
+        """
+        code: List[TACInstr] = []
+        blocks = self.blocks
+        # Label the displaced fallthrough targets before emitting anything
+        for i, b in enumerate(blocks):
+            fall = b.fallthrough
+            if fall is not None and (i + 1 == len(blocks) or fall is not blocks[i + 1]):
+                program.label_of(fall)
+        exit_label = None
+        for i, b in enumerate(blocks):
+            if b.label is not None:
+                code.append(TACInstr(Op.LABEL, label=b.label))
+            code.extend(b.instrs)
+            nxt = blocks[i + 1] if i + 1 < len(blocks) else None
+            fall = b.fallthrough
+            if fall is not None:
+                if fall is not nxt:
+                    code.append(TACInstr(Op.GOTO, label=program.label_of(fall)))
+            elif nxt is not None and b.terminator is None:
+                if exit_label is None:
+                    exit_label = program.new_label()
+                code.append(TACInstr(Op.GOTO, label=exit_label))
+        if exit_label is not None:
+            code.append(TACInstr(Op.LABEL, label=exit_label))
+        return code
+
+
+class ProgramCFG:
+    """The CFGs of all functions and of the main program.
+
+    Also hands out fresh temporaries and labels that do not clash with the
+    ones already in the TAC.
+    """
+
+    def __init__(self):
+        self.functions: List[FunctionCFG] = []
+        self.main = FunctionCFG()
+        self.temp_counter = 0
+        self.label_counter = 0
+
+    @property
+    def regions(self) -> List[FunctionCFG]:
+        return self.functions + [self.main]
+
+    def new_temp(self) -> Temp:
+        self.temp_counter += 1
+        return Temp(f"t{self.temp_counter}")
+
+    def new_label(self) -> Label:
+        self.label_counter += 1
+        return Label(f"L{self.label_counter}")
+
+    def label_of(self, block: BasicBlock) -> Label:
+        """The label of `block`, giving it a new one if it has none."""
+        if block.label is None:
+            block.label = self.new_label()
+        return block.label
+
+    def linearize(self) -> List[TACInstr]:
+        """Back to a TAC list laid out as `IRGenerator` does."""
+        code: List[TACInstr] = []
+        if self.functions:
+            if not self.main.blocks:
+                self.main.blocks.append(BasicBlock(0))
+            code.append(TACInstr(Op.GOTO, label=self.label_of(self.main.entry)))
+        for func in self.functions:
+            code.append(TACInstr(Op.FUNC_START, a=func.params, label=func.name))
+            code.extend(func.linearize(self))
+            code.append(TACInstr(Op.FUNC_END, label=func.name))
+        code.extend(self.main.linearize(self))
+        return code
+
+
+def _counter(name, prefix: str) -> int:
+    # Numeric suffix of a generated temp or label name, 0 otherwise
+    if name[:1] == prefix and name[1:].isdigit():
+        return int(name[1:])
+    return 0
+
+
+def build_cfg(tac: List[TACInstr]) -> ProgramCFG:
+    """Split `tac` (as produced by `IRGenerator`) into per-function CFGs."""
+    program = ProgramCFG()
+    region = program.main
+    block: Optional[BasicBlock] = None
+    max_temp = 0
+    max_label = 0
+    n = len(tac)
+    for k, instr in enumerate(tac):
+        op = instr.op
+        dest = instr.dest
+        if type(dest) is Temp:
+            t = _counter(dest, 't')
+            if t > max_temp:
+                max_temp = t
+        if op is Op.LABEL:
+            t = _counter(instr.label, 'L')
+            if t > max_label:
+                max_label = t
+            block = BasicBlock(len(region.blocks), instr.label)
+            region.blocks.append(block)
+            continue
+        if op is Op.FUNC_START:
+            region = FunctionCFG(instr.label, instr.a)
+            program.functions.append(region)
+            block = None
+            continue
+        if op is Op.FUNC_END:
+            region = program.main
+            block = None
+            continue
+        if op is Op.GOTO and k + 1 < n and tac[k + 1].op is Op.FUNC_START and region is program.main:
+            # The jump over the function bodies; linearize() puts it back
+            continue
+        if block is None:
+            block = BasicBlock(len(region.blocks))
+            region.blocks.append(block)
+        block.instrs.append(instr)
+        if op in _JUMPS:
+            block = None
+    for region in program.regions:
+        region.link()
+    program.temp_counter = max_temp
+    program.label_counter = max_label
+    return program
@@ -4,167 +4,156 @@ Traduce TAC a instrucciones simbólicas tipo: LOAD, STORE, ADD, SUB, MUL, DIV, J
 """
 from typing import List
 
+from .ir import Op, StrConst
 
-def is_number(s):
-    """Check if a string represents a number (including negative)."""
-    try:
-        int(s)
-        return True
-    except ValueError:
-        return False
+_BINOPS = {
+    '+': "ADD",
+    '-': "SUB",
+    '*': "MUL",
+    '/': "DIV",
+    '%': "MOD",
+    '<': "LT",
+    '>': "GT",
+    '<=': "LE",
+    '>=': "GE",
+    '==': "EQ",
+    '!=': "NE",
+    'and': "AND",
+    'or': "OR",
+}
+
+_CONDITIONS = {
+    '<': "LT",
+    '>': "GT",
+    '<=': "LE",
+    '>=': "GE",
+    '==': "EQ",
+    '!=': "NE",
+}
+
+
+def _push_value(asm, src):
+    # Constants (numbers and strings) are pushed, names are loaded
+    if type(src) is int or type(src) is StrConst:
+        asm.append(f"PUSH {src}")
+    else:
+        asm.append(f"LOAD {src}")
+
+
+def _push_number(asm, src):
+    # Operands of arithmetic and comparisons: only numbers are pushed (a
+    # string operand is loaded like a variable, as it always has been)
+    if type(src) is int:
+        asm.append(f"PUSH {src}")
+    else:
+        asm.append(f"LOAD {src}")
+
+
+def _label(instr, asm):
+    asm.append(f"{instr.label}:")
+
+
+def _goto(instr, asm):
+    asm.append(f"JMP {instr.label}")
+
+
+def _ifgoto(instr, asm):
+    _push_number(asm, instr.a)
+    _push_number(asm, instr.b)
+    # produce condition result
+    asm.append(_CONDITIONS.get(instr.oper) or f"; UNKNOWN_COND {instr.oper}")
+    # if condition true -> jump
+    asm.append(f"JNZ {instr.label}")
+
+
+def _assign(instr, asm):
+    _push_value(asm, instr.a)
+    asm.append(f"STORE {instr.dest}")
+
+
+def _binop(instr, asm):
+    # push left then right
+    _push_number(asm, instr.a)
+    _push_number(asm, instr.b)
+    asm.append(_BINOPS.get(instr.oper) or f"; UNKNOWN_OP {instr.oper}")
+    asm.append(f"STORE {instr.dest}")
+
+
+def _unaryop(instr, asm):
+    _push_number(asm, instr.a)
+    if instr.oper == 'not':
+        asm.append("NOT")
+    else:
+        asm.append(f"; UNKNOWN_UNARY_OP {instr.oper}")
+    asm.append(f"STORE {instr.dest}")
+
+
+def _read(instr, asm):
+    asm.append(f"IN {instr.dest}")
+
+
+def _print(instr, asm):
+    # load value and out
+    _push_value(asm, instr.a)
+    asm.append("OUT")
+
+
+def _param(instr, asm):
+    # Push parameter onto stack
+    _push_value(asm, instr.a)
+    asm.append("PARAM")
+
+
+def _call(instr, asm):
+    # CALL function_name num_params, then store the return value
+    asm.append(f"CALL FUNC_{instr.label} {instr.a}")
+    if instr.dest:
+        asm.append(f"STORE {instr.dest}")
+
+
+def _return(instr, asm):
+    # Push return value and return
+    _push_value(asm, instr.a)
+    asm.append("RET")
+
+
+def _func_start(instr, asm):
+    # Mark function start with a label and store param names
+    asm.append(f"FUNC_{instr.label}:")
+    # Add metadata comment with parameter names
+    if instr.a:
+        asm.append(f"; PARAMS {','.join(instr.a)}")
+
+
+def _func_end(instr, asm):
+    # Function end - return statements already emit RET
+    pass
+
+
+def _phi(instr, asm):
+    # SSA only: ssa.from_ssa turns phis into assigns before code generation
+    asm.append(f"; UNHANDLED_TAC {instr}")
+
+
+def _switch(instr, asm):
+    # SWITCH default value:label ... pops the value and jumps
+    _push_number(asm, instr.a)
+    cases = ' '.join(f"{value}:{label}" for value, label in instr.b)
+    asm.append(f"SWITCH {instr.label} {cases}")
+
+
+# Indexed by opcode.
+_EMITTERS = (
+    _label, _goto, _ifgoto, _assign, _binop, _unaryop, _read, _print,
+    _param, _call, _return, _func_start, _func_end, _phi, _switch,
+)
+assert [f.__name__ for f in _EMITTERS] == ['_' + op.name.lower() for op in Op]
 
 
 def generate_asm(tac_list) -> List[str]:
     asm: List[str] = []
     # We'll treat temps like named variables (t1,t2,...)
+    emitters = _EMITTERS
     for instr in tac_list:
-        if instr.op == 'label':
-            asm.append(f"{instr.a}:")
-        elif instr.op == 'goto':
-            asm.append(f"JMP {instr.a}")
-        elif instr.op == 'read':
-            asm.append(f"IN {instr.a}")
-        elif instr.op == 'print':
-            src = instr.a
-            # load value and out
-            if src.startswith('"') and src.endswith('"'):
-                # String literal
-                asm.append(f"PUSH {src}")
-            elif is_number(src):
-                asm.append(f"PUSH {src}")
-            else:
-                asm.append(f"LOAD {src}")
-            asm.append("OUT")
-        elif instr.op == 'assign':
-            target = instr.a
-            src = instr.b
-            if isinstance(src, str) and (is_number(src) or (src.startswith('"') and src.endswith('"'))):
-                asm.append(f"PUSH {src}")
-            else:
-                asm.append(f"LOAD {src}")
-            asm.append(f"STORE {target}")
-        elif instr.op == 'unaryop':
-            target = instr.a
-            op = instr.b
-            operand = instr.c
-            # Load operand
-            if isinstance(operand, str) and is_number(operand):
-                asm.append(f"PUSH {operand}")
-            else:
-                asm.append(f"LOAD {operand}")
-            # Apply unary operation
-            if op == 'not':
-                asm.append("NOT")
-            else:
-                asm.append(f"; UNKNOWN_UNARY_OP {op}")
-            asm.append(f"STORE {target}")
-        elif instr.op == 'binop':
-            target = instr.a
-            op = instr.b
-            left, right = instr.c
-            # push left then right
-            if isinstance(left, str) and is_number(left):
-                asm.append(f"PUSH {left}")
-            else:
-                asm.append(f"LOAD {left}")
-            if isinstance(right, str) and is_number(right):
-                asm.append(f"PUSH {right}")
-            else:
-                asm.append(f"LOAD {right}")
-            if op == '+':
-                asm.append("ADD")
-            elif op == '-':
-                asm.append("SUB")
-            elif op == '*':
-                asm.append("MUL")
-            elif op == '/':
-                asm.append("DIV")
-            elif op == '%':
-                asm.append("MOD")
-            elif op == '<':
-                asm.append("LT")
-            elif op == '>':
-                asm.append("GT")
-            elif op == '<=':
-                asm.append("LE")
-            elif op == '>=':
-                asm.append("GE")
-            elif op == '==':
-                asm.append("EQ")
-            elif op == '!=':
-                asm.append("NE")
-            elif op == 'and':
-                asm.append("AND")
-            elif op == 'or':
-                asm.append("OR")
-            else:
-                asm.append(f"; UNKNOWN_OP {op}")
-            asm.append(f"STORE {target}")
-        elif instr.op == 'ifgoto':
-            left = instr.a
-            op = instr.b
-            right, label = instr.c
-            if isinstance(left, str) and left.isdigit():
-                asm.append(f"PUSH {left}")
-            else:
-                asm.append(f"LOAD {left}")
-            if isinstance(right, str) and right.isdigit():
-                asm.append(f"PUSH {right}")
-            else:
-                asm.append(f"LOAD {right}")
-            # produce condition result
-            if op == '<':
-                asm.append("LT")
-            elif op == '>':
-                asm.append("GT")
-            elif op == '<=':
-                asm.append("LE")
-            elif op == '>=':
-                asm.append("GE")
-            elif op == '==':
-                asm.append("EQ")
-            elif op == '!=':
-                asm.append("NE")
-            else:
-                asm.append(f"; UNKNOWN_COND {op}")
-            # if condition true -> jump
-            asm.append(f"JNZ {label}")
-        elif instr.op == 'func_start':
-            # Mark function start with a label and store param names
-            asm.append(f"FUNC_{instr.a}:")
-            # Add metadata comment with parameter names
-            if instr.b:  # instr.b contains parameter list
-                param_list = ','.join(instr.b)
-                asm.append(f"; PARAMS {param_list}")
-        elif instr.op == 'func_end':
-            # Function end - only add RET if no explicit return was just generated
-            # (return statement already emits RET)
-            # For safety, we can skip this or add a label
-            pass
-        elif instr.op == 'param':
-            # Push parameter onto stack
-            src = instr.a
-            if isinstance(src, str) and (is_number(src) or (src.startswith('"') and src.endswith('"'))):
-                asm.append(f"PUSH {src}")
-            else:
-                asm.append(f"LOAD {src}")
-            asm.append("PARAM")
-        elif instr.op == 'call':
-            # CALL function_name num_params return_target
-            func_name = instr.a
-            num_params = instr.b
-            return_target = instr.c
-            asm.append(f"CALL FUNC_{func_name} {num_params}")
-            if return_target:
-                asm.append(f"STORE {return_target}")
-        elif instr.op == 'return':
-            # Push return value and return
-            src = instr.a
-            if isinstance(src, str) and (is_number(src) or (src.startswith('"') and src.endswith('"'))):
-                asm.append(f"PUSH {src}")
-            else:
-                asm.append(f"LOAD {src}")
-            asm.append("RET")
-        else:
-            asm.append(f"; UNHANDLED_TAC {instr}")
+        emitters[instr.op](instr, asm)
     return asm
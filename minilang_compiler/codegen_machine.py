@@ -35,6 +35,9 @@ OPCODES = {
     'AND': 29,
     'OR': 30,
     'NOT': 31,
+    'DUP': 32,
+    'NEG': 33,
+    'SWITCH': 34,
 }
 
 
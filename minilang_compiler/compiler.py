@@ -4,6 +4,7 @@ Actualmente ejecuta: fuente -> tokens
 Próximos pasos: parser -> semántica -> IR -> ASM -> máquina -> VM
 """
 import argparse
+import mmap
 from pathlib import Path
 import sys
 import os
@@ -15,63 +16,117 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from minilang_compiler.lexer import tokenize
+from minilang_compiler.lexer import tokenize, iter_tokens, LexerError
 
 
 def main():
     parser = argparse.ArgumentParser(description="MiniLang compiler (early stage)")
     parser.add_argument("source", nargs="?", help="MiniLang source file", default=str(Path(__file__).parent.parent / "tests" / "sample.minilang"))
     parser.add_argument("--run", action="store_true", help="Run resulting VM after compilation")
+    parser.add_argument("--lexer", choices=["regex", "char"], default="regex", help="Tokenizer engine (default: regex)")
+    parser.add_argument("--stream", action="store_true", help="Lex and parse lazily from a memory-mapped source (tokens are not listed)")
+    parser.add_argument("--fused", action="store_true", help="Check semantics while generating TAC (one pass over the AST)")
+    from minilang_compiler.optimizer import DEFAULT_LEVEL, PASSES
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2], default=DEFAULT_LEVEL, help=f"Optimization level: 0 constant folding only, 1 scalar cleanups and jump layout, 2 also calls and loops (default: {DEFAULT_LEVEL})")
+    parser.add_argument("--passes", help="Comma-separated optimization passes to run instead of the -O pipeline: "
+                        f"{', '.join(PASSES)}. They run in SSA form up to a 'from_ssa' step (added at the end if missing); "
+                        "loop_rotation and jump_threading must come after it, dead_code_elimination may go on either side")
+    parser.add_argument("--pass-stats", action="store_true", help="Print time and changes of each optimization pass and the peephole rule hits")
     args = parser.parse_args()
     src_path = Path(args.source)
     if not src_path.exists():
         print(f"Source file not found: {src_path}")
         return
 
-    text = src_path.read_text(encoding='utf-8')
-    try:
-        tokens = tokenize(text)
-        print("Tokens:")
-        for t in tokens:
-            print("  ", t)
-    except Exception as e:
-        print("Lexing error:", e)
-        return
-
     # parse
-    from minilang_compiler.parser import Parser
-    from minilang_compiler.semantic import SemanticAnalyzer
+    from minilang_compiler.parser import Parser, StreamParser
+    from minilang_compiler.semantic import SemanticAnalyzer, SemanticError
     from minilang_compiler.ir import IRGenerator
-    from minilang_compiler.optimizer import constant_folding
+    from minilang_compiler.fused import FusedIRGenerator
+    from minilang_compiler.optimizer import PIPELINES, PassManager
     from minilang_compiler.codegen_asm import generate_asm
+    from minilang_compiler.peephole import peephole
     from minilang_compiler.codegen_machine import assemble
     from minilang_compiler.runtime_vm import SimpleVM
 
-    try:
-        p = Parser(tokens)
-        program = p.parse()
-    except Exception as e:
-        print('Parser error:', e)
-        return
-
-    try:
-        sa = SemanticAnalyzer()
-        sa.analyze(program)
-    except Exception as e:
-        print('Semantic error:', e)
-        return
-
-    # IR
-    irgen = IRGenerator()
-    tac = irgen.generate(program)
+    if args.stream:
+        try:
+            with open(src_path, 'rb') as f:
+                if src_path.stat().st_size == 0:
+                    program = StreamParser(iter_tokens(f)).parse()
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        program = StreamParser(iter_tokens(mm)).parse()
+        except LexerError as e:
+            print("Lexing error:", e)
+            return
+        except Exception as e:
+            print('Parser error:', e)
+            return
+    else:
+        text = src_path.read_text(encoding='utf-8')
+        try:
+            tokens = tokenize(text, engine=args.lexer)
+            print("Tokens:")
+            for t in tokens:
+                print("  ", t)
+        except Exception as e:
+            print("Lexing error:", e)
+            return
+
+        try:
+            p = Parser(tokens)
+            program = p.parse()
+        except Exception as e:
+            print('Parser error:', e)
+            return
+
+    if args.fused:
+        # semantic checks + IR in a single pass
+        try:
+            tac = FusedIRGenerator().generate(program)
+        except SemanticError as e:
+            print('Semantic error:', e)
+            return
+    else:
+        try:
+            sa = SemanticAnalyzer()
+            sa.analyze(program)
+        except Exception as e:
+            print('Semantic error:', e)
+            return
+
+        # IR
+        irgen = IRGenerator()
+        tac = irgen.generate(program)
     print('\nTAC:')
     for i in tac:
         print('  ', i)
 
     # optimize
-    tac_opt = constant_folding(tac)
+    pipeline = args.passes.split(',') if args.passes else PIPELINES[args.opt_level]
+    try:
+        manager = PassManager(pipeline)
+    except ValueError as e:
+        print('Optimizer error:', e)
+        return
+    tac_opt = manager.run(tac)
+    print(f'\nOptimized TAC ({len(tac)} -> {len(tac_opt)} instructions):')
+    for i in tac_opt:
+        print('  ', i)
+    if args.pass_stats:
+        print('\nOptimization passes:')
+        for line in manager.report():
+            print('  ', line)
 
     asm = generate_asm(tac_opt)
+    if args.passes or args.opt_level > 0:
+        hits = {}
+        asm = peephole(asm, hits)
+        if args.pass_stats:
+            print('\nPeephole rules:')
+            for name, count in hits.items():
+                print(f'   {name:28} {count:6}')
     print('\nAssembly:')
     for line in asm:
         print('  ', line)
@@ -0,0 +1,83 @@
+"""Front end fusionado: comprobaciones semánticas durante la generación de TAC.
+
+`FusedIRGenerator` recorre el AST una sola vez: emite el mismo TAC que
+`IRGenerator` y, a la vez, hace las comprobaciones de `SemanticAnalyzer`
+(variables sin inicializar, funciones no definidas o duplicadas, aridad) con
+los mismos mensajes de `SemanticError`. El primer error detectado es el mismo
+que daría `SemanticAnalyzer.analyze` seguido de `IRGenerator.generate`.
+"""
+from typing import Dict, List
+
+from . import ast_nodes as ast
+from .ir import IRGenerator, TACInstr
+from .semantic import SemanticAnalyzer
+
+
+class FusedIRGenerator(IRGenerator):
+    """`IRGenerator` that performs the semantic checks while emitting.
+
+    The symbol table lives in `self.checker` (a `SemanticAnalyzer`), whose
+    check methods produce the error messages.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.checker = SemanticAnalyzer()
+
+    @property
+    def symbols(self) -> Dict[str, bool]:
+        """Initialized variables of the main program (as `SemanticAnalyzer.analyze` returns)."""
+        return self.checker.symbols
+
+    def generate(self, program: ast.Program) -> List[TACInstr]:
+        self.checker.symbols = {}
+        self.checker.functions = {}
+        return super().generate(program)
+
+    def gen_function(self, func: ast.FuncDef):
+        saved_symbols = self.checker.enter_function(func)
+        super().gen_function(func)
+        self.checker.symbols = saved_symbols
+
+    # -- statements -----------------------------------------------------------
+
+    def _unknown_stmt(self, node):
+        self.checker._unknown_stmt(node)
+
+    def stmt_Read(self, node):
+        super().stmt_Read(node)
+        self.checker.symbols[node.var] = True
+
+    def stmt_Assign(self, node):
+        super().stmt_Assign(node)
+        # assignment implicitly declares and initializes variable
+        self.checker.symbols[node.target] = True
+
+    def stmt_For(self, node):
+        # IRGenerator emits the update after the body, SemanticAnalyzer checks
+        # it before the body and never marks its target as initialized.
+        steps = super().stmt_For(node)
+        body = next(steps)  # init and condition are done
+        self.checker.visit_expr(node.update.expr)
+        yield body
+        target = node.update.target
+        was_initialized = self.checker.symbols.get(target)
+        next(steps, None)  # update and loop back
+        if was_initialized is None:
+            del self.checker.symbols[target]
+        else:
+            self.checker.symbols[target] = was_initialized
+
+    # -- expressions ------------------------------------------------------------
+
+    def _unknown_expr(self, node, work, values):
+        self.checker._unknown_expr(node, work)
+
+    def expr_Var(self, node, work, values):
+        self.checker.check_var(node.name)
+        super().expr_Var(node, work, values)
+
+    def expr_FuncCall(self, node, work, values):
+        # Checked before its arguments, as in SemanticAnalyzer
+        self.checker.check_call(node)
+        super().expr_FuncCall(node, work, values)
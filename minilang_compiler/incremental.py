@@ -0,0 +1,299 @@
+"""Re-análisis incremental (léxico + sintáctico) para integración con editores.
+
+`IncrementalParser` guarda el texto, los tokens y el AST de un programa dividido
+en elementos de nivel superior (cada `FuncDef` o sentencia principal, más la
+cola con `end`). Ante una edición (rango de desplazamientos + texto nuevo) solo
+se vuelven a tokenizar y analizar los elementos afectados; el resto de nodos del
+AST se reutiliza tal cual. Si la región dañada no puede aislarse con seguridad
+se recurre a un análisis completo, que produce los mismos errores que
+`tokenize` + `Parser.parse`.
+"""
+from typing import List, Optional
+
+from .lexer import LexerError, _scan
+from .parser import Parser, ParserError
+from .tokens import Token, TokenType
+from . import ast_nodes
+
+
+class _Fenwick:
+    """Prefix sums over item sizes with O(log n) update and search."""
+
+    def __init__(self, values: List[int]):
+        n = len(values)
+        tree = [0] * (n + 1)
+        for i, v in enumerate(values, 1):
+            tree[i] += v
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+
+    def add(self, i: int, delta: int):
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """Sum of values[0:i]."""
+        total = 0
+        tree = self.tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target: int) -> int:
+        """Largest i such that prefix(i) <= target (clamped to the last value)."""
+        tree = self.tree
+        n = len(tree) - 1
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+
+class _Item:
+    """One top-level element: its node, tokens and the source span it owns.
+
+    The span starts at the item's first character (its first token, or offset 0
+    for the first item) and runs up to the next item, so the gap after the item
+    belongs to it. Token lines are stored relative to the line of the span start.
+    """
+    __slots__ = ('node', 'tokens', 'text', 'newlines')
+
+    def __init__(self, node, tokens: List[Token], text: str):
+        self.node = node
+        self.tokens = tokens
+        self.text = text
+        self.newlines = text.count('\n')
+
+
+class IncrementalParser:
+    """Keeps tokens and AST of `text` up to date across edits.
+
+    The source is stored piecewise (one string per item) so that an edit only
+    touches the strings of the damaged items. `program` is updated in place:
+    nodes of untouched functions and statements are the same objects before
+    and after an edit.
+    """
+
+    def __init__(self, text: str):
+        self.program: Optional[ast_nodes.Program] = None
+        self.full_parses = 0
+        self._items: Optional[List[_Item]] = None
+        self._text = text  # only meaningful while `_items` is None
+        self._build(text)
+
+    @property
+    def text(self) -> str:
+        if self._items is None:
+            return self._text
+        return ''.join(item.text for item in self._items)
+
+    def __len__(self) -> int:
+        if self._items is None:
+            return len(self._text)
+        return self._lengths.prefix(len(self._items))
+
+    # -- public API ---------------------------------------------------------
+
+    def edit(self, start: int, end: int, replacement: str) -> ast_nodes.Program:
+        """Replace `text[start:end]` with `replacement` and return the updated AST.
+
+        Raises `LexerError`/`ParserError` if the edited text is not a valid
+        program; the next edit then starts from a full parse.
+        """
+        size = len(self)
+        if not 0 <= start <= end <= size:
+            raise ValueError(f"Invalid edit range {start}:{end} for text of length {size}")
+        if self._items is None or not self._reparse_region(start, end, replacement):
+            old_text = self.text
+            self._build(old_text[:start] + replacement + old_text[end:])
+        return self.program
+
+    def tokens(self) -> List[Token]:
+        """Tokens of the current text with absolute lines (as `tokenize` returns them)."""
+        result: List[Token] = []
+        line = 1
+        for item in self._items:
+            for tok in item.tokens:
+                result.append(Token(tok.type, tok.value, tok.line + line, tok.column))
+            line += item.newlines
+        return result
+
+    # -- full build -----------------------------------------------------------
+
+    def _build(self, text: str):
+        self._items = None
+        self._text = text
+        self.program = None
+        self.full_parses += 1
+        tokens: List[Token] = []
+        starts: List[int] = []
+
+        def emit(typ, value, line, column, start, end):
+            tokens.append(Token(typ, value, line, column))
+            starts.append(start)
+
+        _, line, line_start = _scan(text, 0, 1, 0, True, emit)
+        tokens.append(Token(TokenType.EOF, None, line, len(text) - line_start + 1))
+        starts.append(len(text))
+
+        # Same grammar as Parser.parse, remembering where each element starts.
+        p = Parser(tokens)
+        bounds = []
+        functions = []
+        stmts = []
+        while p.current.type == TokenType.DEF:
+            bounds.append(p.pos)
+            functions.append(p.parse_func_def())
+        while p.current.type != TokenType.END and p.current.type != TokenType.EOF:
+            bounds.append(p.pos)
+            stmts.append(p.parse_stmt())
+        if p.current.type != TokenType.END:
+            raise ParserError(f"Expected 'end' at {p.current.line}:{p.current.column}")
+        bounds.append(p.pos)  # the tail: 'end' and whatever follows it
+        self.program = ast_nodes.Program(functions=functions, statements=stmts)
+
+        nodes = functions + stmts + [None]
+        bounds.append(len(tokens))
+        items = []
+        span_start = 0
+        line = 1
+        for k, node in enumerate(nodes):
+            lo, hi = bounds[k], bounds[k + 1]
+            span_end = starts[hi] if hi < len(tokens) else len(text)
+            items.append(self._make_item(node, tokens[lo:hi], line, text[span_start:span_end]))
+            line += items[-1].newlines
+            span_start = span_end
+        self._set_items(items)
+        self._text = ''
+
+    @staticmethod
+    def _make_item(node, tokens: List[Token], line: int, text: str) -> _Item:
+        rel = [Token(t.type, t.value, t.line - line, t.column) for t in tokens]
+        return _Item(node, rel, text)
+
+    def _set_items(self, items: List[_Item]):
+        self._items = items
+        self._lengths = _Fenwick([len(it.text) for it in items])
+        self._lines = _Fenwick([it.newlines for it in items])
+
+    # -- incremental path -----------------------------------------------------
+
+    def _reparse_region(self, start: int, end: int, replacement: str) -> bool:
+        """Re-lex and re-parse only the items touched by the edit.
+
+        Returns False when the damage cannot be confined to whole items, in
+        which case the caller falls back to a full parse.
+        """
+        items = self._items
+        tail = len(items) - 1
+        first = self._lengths.find(start)
+        last = self._lengths.find(max(start, end - 1))
+        if last >= tail:
+            return False
+        region_start = self._lengths.prefix(first)
+        old = ''.join(item.text for item in items[first:last + 1])
+        region = old[:start - region_start] + replacement + old[end - region_start:]
+        edit_end = start - region_start + len(replacement)  # relative to the region
+        # Items that share the last edited line keep absolute columns, so they
+        # must be re-lexed as well.
+        while '\n' not in region[edit_end:]:
+            last += 1
+            if last >= tail:
+                return False
+            region += items[last].text
+
+        base_line = 1 + self._lines.prefix(first)
+        # Offset of the start of the region's first line, relative to the region.
+        line_start = 0
+        for k in range(first - 1, -1, -1):
+            text = items[k].text
+            nl = text.rfind('\n')
+            if nl >= 0:
+                line_start -= len(text) - nl - 1
+                break
+            line_start -= len(text)
+        tokens: List[Token] = []
+        starts: List[int] = []
+
+        def emit(typ, value, line, column, start, end):
+            tokens.append(Token(typ, value, line, column))
+            starts.append(start)
+
+        try:
+            _scan(region, 0, base_line, line_start, True, emit)
+        except LexerError:
+            return False
+        # A '//' comment running into the next item would swallow it.
+        if '//' in region[region.rfind('\n') + 1:]:
+            return False
+
+        end_tok = len(tokens)
+        tokens.append(Token(TokenType.EOF, None, -1, -1))
+        p = Parser(tokens)
+        nodes = []
+        bounds = []
+        try:
+            while p.current.type != TokenType.EOF:
+                bounds.append(p.pos)
+                if p.current.type == TokenType.DEF:
+                    nodes.append(p.parse_func_def())
+                else:
+                    nodes.append(p.parse_stmt())
+        except ParserError:
+            return False
+        bounds.append(end_tok)
+        if not nodes:
+            # Whole items were deleted; let the full parse redistribute the gap.
+            return False
+
+        # Functions must still come before every statement.
+        n_funcs = len(self.program.functions)
+        kinds = [isinstance(n, ast_nodes.FuncDef) for n in nodes]
+        if kinds != sorted(kinds, reverse=True):
+            return False
+        if kinds[0] and first > n_funcs:
+            return False
+        if not kinds[-1] and last + 1 < n_funcs:
+            return False
+
+        new_items = []
+        line = base_line
+        for k, node in enumerate(nodes):
+            lo, hi = bounds[k], bounds[k + 1]
+            span_start = 0 if k == 0 else starts[lo]
+            span_end = starts[hi] if hi < end_tok else len(region)
+            new_items.append(self._make_item(node, tokens[lo:hi], line, region[span_start:span_end]))
+            line += new_items[-1].newlines
+        # Splice the AST lists.
+        old_funcs = max(0, min(last + 1, n_funcs) - first)
+        func_lo = min(first, n_funcs)
+        new_funcs = [n for n in (it.node for it in new_items) if isinstance(n, ast_nodes.FuncDef)]
+        new_stmts = [n for n in (it.node for it in new_items) if not isinstance(n, ast_nodes.FuncDef)]
+        self.program.functions[func_lo:func_lo + old_funcs] = new_funcs
+        stmt_lo = max(0, first - n_funcs)
+        stmt_hi = max(0, last + 1 - n_funcs)
+        self.program.statements[stmt_lo:stmt_hi] = new_stmts
+
+        old_count = last + 1 - first
+        if len(new_items) == old_count:
+            for k, item in enumerate(new_items):
+                old = items[first + k]
+                self._lengths.add(first + k, len(item.text) - len(old.text))
+                self._lines.add(first + k, item.newlines - old.newlines)
+            items[first:last + 1] = new_items
+        else:
+            items[first:last + 1] = new_items
+            self._set_items(items)
+        return True
+
@@ -1,48 +1,199 @@
 """Generador de código intermedio (TAC).
 
 Genera instrucciones TAC desde el AST usando temporales t1, t2... y etiquetas L1, L2...
-Instrucciones (op campo):
-- 'label'        : a=label
-- 'goto'         : a=label
-- 'ifgoto'       : a=left, b=op, c=(right,label)  (represented as tuple in c)
-- 'assign'       : a=target, b=source
-- 'binop'        : a=target, b=op, c=(left,right)
-- 'read'         : a=var
-- 'print'        : a=expr
-- 'param'        : a=expr (push parameter for function call)
-- 'call'         : a=function_name, b=num_params, c=return_target (or None)
-- 'return'       : a=expr (or None)
-- 'func_start'   : a=function_name
-- 'func_end'     : a=function_name
+Cada `TACInstr` tiene un código `op` (`Op`, entero) y campos con nombre:
+
+| op          | dest    | a           | b     | oper | label       |
+|-------------|---------|-------------|-------|------|-------------|
+| LABEL       |         |             |       |      | etiqueta    |
+| GOTO        |         |             |       |      | etiqueta    |
+| IFGOTO      |         | left        | right | rel  | etiqueta    |
+| ASSIGN      | target  | source      |       |      |             |
+| BINOP       | target  | left        | right | op   |             |
+| UNARYOP     | target  | operand     |       | op   |             |
+| READ        | var     |             |       |      |             |
+| PRINT       |         | value       |       |      |             |
+| PARAM       |         | value       |       |      |             |
+| CALL        | target  | nº de args  |       |      | función     |
+| RETURN      |         | value       |       |      |             |
+| FUNC_START  |         | parámetros  |       |      | función     |
+| FUNC_END    |         |             |       |      | función     |
+| PHI         | target  | valores     | preds |      |             |
+| SWITCH      |         | value       | casos |      | por defecto |
+
+Los operandos llevan tipo: `Temp` (t1...), `Var` (variable del programa),
+`StrConst` (literal de cadena, con comillas), `Label` (L1...) y constantes
+enteras como `int`. Las tres primeras clases son `str`, así que se imprimen
+igual que antes.
+
+`PHI` solo aparece en forma SSA (ver `ssa.py`): `a[i]` es el valor que llega
+desde el bloque `b[i]`.
+
+`SWITCH` salta a la etiqueta del caso cuyo valor es igual a `a`, o a la
+etiqueta por defecto si ninguno lo es; los casos son una tupla de pares
+`(entero, etiqueta)` con valores distintos. `IRGenerator` lo emite para una
+cadena `if x == 1 ... elif x == 2 ...` (ver `IRGenerator.switch_cases`).
 """
-from typing import List, Tuple, Any
+from enum import IntEnum
+from typing import Any, Dict, List
 from . import ast_nodes as ast
+from .visitor import Visitor
+
+
+class Op(IntEnum):
+    LABEL = 0
+    GOTO = 1
+    IFGOTO = 2
+    ASSIGN = 3
+    BINOP = 4
+    UNARYOP = 5
+    READ = 6
+    PRINT = 7
+    PARAM = 8
+    CALL = 9
+    RETURN = 10
+    FUNC_START = 11
+    FUNC_END = 12
+    PHI = 13
+    SWITCH = 14
+
+
+class Temp(str):
+    """Compiler temporary (t1, t2...)."""
+    __slots__ = ()
+
+
+class Var(str):
+    """Program variable or parameter."""
+    __slots__ = ()
+
+
+class StrConst(str):
+    """String literal operand, quotes included (as written to the assembly)."""
+    __slots__ = ()
+
+
+class Label(str):
+    """Jump target (L1, L2...)."""
+    __slots__ = ()
+
+
+# `not (a <oper> b)` is `a <NEGATED[oper]> b`, for ints and for strings
+NEGATED = {'<': '>=', '>': '<=', '<=': '>', '>=': '<', '==': '!=', '!=': '=='}
+
+
+def is_const(operand) -> bool:
+    """True for int and string constants."""
+    return type(operand) is int or type(operand) is StrConst
+
+
+def is_name(operand) -> bool:
+    """True for variables and temporaries."""
+    return type(operand) is Var or type(operand) is Temp
 
 
 class TACInstr:
-    def __init__(self, op: str, a: Any = None, b: Any = None, c: Any = None):
+    __slots__ = ('op', 'dest', 'a', 'b', 'oper', 'label')
+
+    def __init__(self, op: Op, dest: Any = None, a: Any = None, b: Any = None,
+                 oper: str = None, label: str = None):
         self.op = op
+        self.dest = dest
         self.a = a
         self.b = b
-        self.c = c
+        self.oper = oper
+        self.label = label
+
+    def uses(self) -> List[str]:
+        """Variables and temporaries read by the instruction."""
+        if self.op is Op.PHI:
+            return [x for x in self.a if type(x) is Var or type(x) is Temp]
+        return [x for x in (self.a, self.b) if type(x) is Var or type(x) is Temp]
+
+    def targets(self) -> List[Label]:
+        """Labels the instruction can jump to (for a switch, the cases and then the default)."""
+        op = self.op
+        if op is Op.GOTO or op is Op.IFGOTO:
+            return [self.label]
+        if op is Op.SWITCH:
+            return [label for _, label in self.b] + [self.label]
+        return []
+
+    def retarget(self, old: Label, new: Label):
+        """Make the jumps to `old` go to `new`."""
+        if self.op is Op.SWITCH:
+            self.b = tuple((value, new if label == old else label) for value, label in self.b)
+        if self.label == old and self.op in (Op.GOTO, Op.IFGOTO, Op.SWITCH):
+            self.label = new
 
     def __repr__(self) -> str:
-        return f"TAC({self.op}, {self.a}, {self.b}, {self.c})"
+        op = self.op
+        if op is Op.LABEL:
+            return f"{self.label}:"
+        if op is Op.GOTO:
+            return f"goto {self.label}"
+        if op is Op.IFGOTO:
+            return f"if {self.a} {self.oper} {self.b} goto {self.label}"
+        if op is Op.ASSIGN:
+            return f"{self.dest} = {self.a}"
+        if op is Op.BINOP:
+            return f"{self.dest} = {self.a} {self.oper} {self.b}"
+        if op is Op.UNARYOP:
+            return f"{self.dest} = {self.oper} {self.a}"
+        if op is Op.READ:
+            return f"read {self.dest}"
+        if op is Op.CALL:
+            return f"{self.dest} = call {self.label}, {self.a}"
+        if op is Op.FUNC_START:
+            return f"func {self.label}({', '.join(self.a)})"
+        if op is Op.FUNC_END:
+            return f"endfunc {self.label}"
+        if op is Op.PHI:
+            args = ', '.join(f"{v} [{getattr(p, 'label', None) or p}]" for v, p in zip(self.a, self.b))
+            return f"{self.dest} = phi({args})"
+        if op is Op.SWITCH:
+            cases = ', '.join(f"{value}: {label}" for value, label in self.b)
+            return f"switch {self.a} [{cases}] default {self.label}"
+        # PRINT, PARAM, RETURN
+        return f"{op.name.lower()} {self.a}"
+
+
+def _int_literal(node):
+    # Value of an int literal, possibly negated, or None
+    sign = 1
+    while isinstance(node, ast.UnaryOp) and node.op == '-':
+        sign, node = -sign, node.operand
+    if isinstance(node, ast.Literal) and type(node.value) is int:
+        return sign * node.value
+    return None
 
 
-class IRGenerator:
+class IRGenerator(Visitor):
+    # Shortest chain of `x == c` tests that becomes a `switch`
+    min_switch_cases = 3
+
     def __init__(self):
         self.code: List[TACInstr] = []
         self.temp_counter = 0
         self.label_counter = 0
+        self._vars: Dict[str, Var] = {}
+        self._stmt_handlers = self.dispatch_table('stmt_', self._unknown_stmt)
+        self._expr_handlers = self.dispatch_table('expr_', self._unknown_expr)
 
-    def new_temp(self) -> str:
+    def new_temp(self) -> Temp:
         self.temp_counter += 1
-        return f"t{self.temp_counter}"
+        return Temp(f"t{self.temp_counter}")
 
-    def new_label(self) -> str:
+    def new_label(self) -> Label:
         self.label_counter += 1
-        return f"L{self.label_counter}"
+        return Label(f"L{self.label_counter}")
+
+    def var(self, name: str) -> Var:
+        """The (shared) `Var` operand for `name`."""
+        v = self._vars.get(name)
+        if v is None:
+            v = self._vars[name] = Var(name)
+        return v
 
     def emit(self, instr: TACInstr):
         self.code.append(instr)
@@ -54,171 +205,261 @@ class IRGenerator:
         # If there are functions, generate a jump to main code
         if program.functions:
             main_label = self.new_label()
-            self.emit(TACInstr('goto', a=main_label))
+            self.emit(TACInstr(Op.GOTO, label=main_label))
         
         # Generate code for all function definitions first
         for func in program.functions:
-            self.functions[func.name] = func
-            # func_start stores function name and parameter list
-            self.emit(TACInstr('func_start', a=func.name, b=func.params))
-            # Function parameters are already in scope (handled by VM)
-            for stmt in func.body:
-                self.gen_stmt(stmt)
-            self.emit(TACInstr('func_end', a=func.name))
+            self.gen_function(func)
         
         # Then generate main program code
         if program.functions:
-            self.emit(TACInstr('label', a=main_label))
+            self.emit(TACInstr(Op.LABEL, label=main_label))
         for stmt in program.statements:
             self.gen_stmt(stmt)
         return self.code
 
+    def gen_function(self, func: ast.FuncDef):
+        self.functions[func.name] = func
+        # func_start stores function name and parameter list
+        self.emit(TACInstr(Op.FUNC_START, a=[self.var(p) for p in func.params], label=func.name))
+        # Function parameters are already in scope (handled by VM)
+        for stmt in func.body:
+            self.gen_stmt(stmt)
+        self.emit(TACInstr(Op.FUNC_END, label=func.name))
+
+    # Handlers are found through dispatch tables (one dict lookup per node).
+    # Statements with nested blocks are generators run by `trampoline`,
+    # expressions use an explicit work list, so nesting depth is not bounded
+    # by the Python stack. Emission order, and thus temp/label numbering, is
+    # that of a plain recursive walk.
     def gen_stmt(self, node):
-        if isinstance(node, ast.Read):
-            self.emit(TACInstr('read', a=node.var))
-            return
-        if isinstance(node, ast.Print):
-            v = self.gen_expr(node.expr)
-            self.emit(TACInstr('print', a=v))
-            return
-        if isinstance(node, ast.Return):
-            # For now, treat return like assignment to a special variable
-            v = self.gen_expr(node.expr)
-            self.emit(TACInstr('return', a=v))
-            return
-        if isinstance(node, ast.Assign):
-            src = self.gen_expr(node.expr)
-            self.emit(TACInstr('assign', a=node.target, b=src))
-            return
-        if isinstance(node, ast.If):
-            # if-elif-else chain: generate labels for each branch
-            end_label = self.new_label()
-            
-            # Generate code for initial if condition
-            left, op, right = self.flatten_cond(node.cond)
-            then_label = self.new_label()
-            next_label = self.new_label()
-            
-            # if cond goto then_label else goto next_label
-            self.emit(TACInstr('ifgoto', a=left, b=op, c=(right, then_label)))
-            self.emit(TACInstr('goto', a=next_label))
-            
-            # then block
-            self.emit(TACInstr('label', a=then_label))
-            for s in node.then_block:
-                self.gen_stmt(s)
-            self.emit(TACInstr('goto', a=end_label))
-            
-            # elif blocks
-            for elif_cond, elif_body in node.elif_blocks:
-                self.emit(TACInstr('label', a=next_label))
-                left, op, right = self.flatten_cond(elif_cond)
-                elif_then_label = self.new_label()
-                next_label = self.new_label()
-                self.emit(TACInstr('ifgoto', a=left, b=op, c=(right, elif_then_label)))
-                self.emit(TACInstr('goto', a=next_label))
-                self.emit(TACInstr('label', a=elif_then_label))
-                for s in elif_body:
-                    self.gen_stmt(s)
-                self.emit(TACInstr('goto', a=end_label))
-            
-            # else block
-            self.emit(TACInstr('label', a=next_label))
-            if node.else_block:
-                for s in node.else_block:
-                    self.gen_stmt(s)
-            
-            self.emit(TACInstr('label', a=end_label))
-            return
-        if isinstance(node, ast.While):
-            start = self.new_label()
-            body_label = self.new_label()
-            end = self.new_label()
-            self.emit(TACInstr('label', a=start))
-            left, op, right = self.flatten_cond(node.cond)
-            # if cond goto body_label
-            self.emit(TACInstr('ifgoto', a=left, b=op, c=(right, body_label)))
-            # else goto end
-            self.emit(TACInstr('goto', a=end))
-            self.emit(TACInstr('label', a=body_label))
-            for s in node.body:
-                self.gen_stmt(s)
-            self.emit(TACInstr('goto', a=start))
-            self.emit(TACInstr('label', a=end))
-            return
-        if isinstance(node, ast.For):
-            # for init; cond; update { body }
-            # Translate to: init; start: if cond goto body; goto end; body: ...; update; goto start; end:
-            # Generate init
-            self.gen_stmt(node.init)
-            start = self.new_label()
-            body_label = self.new_label()
-            end = self.new_label()
-            self.emit(TACInstr('label', a=start))
-            left, op, right = self.flatten_cond(node.cond)
-            # if cond goto body_label
-            self.emit(TACInstr('ifgoto', a=left, b=op, c=(right, body_label)))
-            # else goto end
-            self.emit(TACInstr('goto', a=end))
-            self.emit(TACInstr('label', a=body_label))
-            # body
-            for s in node.body:
-                self.gen_stmt(s)
-            # update
-            self.gen_stmt(node.update)
-            self.emit(TACInstr('goto', a=start))
-            self.emit(TACInstr('label', a=end))
-            return
+        self.run_stmt(self._stmt_handlers, node)
+
+    def _unknown_stmt(self, node):
         raise Exception(f"Unhandled stmt in IR generation: {node}")
 
-    def flatten_cond(self, cond):
-        # cond expected to be BinaryOp with relational operator
-        if isinstance(cond, ast.BinaryOp) and cond.op in ('<', '>', '<=', '>=', '==', '!='):
-            left = self.gen_expr(cond.left)
-            right = self.gen_expr(cond.right)
-            return left, cond.op, right
-        # otherwise, evaluate expression and compare to 0
-        temp = self.gen_expr(cond)
-        return temp, '!=', '0'
+    def stmt_Read(self, node):
+        self.emit(TACInstr(Op.READ, self.var(node.var)))
+
+    def stmt_Print(self, node):
+        v = self.gen_expr(node.expr)
+        self.emit(TACInstr(Op.PRINT, a=v))
+
+    def stmt_Return(self, node):
+        # For now, treat return like assignment to a special variable
+        v = self.gen_expr(node.expr)
+        self.emit(TACInstr(Op.RETURN, a=v))
+
+    def stmt_Assign(self, node):
+        src = self.gen_expr(node.expr)
+        self.emit(TACInstr(Op.ASSIGN, self.var(node.target), src))
+
+    def stmt_If(self, node):
+        # if-elif-else chain: each condition jumps over its block when false
+        end_label = self.new_label()
+        branches = [(node.cond, node.then_block)]
+        branches += [(elif_block.cond, elif_block.body) for elif_block in node.elif_blocks]
+        cases = self.switch_cases(branches)
+        n_cases = 0
+        if cases is not None:
+            # The leading `x == c` tests become one switch, whose default
+            # is the rest of the chain
+            subject, values = cases
+            n_cases = len(values)
+            rest = n_cases < len(branches) or node.else_block
+            default = self.new_label() if rest else end_label
+            case_labels = [self.new_label() for _ in values]
+            self.emit(TACInstr(Op.SWITCH, None, self.gen_expr(subject),
+                               tuple(zip(values, case_labels)), label=default))
+        for k, (cond, body) in enumerate(branches):
+            # the last block without an else falls into the end
+            last = k + 1 == len(branches) and not node.else_block
+            if k < n_cases:
+                self.emit(TACInstr(Op.LABEL, label=case_labels[k]))
+                yield self.run_block(self._stmt_handlers, body)
+                if not last:
+                    self.emit(TACInstr(Op.GOTO, label=end_label))
+                if k + 1 == n_cases and rest:
+                    self.emit(TACInstr(Op.LABEL, label=default))
+                continue
+            next_label = end_label if last else self.new_label()
+            self.gen_cond(cond, next_label, False)
+            yield self.run_block(self._stmt_handlers, body)
+            if not last:
+                self.emit(TACInstr(Op.GOTO, label=end_label))
+                self.emit(TACInstr(Op.LABEL, label=next_label))
+
+        # else block
+        if node.else_block:
+            yield self.run_block(self._stmt_handlers, node.else_block)
+
+        self.emit(TACInstr(Op.LABEL, label=end_label))
+
+    def switch_cases(self, branches):
+        """`(x, values)` when the chain `branches` starts with `switch` cases.
+
+        Those are at least `min_switch_cases` conditions in a row that
+        compare the same variable with distinct int literals (`x == 3`,
+        `-1 == x`). `x` is the `ast.Var` node of the first of them.
+        """
+        subject = None
+        values = []
+        for cond, _ in branches:
+            if not isinstance(cond, ast.BinaryOp) or cond.op != '==':
+                break
+            var, value = cond.left, _int_literal(cond.right)
+            if value is None:
+                var, value = cond.right, _int_literal(cond.left)
+            if (value is None or not isinstance(var, ast.Var) or value in values
+                    or subject is not None and var.name != subject.name):
+                break
+            if subject is None:
+                subject = var
+            values.append(value)
+        if len(values) < self.min_switch_cases:
+            return None
+        return subject, values
+
+    def stmt_While(self, node):
+        start = self.new_label()
+        end = self.new_label()
+        self.emit(TACInstr(Op.LABEL, label=start))
+        # if not cond goto end, else fall into the body
+        self.gen_cond(node.cond, end, False)
+        yield self.run_block(self._stmt_handlers, node.body)
+        self.emit(TACInstr(Op.GOTO, label=start))
+        self.emit(TACInstr(Op.LABEL, label=end))
+
+    def stmt_For(self, node):
+        # for init; cond; update { body }
+        # Translate to: init; start: if not cond goto end; body; update; goto start; end:
+        # Generate init
+        self.gen_stmt(node.init)
+        start = self.new_label()
+        end = self.new_label()
+        self.emit(TACInstr(Op.LABEL, label=start))
+        self.gen_cond(node.cond, end, False)
+        # body
+        yield self.run_block(self._stmt_handlers, node.body)
+        # update
+        self.gen_stmt(node.update)
+        self.emit(TACInstr(Op.GOTO, label=start))
+        self.emit(TACInstr(Op.LABEL, label=end))
+
+    def gen_cond(self, cond, label: Label, when: bool):
+        """Jump to `label` when the truth of `cond` is `when`, else fall through.
+
+        `and`, `or` and `not` become jumps: the right operand of `and`/`or`
+        is only evaluated when the left one does not decide the result.
+        """
+        # Explicit work list of (cond, label, when) and labels to place
+        work = [(cond, label, when)]
+        while work:
+            item = work.pop()
+            if type(item) is Label:
+                self.emit(TACInstr(Op.LABEL, label=item))
+                continue
+            cond, label, when = item
+            if isinstance(cond, ast.BinaryOp) and cond.op in ('and', 'or'):
+                if (cond.op == 'and') == when:
+                    # the left operand alone can only decide against `when`
+                    skip = self.new_label()
+                    work.append(skip)
+                    work.append((cond.right, label, when))
+                    work.append((cond.left, skip, not when))
+                else:
+                    work.append((cond.right, label, when))
+                    work.append((cond.left, label, when))
+            elif isinstance(cond, ast.UnaryOp) and cond.op == 'not':
+                work.append((cond.operand, label, not when))
+            else:
+                if isinstance(cond, ast.BinaryOp) and cond.op in NEGATED:
+                    left = self.gen_expr(cond.left)
+                    right = self.gen_expr(cond.right)
+                    oper = cond.op
+                else:
+                    # otherwise, evaluate expression and compare to 0
+                    left, oper, right = self.gen_expr(cond), '!=', 0
+                if not when:
+                    oper = NEGATED[oper]
+                self.emit(TACInstr(Op.IFGOTO, None, left, right, oper, label))
 
     def gen_expr(self, node):
-        if isinstance(node, ast.Literal):
-            return str(node.value)
-        if isinstance(node, ast.StringLiteral):
-            # Return string with quotes to distinguish from variables
-            return f'"{node.value}"'
-        if isinstance(node, ast.Var):
-            return node.name
-        if isinstance(node, ast.FuncCall):
-            # Generate PARAM instructions for each argument
-            for arg in node.args:
-                arg_val = self.gen_expr(arg)
-                self.emit(TACInstr('param', a=arg_val))
-            # Generate CALL instruction
-            result = self.new_temp()
-            self.emit(TACInstr('call', a=node.name, b=len(node.args), c=result))
-            return result
-        if isinstance(node, ast.UnaryOp):
-            operand = self.gen_expr(node.operand)
-            if node.op == '-':
-                # Generate: t = 0 - operand
-                t = self.new_temp()
-                self.emit(TACInstr('binop', a=t, b='-', c=('0', operand)))
-                return t
-            elif node.op == '+':
-                # Unary + is a no-op, just return operand
-                return operand
-            elif node.op == 'not':
-                # Generate: t = not operand (unary operation)
-                t = self.new_temp()
-                self.emit(TACInstr('unaryop', a=t, b='not', c=operand))
-                return t
+        # Post-order walk with an explicit work list. Handlers of inner nodes
+        # push `(finish, node)` below the node's children; `finish` emits the
+        # node once they are done. `values` holds the operands of finished
+        # subexpressions.
+        handlers = self._expr_handlers
+        values = []
+        work = [node]
+        while work:
+            node = work.pop()
+            if type(node) is tuple:
+                finish, node = node
+                finish(node, values)
             else:
-                raise Exception(f"Unknown unary operator: {node.op}")
-        if isinstance(node, ast.BinaryOp):
-            left = self.gen_expr(node.left)
-            right = self.gen_expr(node.right)
-            t = self.new_temp()
-            self.emit(TACInstr('binop', a=t, b=node.op, c=(left, right)))
-            return t
+                handlers[type(node)](node, work, values)
+        return values.pop()
+
+    def _unknown_expr(self, node, work, values):
         raise Exception(f"Unhandled expr in IR generation: {node}")
+
+    def expr_Literal(self, node, work, values):
+        values.append(node.value)
+
+    def expr_StringLiteral(self, node, work, values):
+        # Quoted, as it is written to the assembly
+        values.append(StrConst(f'"{node.value}"'))
+
+    def expr_Var(self, node, work, values):
+        values.append(self.var(node.name))
+
+    def expr_FuncCall(self, node, work, values):
+        # Each argument is followed by its PARAM instruction
+        work.append((self._finish_call, node))
+        for arg in reversed(node.args):
+            work.append((self._finish_param, arg))
+            work.append(arg)
+
+    def _finish_param(self, arg, values):
+        # Generate PARAM instruction for a finished call argument
+        self.emit(TACInstr(Op.PARAM, a=values.pop()))
+
+    def _finish_call(self, node, values):
+        # Generate CALL instruction
+        result = self.new_temp()
+        self.emit(TACInstr(Op.CALL, result, len(node.args), label=node.name))
+        values.append(result)
+
+    def expr_UnaryOp(self, node, work, values):
+        work.append((self._finish_unary, node))
+        work.append(node.operand)
+
+    def _finish_unary(self, node, values):
+        if node.op == '-':
+            # Generate: t = 0 - operand
+            t = self.new_temp()
+            self.emit(TACInstr(Op.BINOP, t, 0, values.pop(), '-'))
+            values.append(t)
+        elif node.op == '+':
+            # Unary + is a no-op, the operand is the result
+            pass
+        elif node.op == 'not':
+            # Generate: t = not operand (unary operation)
+            t = self.new_temp()
+            self.emit(TACInstr(Op.UNARYOP, t, values.pop(), oper='not'))
+            values.append(t)
+        else:
+            raise Exception(f"Unknown unary operator: {node.op}")
+
+    def expr_BinaryOp(self, node, work, values):
+        work.append((self._finish_binop, node))
+        work.append(node.right)
+        work.append(node.left)
+
+    def _finish_binop(self, node, values):
+        right = values.pop()
+        left = values.pop()
+        t = self.new_temp()
+        self.emit(TACInstr(Op.BINOP, t, left, right, node.op))
+        values.append(t)
@@ -1,9 +1,19 @@
 """Analizador léxico para MiniLang.
 
-Proporciona la clase `Lexer` que convierte texto fuente en una lista de `Token`.
+Proporciona dos motores que convierten texto fuente en una lista de `Token`:
+- `Lexer`: recorre el texto carácter a carácter (motor original, "char").
+- `RegexLexer`: escanea con un patrón maestro compilado y corta los lexemas
+  por desplazamientos (motor por defecto, "regex").
+
+Ambos producen exactamente los mismos tokens (tipo, valor, línea y columna).
+`tokenize_compact()` devuelve un `TokenStream` compacto (arrays paralelos) y
+`iter_tokens()` genera esos mismos tokens de forma perezosa a partir de un
+archivo (o un `mmap`) sin cargar el fuente completo ni la lista de tokens.
 """
-from typing import List
-from .tokens import Token, TokenType
+import codecs
+import re
+from typing import Iterator, List
+from .tokens import Token, TokenStream, TokenType
 
 
 class LexerError(Exception):
@@ -133,7 +143,7 @@ class Lexer:
     def tokenize(self) -> List[Token]:
         tokens: List[Token] = []
         while self.current:
-            if self.current.isspace() or self.current == '/':
+            if self.current.isspace() or (self.current == '/' and self.peek() in ('/', '*')):
                 self.skip_whitespace_and_comments()
                 continue
 
@@ -207,6 +217,243 @@ class Lexer:
         return tokens
 
 
-def tokenize(text: str):
-    l = Lexer(text)
+# Master pattern for the regex engine. Blanks before a token are swallowed by
+# the `[ \t]*` prefix (they never contain a newline, so line bookkeeping is not
+# affected). Only ASCII identifiers/numbers are matched here; anything else
+# falls through to OTHER and is handled by hand so that Unicode letters and
+# digits behave exactly like in `Lexer` (str.isalpha/isalnum/isdigit).
+_TOKEN_RE = re.compile(r"""
+    [ \t]*
+    (?:
+        (?P<WS>\s+)
+      | (?P<IDENT>[A-Za-z_]\w*)
+      | (?P<OP><=|>=|==|!=|[-+*%=<>;{}(),])
+      | (?P<NUMBER>[0-9]+)
+      | (?P<LINE_COMMENT>//[^\n]*)
+      | (?P<BLOCK_COMMENT>/\*[\s\S]*?(?:\*/|\Z))
+      | (?P<DIV>/)
+      | (?P<STRING>"(?:[^"\\]|\\[\s\S]?)*(?P<CLOSE>")?)
+      | (?P<OTHER>[\s\S])
+    )
+""", re.VERBOSE)
+
+_G = _TOKEN_RE.groupindex
+_WS, _IDENT, _OP, _NUMBER = _G['WS'], _G['IDENT'], _G['OP'], _G['NUMBER']
+_LINE_COMMENT, _BLOCK_COMMENT, _DIV = _G['LINE_COMMENT'], _G['BLOCK_COMMENT'], _G['DIV']
+_STRING, _CLOSE, _OTHER = _G['STRING'], _G['CLOSE'], _G['OTHER']
+
+_ESCAPE_RE = re.compile(r'\\(["n\\])')
+_ESCAPES = {'"': '"', 'n': '\n', '\\': '\\'}
+
+OPERATORS = {
+    '<=': TokenType.LE,
+    '>=': TokenType.GE,
+    '==': TokenType.EQ,
+    '!=': TokenType.NE,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MUL,
+    '/': TokenType.DIV,
+    '%': TokenType.MOD,
+    '=': TokenType.ASSIGN,
+    '<': TokenType.LT,
+    '>': TokenType.GT,
+    ';': TokenType.SEMI,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    ',': TokenType.COMMA,
+}
+
+
+def _unescape(s: str) -> str:
+    if '\\' not in s:
+        return s
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(1)], s)
+
+
+def _scan(text: str, pos: int, line: int, line_start: int, final: bool, emit):
+    """Emit the tokens of `text[pos:]` and return the updated `(pos, line, line_start)`.
+
+    `emit(type, value, line, column, start, end)` receives every token together
+    with the offsets of its lexeme in `text`.
+
+    `line_start` is the offset (relative to `text`, possibly negative) of the
+    first character of the current line. When `final` is false, `text` is only
+    a prefix of the source: scanning stops before the first lexeme that touches
+    the end of the buffer, since more input could still extend it.
+    """
+    n = len(text)
+    limit = n + 1 if final else n
+    finditer = _TOKEN_RE.finditer
+    keywords = KEYWORDS
+    operators = OPERATORS
+    T_IDENT = TokenType.IDENT
+    T_NUMBER = TokenType.NUMBER
+    while pos < n:
+        # The inner loop only breaks out (and restarts the scan at `pos`)
+        # on the rare non-ASCII paths that are lexed by hand.
+        for m in finditer(text, pos):
+            end = m.end()
+            if end == limit:
+                return m.start(), line, line_start
+            idx = m.lastindex
+            if idx == _IDENT:
+                s = m[idx]
+                emit(keywords.get(s, T_IDENT), s, line, end - len(s) - line_start + 1, end - len(s), end)
+            elif idx == _OP:
+                s = m[idx]
+                emit(operators[s], s, line, end - len(s) - line_start + 1, end - len(s), end)
+            elif idx == _WS or idx == _LINE_COMMENT or idx == _BLOCK_COMMENT:
+                start = m.start(idx)
+                nl = text.count('\n', start, end)
+                if nl:
+                    line += nl
+                    line_start = text.rfind('\n', start, end) + 1
+                if idx == _BLOCK_COMMENT and (end - start < 4 or not text.endswith('*/', start, end)):
+                    raise LexerError(f"Unterminated block comment at {line}:{end - line_start + 1}")
+            elif idx == _NUMBER:
+                start = m.start(idx)
+                if end < n and text[end] >= '\x80' and text[end].isdigit():
+                    # Non-ASCII digits (e.g. '²') continue a number in `Lexer`
+                    while end < n and text[end].isdigit():
+                        end += 1
+                    if end == limit:
+                        return m.start(), line, line_start
+                    emit(T_NUMBER, text[start:end], line, start - line_start + 1, start, end)
+                    pos = end
+                    break
+                emit(T_NUMBER, m[idx], line, start - line_start + 1, start, end)
+            elif idx == _DIV:
+                emit(TokenType.DIV, '/', line, end - line_start, end - 1, end)
+            elif idx == _STRING:
+                start = m.start(idx)
+                col = start - line_start + 1
+                nl = text.count('\n', start, end)
+                if nl:
+                    line += nl
+                    line_start = text.rfind('\n', start, end) + 1
+                if m.start(_CLOSE) < 0:
+                    raise LexerError(f"Unterminated string at {line}:{col}")
+                emit(TokenType.STRING, _unescape(text[start + 1:end - 1]), line, col, start, end)
+            else:
+                start = m.start(idx)
+                ch = text[start]
+                if ch.isalpha():
+                    while end < n and (text[end].isalnum() or text[end] == '_'):
+                        end += 1
+                    if end == limit:
+                        return m.start(), line, line_start
+                    s = text[start:end]
+                    emit(keywords.get(s, T_IDENT), s, line, start - line_start + 1, start, end)
+                elif ch.isdigit():
+                    while end < n and text[end].isdigit():
+                        end += 1
+                    if end == limit:
+                        return m.start(), line, line_start
+                    emit(T_NUMBER, text[start:end], line, start - line_start + 1, start, end)
+                else:
+                    raise LexerError(f"Unexpected character {ch!r} at {line}:{start - line_start + 1}")
+                pos = end
+                break
+        else:
+            pos = n
+    return pos, line, line_start
+
+
+class RegexLexer:
+    """Single-pass tokenizer driven by `_TOKEN_RE`.
+
+    Lexemes are sliced from the source by offset instead of being built one
+    character at a time; line/column are derived from newline positions.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def tokenize(self) -> List[Token]:
+        tokens: List[Token] = []
+        append = tokens.append
+        _, line, line_start = _scan(self.text, 0, 1, 0, True,
+                                    lambda typ, value, line, column, start, end: append(Token(typ, value, line, column)))
+        tokens.append(Token(TokenType.EOF, None, line, len(self.text) - line_start + 1))
+        return tokens
+
+
+def tokenize_compact(text: str) -> TokenStream:
+    """Tokenize `text` into an array-backed `TokenStream` (regex engine)."""
+    stream = TokenStream(text)
+    _, line, line_start = _scan(text, 0, 1, 0, True, stream.append)
+    stream.append(TokenType.EOF, None, line, len(text) - line_start + 1, len(text), len(text))
+    return stream
+
+
+def _read_chunks(source, chunk_size: int) -> Iterator[str]:
+    """Yield the source text piece by piece.
+
+    `source` may be a `str`, a text or binary file object, or any object with
+    a `read(size)` method such as `mmap.mmap`; bytes are decoded as UTF-8
+    incrementally, so multi-byte characters split across reads are handled.
+    """
+    if isinstance(source, str):
+        for i in range(0, len(source), chunk_size):
+            yield source[i:i + chunk_size]
+        return
+    decoder = None
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            yield data
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+        yield decoder.decode(data)
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+
+def iter_tokens(source, chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """Lazily tokenize `source`, yielding the same tokens as `tokenize()`.
+
+    Only a window of the source (the unconsumed tail plus one chunk) and the
+    tokens of that window are held in memory at any time.
+    """
+    buf = ''
+    line = 1
+    line_start = 0
+    pending: List[Token] = []
+    append = pending.append
+
+    def emit(typ, value, line, column, start, end):
+        append(Token(typ, value, line, column))
+
+    for chunk in _read_chunks(source, chunk_size):
+        if not chunk:
+            continue
+        buf += chunk
+        pos, line, line_start = _scan(buf, 0, line, line_start, False, emit)
+        yield from pending
+        pending.clear()
+        buf = buf[pos:]
+        line_start -= pos
+    _, line, line_start = _scan(buf, 0, line, line_start, True, emit)
+    yield from pending
+    yield Token(TokenType.EOF, None, line, len(buf) - line_start + 1)
+
+
+ENGINES = {
+    "regex": RegexLexer,
+    "char": Lexer,
+}
+
+
+def tokenize(text: str, engine: str = "regex"):
+    try:
+        lexer_cls = ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown lexer engine {engine!r} (expected one of {', '.join(ENGINES)})")
+    l = lexer_cls(text)
     return l.tokenize()
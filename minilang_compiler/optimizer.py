@@ -1,40 +1,2083 @@
-"""Optimizaciones sobre el TAC (opcional).
+"""Optimizaciones sobre el TAC.
 
-Se pueden implementar optimizaciones como constant folding y dead code elimination.
+Todas calculan con la semántica exacta de `SimpleVM`: `/` es división entera
+(`//`), dividir o tomar el módulo por 0 da 0, y los operadores relacionales,
+`and`, `or` y `not` dan 1 o 0. Solo se pliegan enteros: una cadena en una
+operación aritmética se deja para la VM.
+
+`constant_folding` pliega, instrucción a instrucción, las operaciones cuyos
+operandos son literales enteros. `constant_propagation` es propagación de
+constantes condicional dispersa (Wegman y Zadeck) sobre un `ProgramCFG` en
+forma SSA: sigue los valores conocidos a través de asignaciones y `PHI`,
+pliega cada operación con operandos conocidos, convierte los `ifgoto` con
+condición constante y los `switch` sobre un valor constante en saltos
+incondicionales y elimina los bloques que quedan inalcanzables.
+`tail_call_elimination` convierte las llamadas de una función a sí misma en
+posición de cola en un salto a su inicio. `inline_functions` sustituye las
+llamadas a funciones pequeñas y no recursivas por una copia de su código.
+`loop_invariant_code_motion` saca de los bucles los cálculos cuyos operandos
+no cambian dentro de ellos.
+`loop_unrolling` repite el cuerpo de los bucles `for` con número de vueltas
+conocido (entero o varias veces por vuelta) y `strength_reduction` convierte
+los valores que crecen linealmente con la variable de inducción (`i * k + b`)
+en variables de inducción nuevas, que se actualizan con una suma.
+`value_numbering` reutiliza el resultado de una operación ya calculada con los
+mismos valores (en el bloque o en un bloque dominador). `copy_propagation`
+hace que la operación que calcula un temporal escriba directamente en la
+variable a la que se copia y que los usos de una copia lean su origen.
+`dead_code_elimination` quita los bloques inalcanzables, las asignaciones y
+operaciones cuyo valor nadie usa, los saltos al bloque siguiente y las
+etiquetas a las que nadie salta. Ya fuera de SSA, `loop_rotation` pasa el
+test de los bucles a su final (cada vuelta hace un solo salto condicional) y
+`jump_threading` lleva los saltos que caen en otro salto directamente a su
+destino, también cuando el test de llegada tiene operandos constantes.
+
+`PassManager` pasa el TAC al CFG en SSA, ejecuta una secuencia de estas
+pasadas (repitiendo los grupos hasta que ninguna cambia nada) y lo devuelve a
+TAC, anotando el tiempo y los cambios de cada pasada. `PIPELINES` tiene la
+secuencia de cada nivel de optimización (`-O0`, `-O1` y `-O2` en
+`compiler.py`) y `optimize` aplica la de un nivel.
 """
-from .ir import TACInstr
+import copy
+import functools
+import operator
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cfg import BasicBlock, FunctionCFG, ProgramCFG, build_cfg
+from .ir import NEGATED, Op, StrConst, TACInstr, Temp, Var, is_name
+from .ssa import base_name, from_ssa, last_versions, new_version, phis, to_ssa
+
+
+def _div(a, b):
+    return a // b if b != 0 else 0
+
+
+def _mod(a, b):
+    return a % b if b != 0 else 0
+
+
+# Same results as the SimpleVM instructions of each operator
+_BINARY = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _div,
+    '%': _mod,
+    '<': lambda a, b: 1 if a < b else 0,
+    '>': lambda a, b: 1 if a > b else 0,
+    '<=': lambda a, b: 1 if a <= b else 0,
+    '>=': lambda a, b: 1 if a >= b else 0,
+    '==': lambda a, b: 1 if a == b else 0,
+    '!=': lambda a, b: 1 if a != b else 0,
+    'and': lambda a, b: 1 if (a != 0 and b != 0) else 0,
+    'or': lambda a, b: 1 if (a != 0 or b != 0) else 0,
+}
+
+_UNARY = {
+    'not': lambda a: 1 if a == 0 else 0,
+}
+
+_RELATIONAL = ('<', '>', '<=', '>=', '==', '!=')
+
+
+def fold_binop(oper: str, a: int, b: int) -> Optional[int]:
+    """`a oper b` as the VM computes it, or None for an unknown operator."""
+    fn = _BINARY.get(oper)
+    return fn(a, b) if fn is not None else None
+
+
+def fold_unaryop(oper: str, a: int) -> Optional[int]:
+    """`oper a` as the VM computes it, or None for an unknown operator."""
+    fn = _UNARY.get(oper)
+    return fn(a) if fn is not None else None
 
 
 def constant_folding(tac_list):
+    """Fold operations on int literals; `ifgoto`s and `switch`es on literals become jumps."""
     new_list = []
     for instr in tac_list:
-        if instr.op == 'binop':
-            target = instr.a
-            op = instr.b
-            left, right = instr.c
-            # both constants?
-            try:
-                lval = int(left)
-                rval = int(right)
-                if op == '+':
-                    val = lval + rval
-                elif op == '-':
-                    val = lval - rval
-                elif op == '*':
-                    val = lval * rval
-                elif op == '/':
-                    val = lval // rval if rval != 0 else 0
-                else:
-                    # relational or others: keep as is
-                    new_list.append(instr)
+        op = instr.op
+        if op is Op.BINOP and type(instr.a) is int and type(instr.b) is int:
+            val = fold_binop(instr.oper, instr.a, instr.b)
+            if val is not None:
+                new_list.append(TACInstr(Op.ASSIGN, instr.dest, val))
+                continue
+        elif op is Op.UNARYOP and type(instr.a) is int:
+            val = fold_unaryop(instr.oper, instr.a)
+            if val is not None:
+                new_list.append(TACInstr(Op.ASSIGN, instr.dest, val))
+                continue
+        elif (op is Op.IFGOTO and type(instr.a) is int and type(instr.b) is int
+              and instr.oper in _RELATIONAL):
+            if fold_binop(instr.oper, instr.a, instr.b):
+                new_list.append(TACInstr(Op.GOTO, label=instr.label))
+            continue
+        elif op is Op.SWITCH and type(instr.a) is int:
+            new_list.append(TACInstr(Op.GOTO, label=dict(instr.b).get(instr.a, instr.label)))
+            continue
+        new_list.append(instr)
+    return new_list
+
+
+# -- sparse conditional constant propagation --------------------------------------
+
+# Lattice: no entry in the value map (None) means no value seen yet, an int is
+# a constant and _VARYING means "not a constant".
+_VARYING = object()
+
+
+def constant_propagation(program: ProgramCFG) -> int:
+    """Propagate and fold constants in `program`, which must be in SSA form.
+
+    Uses of names with a known value become int constants, operations whose
+    value is known become assigns, `ifgoto`s with a known condition become a
+    `goto` (or are dropped), so do `switch`es on a known value, and blocks
+    left unreachable are removed. Returns
+    the number of rewritten or removed instructions.
+    """
+    return sum(_propagate_region(region) for region in program.regions)
+
+
+def _propagate_region(region: FunctionCFG) -> int:
+    blocks = region.blocks
+    if not blocks:
+        return 0
+    # Names defined in the region; any other name is an entry value (a
+    # parameter or, when entered by falling off the previous region, whatever
+    # that one left), never a known constant.
+    defined = set()
+    users: Dict[str, List[Tuple[BasicBlock, TACInstr]]] = {}
+    for b in blocks:
+        for instr in b.instrs:
+            if instr.dest is not None:
+                defined.add(instr.dest)
+            for u in instr.uses():
+                users.setdefault(u, []).append((b, instr))
+
+    values: Dict[str, object] = {}
+    executable_edges = set()
+    executable = set()
+    flow_work: List[Tuple[Optional[BasicBlock], BasicBlock]] = [(None, region.entry)]
+    name_work: List[str] = []
+
+    def value(x):
+        if type(x) is int:
+            return x
+        if (type(x) is Var or type(x) is Temp) and x in defined:
+            return values.get(x)
+        return _VARYING
+
+    def evaluate(block, instr):
+        op = instr.op
+        if op is Op.PHI:
+            result = None
+            for v, p in zip(instr.a, instr.b):
+                if (p.index, block.index) not in executable_edges:
+                    continue
+                x = value(v)
+                if x is None:
+                    continue
+                if x is _VARYING or (result is not None and x != result):
+                    return _VARYING
+                result = x
+            return result
+        if op is Op.ASSIGN:
+            return value(instr.a)
+        if op is Op.BINOP:
+            fn = _BINARY.get(instr.oper)
+            if fn is None:
+                return _VARYING
+            a = value(instr.a)
+            b = value(instr.b)
+            # Whatever the other operand holds: `0 and x` is 0, `1 or x` is 1
+            if instr.oper == 'and' and (type(a) is int and a == 0 or type(b) is int and b == 0):
+                return 0
+            if instr.oper == 'or' and (type(a) is int and a != 0 or type(b) is int and b != 0):
+                return 1
+            if a is _VARYING or b is _VARYING:
+                return _VARYING
+            if a is None or b is None:
+                return None
+            return fn(a, b)
+        if op is Op.UNARYOP:
+            fn = _UNARY.get(instr.oper)
+            if fn is None:
+                return _VARYING
+            a = value(instr.a)
+            if a is None or a is _VARYING:
+                return a
+            return fn(a)
+        # call, read
+        return _VARYING
+
+    def condition(instr):
+        if instr.oper not in _RELATIONAL:
+            return _VARYING
+        a = value(instr.a)
+        b = value(instr.b)
+        if a is _VARYING or b is _VARYING:
+            return _VARYING
+        if a is None or b is None:
+            return None
+        return _BINARY[instr.oper](a, b)
+
+    def lower(name, new):
+        if new is None:
+            return
+        old = values.get(name)
+        if old is _VARYING or (old is not None and new is not _VARYING and old == new):
+            return
+        values[name] = new if old is None else _VARYING
+        name_work.append(name)
+
+    def branch(block):
+        succs = block.succs
+        last = block.terminator
+        if last is not None and last.op is Op.IFGOTO:
+            cond = condition(last)
+            if cond is None:
+                return
+            if cond is not _VARYING:
+                succs = succs[:1] if cond else succs[1:]
+        elif last is not None and last.op is Op.SWITCH:
+            x = value(last.a)
+            if x is None:
+                return
+            if x is not _VARYING:
+                label = dict(last.b).get(x, last.label)
+                succs = [s for s in succs if s.label == label]
+        for s in succs:
+            edge = (block.index, s.index)
+            if edge not in executable_edges:
+                executable_edges.add(edge)
+                flow_work.append((block, s))
+
+    while flow_work or name_work:
+        while flow_work:
+            _, block = flow_work.pop()
+            if block.index in executable:
+                # Only the phis can see the new edge
+                for phi in phis(block):
+                    lower(phi.dest, evaluate(block, phi))
+                continue
+            executable.add(block.index)
+            for instr in block.instrs:
+                if instr.dest is not None:
+                    lower(instr.dest, evaluate(block, instr))
+            branch(block)
+        while name_work:
+            name = name_work.pop()
+            for block, instr in users.get(name, ()):
+                if block.index not in executable:
                     continue
-                # replace with assign target = const
-                new_list.append(TACInstr('assign', a=target, b=str(val)))
+                if instr.dest is not None:
+                    lower(instr.dest, evaluate(block, instr))
+                elif instr.op is Op.IFGOTO or instr.op is Op.SWITCH:
+                    branch(block)
+
+    # Rewrite the executable blocks with the constants found
+    def known(x):
+        return is_name(x) and type(values.get(x)) is int
+
+    rewritten = 0
+    for b in blocks:
+        if b.index not in executable:
+            continue
+        instrs = []
+        for instr in b.instrs:
+            op = instr.op
+            if op is Op.PHI:
+                # Left alone even when constant: from_ssa coalesces a phi into
+                # nothing, while an assign or a constant operand would cost a
+                # copy each time the block is entered
+                instrs.append(instr)
+                continue
+            v = values.get(instr.dest) if instr.dest is not None else None
+            if type(v) is int:
+                if op is not Op.ASSIGN or type(instr.a) is not int:
+                    instr.op = Op.ASSIGN
+                    instr.a = v
+                    instr.b = instr.oper = None
+                    rewritten += 1
+                instrs.append(instr)
+                continue
+            changed = False
+            if known(instr.a):
+                instr.a = values[instr.a]
+                changed = True
+            if known(instr.b):
+                instr.b = values[instr.b]
+                changed = True
+            if op is Op.IFGOTO:
+                cond = condition(instr)
+                if cond is not _VARYING and cond is not None:
+                    rewritten += 1
+                    if cond:
+                        instrs.append(TACInstr(Op.GOTO, label=instr.label))
+                    continue  # a false condition falls through
+            elif op is Op.SWITCH and type(instr.a) is int:
+                rewritten += 1
+                instrs.append(TACInstr(Op.GOTO, label=dict(instr.b).get(instr.a, instr.label)))
+                continue
+            if changed:
+                rewritten += 1
+            instrs.append(instr)
+        b.instrs = instrs
+    region.link()
+    region.remove_unreachable()
+    region.prune_phis()
+    return rewritten
+
+
+# -- value numbering --------------------------------------------------------------
+
+# Operators whose operands can be swapped for any operand type (`+` also
+# concatenates strings, so it is not one of them)
+_COMMUTATIVE = ('*', '==', '!=', 'and', 'or')
+
+
+def value_numbering(program: ProgramCFG, global_scope: bool = True) -> int:
+    """Reuse computed values in `program`, which must be in SSA form.
+
+    A `binop` or `unaryop` that computes the same operation on the same
+    values as an earlier one becomes a copy of that one's result (left to
+    `copy_propagation` and `dead_code_elimination`). In SSA equal names are
+    equal values, and copies are followed, so `x = a; y = x * 2` matches
+    `a * 2`. With `global_scope` the earlier computation may be in any
+    dominating block (a walk of the dominator tree), otherwise only in the
+    same block. Returns the number of computations removed.
+    """
+    return sum(_number_values(region, global_scope) for region in program.regions)
+
+
+def _operand_order(x):
+    return (type(x) is not int, str(x))
+
+
+def _number_values(region: FunctionCFG, global_scope: bool) -> int:
+    if not region.blocks:
+        return 0
+    # Name -> the operand holding its value (through copies)
+    same: Dict[str, object] = {}
+    available: Dict[tuple, str] = {}
+    removed = 0
+
+    def canon(x):
+        return same.get(x, x) if is_name(x) else x
+
+    def visit(block, added):
+        nonlocal removed
+        for instr in block.instrs:
+            op = instr.op
+            if op is Op.ASSIGN:
+                same[instr.dest] = canon(instr.a)
                 continue
-            except ValueError:
-                # non-constant, keep
-                new_list.append(instr)
+            if op is Op.BINOP:
+                a, b = canon(instr.a), canon(instr.b)
+                if instr.oper in _COMMUTATIVE and _operand_order(b) < _operand_order(a):
+                    a, b = b, a
+                key = (instr.oper, a, b)
+            elif op is Op.UNARYOP:
+                key = (instr.oper, canon(instr.a))
+            else:
                 continue
+            prior = available.get(key)
+            if prior is None:
+                available[key] = instr.dest
+                added.append(key)
+            else:
+                instr.op = Op.ASSIGN
+                instr.a = prior
+                instr.b = instr.oper = None
+                same[instr.dest] = prior
+                removed += 1
+
+    if not global_scope:
+        for b in region.blocks:
+            visit(b, [])
+            available.clear()
+        return removed
+
+    # Preorder walk of the dominator tree; an expression stays available in
+    # the subtree of the block that computes it
+    region.compute_dominators()
+    entry = region.entry
+    added = []
+    visit(entry, added)
+    stack = [(iter(entry.dom_children), added)]
+    while stack:
+        children, added = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            for key in added:
+                del available[key]
         else:
-            new_list.append(instr)
-    return new_list
+            child_added = []
+            visit(child, child_added)
+            stack.append((iter(child.dom_children), child_added))
+    return removed
+
+
+# -- tail calls -------------------------------------------------------------------
+
+def tail_call_elimination(program: ProgramCFG) -> int:
+    """Turn the self tail calls of `program` (in SSA form) into jumps; return how many.
+
+    `t = call f` followed by `return t` inside `f` becomes a jump back to
+    the start of `f`, with phis there giving each parameter its argument
+    (0 when missing). A call starts with only the parameters set, so every
+    other name that is read before being written goes back to 0 as well.
+    The recursion then runs as a loop, without growing the VM call stack.
+    """
+    return sum(_eliminate_tail_calls(func, program) for func in program.functions)
+
+
+def _eliminate_tail_calls(func: FunctionCFG, program: ProgramCFG) -> int:
+    tail_calls = []
+    for b in func.blocks:
+        if len(b.instrs) < 2:
+            continue
+        call, last = b.instrs[-2], b.instrs[-1]
+        if (last.op is Op.RETURN and call.op is Op.CALL and call.label == func.name
+                and call.dest is not None and last.a == call.dest):
+            params = []
+            for at, instr in enumerate(b.instrs[:-2]):
+                if instr.op is Op.PARAM:
+                    params.append(at)
+                elif instr.op is Op.CALL:
+                    del params[max(0, len(params) - instr.a):]
+            if len(params) >= call.a:
+                tail_calls.append((b, params[len(params) - call.a:]))
+    if not tail_calls:
+        return 0
+
+    # The old entry becomes the loop header, entered from a new empty entry
+    header = func.entry
+    entry = BasicBlock(-1)
+    func.blocks.insert(0, entry)
+    defined = set()
+    entry_names = []  # names read before being written, parameters first
+    for instr in func.instructions():
+        if instr.dest is not None:
+            defined.add(instr.dest)
+    for name in list(func.params) + [u for instr in func.instructions() for u in instr.uses()]:
+        if name not in defined and name not in entry_names:
+            entry_names.append(name)
+    versions = last_versions(defined)
+    renamed = {name: new_version(name, versions) for name in entry_names}
+    for instr in func.instructions():
+        if instr.op is Op.PHI:
+            instr.a = [renamed.get(x, x) if is_name(x) else x for x in instr.a]
+            continue
+        if is_name(instr.a) and instr.a in renamed:
+            instr.a = renamed[instr.a]
+        if is_name(instr.b) and instr.b in renamed:
+            instr.b = renamed[instr.b]
+    header_phis = {name: TACInstr(Op.PHI, renamed[name], [name], [entry]) for name in entry_names}
+
+    jump_to = program.label_of(header)
+    for b, args_at in tail_calls:
+        args = [b.instrs[k].a for k in args_at]
+        taken = set(args_at)
+        b.instrs = [x for k, x in enumerate(b.instrs[:-2]) if k not in taken]
+        b.instrs.append(TACInstr(Op.GOTO, label=jump_to))
+        for name, phi in header_phis.items():
+            k = func.params.index(name) if name in func.params else len(args)
+            phi.a.append(args[k] if k < len(args) else 0)
+            phi.b.append(b)
+    header.instrs[:0] = header_phis.values()
+    func.renumber()
+    func.link()
+    return len(tail_calls)
+
+
+# -- inlining ---------------------------------------------------------------------
+
+def inline_functions(program: ProgramCFG, max_size: int = 20) -> int:
+    """Replace calls to small functions by their code; return how many calls.
+
+    `program` must be in SSA form. A function is inlined when it has at
+    most `max_size` instructions, returns on every path (falling off its
+    end would run the next function), has no `read` (its prompt shows the
+    variable name) and cannot reach a call to itself. The call graph is
+    walked callees first, so a function gets its own calls inlined before
+    it is measured. The copy renames every name of the callee to a fresh
+    temp: the callee starts with only its parameters set, so a parameter
+    becomes a copy of its argument and any other name read before being
+    written becomes 0. Each inlined call saves the `param`s, the `call`
+    (which copies all the caller's variables), the `return` and the jumps.
+    """
+    functions = {f.name: f for f in program.functions}
+    callees: Dict[FunctionCFG, set] = {}
+    callers: Dict[str, List[FunctionCFG]] = {}
+    for region in program.regions:
+        called = {instr.label for instr in region.instructions()
+                  if instr.op is Op.CALL and instr.label in functions}
+        callees[region] = called
+        for name in called:
+            callers.setdefault(name, []).append(region)
+    # Callees before callers; what is left over can reach a recursive call
+    pending = {f: len(callees[f]) for f in program.functions}
+    ready = [f for f in program.functions if not pending[f]]
+    order = []
+    while ready:
+        func = ready.pop()
+        order.append(func)
+        for caller in callers.get(func.name, ()):
+            if caller in pending:
+                pending[caller] -= 1
+                if not pending[caller]:
+                    ready.append(caller)
+    inlinable: Dict[str, FunctionCFG] = {}
+    inlined = 0
+    for region in order + [f for f in program.functions if f not in order] + [program.main]:
+        if callees[region] and not inlinable.keys().isdisjoint(callees[region]):
+            inlined += _inline_calls(region, program, inlinable)
+        if region in order and _can_inline(region, max_size):
+            inlinable[region.name] = region
+    return inlined
+
+
+def _can_inline(func: FunctionCFG, max_size: int) -> bool:
+    if not func.blocks or _falls_off_end(func):
+        return False
+    size = 0
+    for instr in func.instructions():
+        if instr.op is Op.READ:
+            return False
+        size += 1
+    return size <= max_size
+
+
+def _inline_calls(region: FunctionCFG, program: ProgramCFG, inlinable) -> int:
+    versions: Dict[str, int] = {}
+    def_count: Dict[str, int] = {}  # by original name
+    for instr in region.instructions():
+        if instr.dest is not None:
+            base = base_name(instr.dest)
+            def_count[base] = def_count.get(base, 0) + 1
+    inlined = 0
+    order = []
+    for b in region.blocks:
+        current = b
+        while True:
+            order.append(current)
+            split = _inline_first_call(current, program, inlinable, versions, def_count)
+            if split is None:
+                break
+            clones, current = split
+            order.extend(clones)
+            inlined += 1
+        if current is not b:
+            # The code after the call, with the jump of the block, is in `current`
+            for s in b.succs:
+                for phi in phis(s):
+                    phi.b = [current if p is b else p for p in phi.b]
+    if inlined:
+        region.blocks = order
+        region.renumber()
+        region.link()
+    return inlined
+
+
+def _inline_first_call(block: BasicBlock, program: ProgramCFG, inlinable, versions,
+                       def_count):
+    """Inline the first call of `block` that can be; return `(callee blocks, rest)`.
+
+    `block` keeps the code before the call and falls into the copy of the
+    callee, whose returns jump to a new block with the code after it.
+    """
+    params = []  # positions of the `param`s not yet taken by a call
+    for at, instr in enumerate(block.instrs):
+        if instr.op is Op.PARAM:
+            params.append(at)
+        elif instr.op is Op.CALL:
+            n = instr.a
+            if len(params) < n:
+                params = []
+                continue
+            args_at = params[len(params) - n:]
+            del params[len(params) - n:]
+            callee = inlinable.get(instr.label)
+            if callee is not None:
+                break
+    else:
+        return None
+    call = instr
+    args = [block.instrs[k].a for k in args_at]
+    rest = BasicBlock(-1)
+    rest.instrs = block.instrs[at + 1:]
+    taken = set(args_at)
+    block.instrs = [x for k, x in enumerate(block.instrs[:at]) if k not in taken]
+
+    # Callee names -> fresh temps; its parameters start as copies of the arguments
+    fresh: Dict[str, str] = {}
+    bases: Dict[str, Temp] = {}
+    for instr in callee.instructions():
+        if instr.dest is not None:
+            base = base_name(instr.dest)
+            if base not in bases:
+                bases[base] = program.new_temp()
+            fresh[instr.dest] = new_version(bases[base], versions)
+    entry: Dict[str, object] = {}
+    for k, param in enumerate(callee.params):
+        arg = args[k] if k < len(args) else 0
+        base = base_name(arg) if is_name(arg) else None
+        if (type(arg) is int or type(arg) is Temp
+                or base is not None and def_count.get(base, 0) == (0 if arg == base else 1)):
+            entry[param] = arg
+        else:
+            # A string would be loaded as a variable, and another version of
+            # the variable would interfere: copy the argument
+            copy_of = new_version(program.new_temp(), versions)
+            block.instrs.append(TACInstr(Op.ASSIGN, copy_of, arg))
+            entry[param] = copy_of
+
+    def value(x):
+        if not is_name(x):
+            return x
+        if x in fresh:
+            return fresh[x]
+        return entry.get(x, 0)  # unset in the callee: the VM reads 0
+
+    clones = {b: BasicBlock(-1, None if b.label is None else program.new_label())
+              for b in callee.blocks}
+    labels = {b.label: clones[b].label for b in callee.blocks if b.label is not None}
+    returns = []
+    for b in callee.blocks:
+        instrs = clones[b].instrs
+        for instr in b.instrs:
+            if instr.op is Op.RETURN:
+                returns.append((value(instr.a) if instr.a is not None else 0, clones[b]))
+                instrs.append(TACInstr(Op.GOTO, label=program.label_of(rest)))
+                continue
+            clone = copy.copy(instr)
+            if instr.dest is not None:
+                clone.dest = fresh[instr.dest]
+            if instr.op is Op.PHI:
+                clone.a = [value(x) for x in instr.a]
+                clone.b = [clones[p] for p in instr.b]
+            else:
+                clone.a = value(instr.a)
+                clone.b = value(instr.b)
+                for label in instr.targets():
+                    clone.retarget(label, labels[label])
+            instrs.append(clone)
+    if call.dest is not None:
+        if len(returns) == 1:
+            rest.instrs.insert(0, TACInstr(Op.ASSIGN, call.dest, returns[0][0]))
+        else:
+            rest.instrs.insert(0, TACInstr(Op.PHI, call.dest, [v for v, _ in returns],
+                                           [b for _, b in returns]))
+    return [clones[b] for b in callee.blocks], rest
+
+
+# -- loops ------------------------------------------------------------------------
+
+# Instructions whose effects can be seen (a `read` also prints its prompt)
+_VISIBLE = (Op.PRINT, Op.READ, Op.CALL)
+
+
+def loop_invariant_code_motion(program: ProgramCFG) -> int:
+    """Hoist invariant computations out of the loops of `program` (in SSA form).
+
+    Loops are the natural loops of the CFG, innermost first. A `binop` or
+    `unaryop` that runs in every iteration and whose operands are constants
+    or are defined outside the loop moves to the loop preheader, a block
+    that runs once before the loop is entered (created when the header has
+    no suitable predecessor). On strings some operators raise, so the
+    instruction must not fail earlier than before: either it is in the
+    header ahead of anything visible, or its operands always hold ints.
+    Returns the number of hoisted instructions.
+    """
+    return sum(_hoist_region(region, program) for region in program.regions)
+
+
+def _int_operand(x, ints) -> bool:
+    # A string literal in arithmetic is loaded like a variable, which is 0
+    return type(x) is int or type(x) is StrConst or x in ints
+
+
+def _gives_int(instr: TACInstr, ints) -> bool:
+    op = instr.op
+    if op is Op.READ:
+        return True
+    if op is Op.ASSIGN:
+        return type(instr.a) is int or instr.a in ints
+    if op is Op.BINOP:
+        if instr.oper in _RELATIONAL or instr.oper in ('and', 'or'):
+            return True
+        return (instr.oper in _BINARY and _int_operand(instr.a, ints)
+                and _int_operand(instr.b, ints))
+    if op is Op.UNARYOP:
+        return instr.oper in _UNARY
+    if op is Op.PHI:
+        return all(x in ints for x in instr.a)
+    return False
+
+
+def _int_names(region: FunctionCFG) -> set:
+    """Names of `region` (in SSA form) that can only hold an int."""
+    defs: Dict[str, TACInstr] = {}
+    users: Dict[str, List[TACInstr]] = {}
+    for instr in region.instructions():
+        if instr.dest is not None:
+            defs[instr.dest] = instr
+        for u in instr.uses():
+            users.setdefault(u, []).append(instr)
+    # Optimistic: assume every definition gives an int, then drop the ones
+    # that do not until nothing changes
+    ints = set(defs)
+    work = list(defs)
+    while work:
+        name = work.pop()
+        if name in ints and not _gives_int(defs[name], ints):
+            ints.discard(name)
+            for instr in users.get(name, ()):
+                if instr.dest in ints:
+                    work.append(instr.dest)
+    return ints
+
+
+def _cannot_raise(instr: TACInstr, ints) -> bool:
+    if instr.op is Op.UNARYOP:
+        return instr.oper in _UNARY
+    if instr.oper in ('==', '!=', 'and', 'or'):
+        return True
+    return _int_operand(instr.a, ints) and _int_operand(instr.b, ints)
+
+
+def _hoist_region(region: FunctionCFG, program: ProgramCFG) -> int:
+    if not region.blocks:
+        return 0
+    order = region.compute_dominators()
+    loops = region.natural_loops()
+    if not loops:
+        return 0
+    def_block: Dict[str, BasicBlock] = {}
+    def_count: Dict[str, int] = {}  # by original name
+    for b in region.blocks:
+        for instr in b.instrs:
+            if instr.dest is not None:
+                def_block[instr.dest] = b
+                base = base_name(instr.dest)
+                def_count[base] = def_count.get(base, 0) + 1
+    versions = last_versions(def_block)
+    ints = None
+
+    def invariant(x, loop):
+        return not is_name(x) or def_block.get(x) not in loop.blocks
+
+    def cannot_raise(instr):
+        nonlocal ints
+        if ints is None:
+            ints = _int_names(region)
+        return _cannot_raise(instr, ints)
+
+    position: Dict[BasicBlock, float] = {b: i for i, b in enumerate(order)}
+    hoisted = 0
+    for loop in loops:
+        preheader = None
+        for b in sorted(loop.blocks, key=position.__getitem__):
+            # Only blocks that run in every iteration: hoisting out of a
+            # branch would run the code even when the branch is not taken
+            if not all(b.dominates(latch) for latch in loop.latches):
+                continue
+            ahead = b is loop.header  # nothing visible has run in this iteration
+            kept = []
+            for instr in b.instrs:
+                op = instr.op
+                dest = instr.dest
+                if ((op is Op.BINOP and instr.oper in _BINARY
+                     or op is Op.UNARYOP and instr.oper in _UNARY)
+                        and invariant(instr.a, loop) and invariant(instr.b, loop)
+                        and (ahead or cannot_raise(instr))
+                        # Another version of a variable would interfere
+                        and (type(dest) is Temp or def_count.get(base_name(dest)) == 1)):
+                    if preheader is None:
+                        preheader = _preheader(region, program, loop, loops, versions)
+                        if preheader is None:
+                            break
+                        if preheader not in position:
+                            # Right before the header, for enclosing loops
+                            position[preheader] = position[loop.header] - 0.5
+                    at = len(preheader.instrs) - (preheader.terminator is not None)
+                    preheader.instrs.insert(at, instr)
+                    def_block[dest] = preheader
+                    hoisted += 1
+                    continue
+                if op in _VISIBLE:
+                    ahead = False
+                kept.append(instr)
+            else:
+                b.instrs = kept
+                continue
+            break  # no preheader: leave this loop alone
+    return hoisted
+
+
+def _preheader(region: FunctionCFG, program: ProgramCFG, loop, loops, versions):
+    """The block through which `loop` is entered, created if needed."""
+    header = loop.header
+    outside = [p for p in header.preds if p not in loop.blocks]
+    if not outside:
+        return None
+    if len(outside) == 1 and all(s is header for s in outside[0].succs):
+        return outside[0]
+    preheader = BasicBlock(-1)
+    # To any other block it dominates the same blocks as the header
+    preheader.idom = header.idom
+    preheader.dom_pre = header.dom_pre
+    preheader.dom_post = header.dom_post
+    for p in outside:
+        last = p.terminator
+        if last is not None and header.label in last.targets():
+            last.retarget(header.label, program.label_of(preheader))
+    blocks = region.blocks
+    k = blocks.index(header)
+    before = blocks[k - 1] if k else None
+    if before is not None and before in loop.blocks and before.fallthrough is header:
+        # The place in front of the header is taken by a fallthrough from inside
+        preheader.instrs.append(TACInstr(Op.GOTO, label=program.label_of(header)))
+        blocks.append(preheader)
+    else:
+        blocks.insert(k, preheader)
+    # Header phis get the values from outside through the preheader
+    merged = []
+    for phi in phis(header):
+        entering = [(v, p) for v, p in zip(phi.a, phi.b) if p not in loop.blocks]
+        staying = [(v, p) for v, p in zip(phi.a, phi.b) if p in loop.blocks]
+        if len(entering) == 1:
+            value = entering[0][0]
+        else:
+            value = new_version(phi.dest, versions)
+            merged.append(TACInstr(Op.PHI, value, [v for v, _ in entering],
+                                   [p for _, p in entering]))
+        phi.a = [value] + [v for v, _ in staying]
+        phi.b = [preheader] + [p for _, p in staying]
+    preheader.instrs[:0] = merged
+    region.renumber()
+    region.link()
+    for other in loops:
+        if other is not loop and header in other.blocks:
+            other.blocks.add(preheader)
+    return preheader
+
+
+# -- counted loops ----------------------------------------------------------------
+
+# `a <oper> b` is `b <_SWAPPED[oper]> a`
+_SWAPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!='}
+
+
+def _constant(x, defs) -> Optional[int]:
+    """The int held by operand `x`, if it is a constant or a copy of one."""
+    while is_name(x):
+        instr = defs.get(x)
+        if instr is None or instr.op is not Op.ASSIGN:
+            return None
+        x = instr.a
+    return x if type(x) is int else None
+
+
+def _basic_step(phi: TACInstr, latch: BasicBlock, defs) -> Optional[int]:
+    """Step `c` when `phi` is an induction variable `i = phi(init, i + c)`."""
+    x = phi.a[phi.b.index(latch)]
+    step = 0
+    while x != phi.dest:
+        instr = defs.get(x) if is_name(x) else None
+        if instr is None:
+            return None
+        if instr.op is Op.ASSIGN:
+            x = instr.a
+        elif instr.op is Op.BINOP and instr.oper == '+' and type(instr.b) is int:
+            x, step = instr.a, step + instr.b
+        elif instr.op is Op.BINOP and instr.oper == '+' and type(instr.a) is int:
+            x, step = instr.b, step + instr.a
+        elif instr.op is Op.BINOP and instr.oper == '-' and type(instr.b) is int:
+            x, step = instr.a, step - instr.b
+        else:
+            return None
+    return step or None
+
+
+def _trip_count(start: int, step: int, oper: str, bound: int) -> Optional[int]:
+    """Iterations of `i = start; while i <oper> bound: i = i + step`, None if endless."""
+    if oper == '<=':
+        oper, bound = '<', bound + 1
+    elif oper == '>=':
+        oper, bound = '>', bound - 1
+    if oper == '<':
+        if start >= bound:
+            return 0
+        return -((start - bound) // step) if step > 0 else None
+    if oper == '>':
+        if start <= bound:
+            return 0
+        return -((bound - start) // -step) if step < 0 else None
+    if oper == '!=':
+        distance = bound - start
+        if distance % step == 0 and distance // step >= 0:
+            return distance // step
+        return None
+    if oper == '==':
+        return 1 if start == bound else 0
+    return None
+
+
+class _CountedLoop:
+    """A loop shaped like a `for` with a known trip count."""
+    __slots__ = ('loop', 'preheader', 'latch', 'exit', 'body', 'trips', 'size')
+
+    def __init__(self, loop, preheader, latch, exit, body, trips):
+        self.loop = loop
+        self.preheader = preheader
+        self.latch = latch
+        self.exit = exit
+        self.body = body  # loop blocks but the header, in region order
+        self.trips = trips
+        header = loop.header
+        self.size = len(header.instrs) - len(phis(header)) + sum(len(b.instrs) for b in body)
+
+
+def _counted_loop(loop, defs, position) -> Optional[_CountedLoop]:
+    # The header only tests an induction variable against a constant and is
+    # the only way out; the body is entered from it and jumps back once.
+    header = loop.header
+    if len(loop.latches) != 1 or len(header.preds) != 2:
+        return None
+    latch = loop.latches[0]
+    last = latch.terminator
+    if latch is header or latch.succs != [header] or (last is not None and last.op is not Op.GOTO):
+        return None
+    preheader = header.preds[0] if header.preds[1] is latch else header.preds[1]
+    test = header.terminator
+    if test is None or test.op is not Op.IFGOTO or len(header.succs) != 2:
+        return None
+    if any(instr.op not in _PURE for instr in header.instrs[:-1]):
+        return None
+    target, fallthrough = header.succs
+    if (target in loop.blocks) == (fallthrough in loop.blocks):
+        return None
+    for b in loop.blocks:
+        if b is not header and any(s not in loop.blocks for s in b.succs):
+            return None
+    entry = target if target in loop.blocks else fallthrough
+    if entry.preds != [header] or phis(entry):
+        return None
+    # The loop goes on while `i <oper> bound`
+    oper = test.oper if target is entry else NEGATED.get(test.oper)
+    for phi in phis(header):
+        if test.a == phi.dest:
+            bound = test.b
+            break
+        if test.b == phi.dest:
+            bound, oper = test.a, _SWAPPED.get(oper)
+            break
+    else:
+        return None
+    step = _basic_step(phi, latch, defs)
+    start = _constant(phi.a[phi.b.index(preheader)], defs)
+    bound = _constant(bound, defs)
+    if step is None or start is None or bound is None or oper is None:
+        return None
+    trips = _trip_count(start, step, oper, bound)
+    if trips is None:
+        return None
+    body = sorted(loop.blocks - {header}, key=position.__getitem__)
+    exit = fallthrough if target is entry else target
+    return _CountedLoop(loop, preheader, latch, exit, body, trips)
+
+
+def loop_unrolling(program: ProgramCFG, factor: int = 4, max_growth: int = 64) -> int:
+    """Unroll the counted loops of `program` (in SSA form); return how many.
+
+    A counted loop is what a `for` over an int induction variable becomes:
+    a header without side effects that compares `i = phi(start, i + step)`
+    with a constant (`start` and `step` constants too) and is the only
+    exit, and a body that jumps back once. Its trip count N is known, so
+    when N copies of the body add at most `max_growth` instructions the
+    loop is replaced by them. Otherwise, the body is repeated `factor`
+    times inside the loop, which then tests the condition once every
+    `factor` iterations; the N % `factor` remaining iterations are copied
+    in front of it. Copies run in the original order, so the output does
+    not change. Constant propagation can then fold the copies.
+
+    A whole nest is handled in one call: the enclosing loops are tried
+    again on the unrolled code, and a loop that runs once is unrolled in
+    place (its header test becomes a jump) instead of copying its body.
+    """
+    return sum(_unroll_region(region, program, factor, max_growth)
+               for region in program.regions)
+
+
+def _unroll_region(region: FunctionCFG, program: ProgramCFG, factor, max_growth) -> int:
+    if not region.blocks:
+        return 0
+    region.compute_dominators()
+    loops = region.natural_loops()
+    if not loops:
+        return 0
+    defs: Dict[str, TACInstr] = {}
+    for instr in region.instructions():
+        if instr.dest is not None:
+            defs[instr.dest] = instr
+    versions = last_versions(defs)
+    users = _Users(region.blocks)
+    unrolled = 0
+    while loops:
+        position = {b: i for i, b in enumerate(region.blocks)}
+        layout = _Layout()
+        changed = set()  # blocks of the loops replaced by copies and around them
+        in_place = set()  # blocks of the loops unrolled where they are
+        renamed: Dict[str, object] = {}  # loop names -> their value after the loop
+        inside: Dict[str, set] = {}  # loop names -> the loop, where they keep their value
+        copied = []  # (loop, copies) of the loops replaced by copies
+        stale = set()  # headers of the loops unrolled by `factor`
+        waiting = []
+        for loop in loops:
+            # An enclosing loop waits for the next round, with the new blocks,
+            # unless the loops inside it were unrolled where they are and it
+            # can be too
+            if not changed.isdisjoint(loop.blocks):
+                waiting.append(loop)
+                continue
+            counted = _counted_loop(loop, defs, position)
+            if counted is None:
+                continue
+            trips, size = counted.trips, counted.size
+            if trips == 1:
+                final, values = _unroll_in_place(program, counted, versions, layout)
+                position[final] = position[counted.latch] + 0.5
+                for instr in final.instrs:
+                    if instr.dest is not None:
+                        defs[instr.dest] = instr
+                for outer in loops:
+                    if outer is not loop and loop.header in outer.blocks:
+                        outer.blocks.add(final)
+                in_place.update(loop.blocks)
+                in_place.update((counted.preheader, counted.exit, final))
+            elif not in_place.isdisjoint(loop.blocks):
+                waiting.append(loop)
+                continue
+            elif (trips - 1) * size <= max_growth:
+                values = _unroll_fully(program, counted, versions, layout)
+                copied.append((loop, layout.before[loop.header]))
+                changed.update(loop.blocks)
+                changed.update((counted.preheader, counted.exit))
+            elif 1 < factor <= trips and (factor - 1 + trips % factor) * size <= max_growth:
+                _unroll_by(program, counted, factor, versions, layout)
+                stale.add(loop.header)
+                changed.update(loop.blocks)
+                changed.update((counted.preheader, counted.exit))
+                values = {}
+            else:
+                continue
+            renamed.update(values)
+            for name in values:
+                inside[name] = loop.blocks
+            unrolled += 1
+        if not (changed or in_place):
+            break
+        layout.apply(region)
+        for blocks in list(layout.before.values()) + list(layout.after.values()):
+            users.add(blocks)
+            for b in blocks:
+                for instr in b.instrs:
+                    if instr.dest is not None:
+                        defs[instr.dest] = instr
+        # Code after a loop reads the values of its final test
+        users.rename(renamed, inside)
+        # The waiting loops go on, with the copies in place of the loops
+        # inside them; the CFG is not walked again.
+        loops = []
+        for loop in waiting:
+            if loop.header in layout.dropped or any(h in loop.blocks for h in stale):
+                continue
+            for inner, copies in copied:
+                if inner.header in loop.blocks:
+                    loop.blocks -= inner.blocks
+                    loop.blocks.update(copies)
+            loops.append(loop)
+    return unrolled
+
+
+class _Users:
+    """Where each name is read: `(block, instr)` pairs, kept up to date by hand."""
+
+    def __init__(self, blocks):
+        self.at: Dict[str, list] = {}
+        self.add(blocks)
+
+    def add(self, blocks):
+        at = self.at
+        for b in blocks:
+            for instr in b.instrs:
+                if instr.op is Op.PHI:
+                    for x in instr.a:
+                        if is_name(x):
+                            at.setdefault(x, []).append((b, instr))
+                    continue
+                if is_name(instr.a):
+                    at.setdefault(instr.a, []).append((b, instr))
+                if is_name(instr.b):
+                    at.setdefault(instr.b, []).append((b, instr))
+
+    def rename(self, renamed, inside):
+        """Reads of each renamed name outside `inside[name]` read the new value."""
+        at = self.at
+
+        def final(x):
+            while is_name(x) and x in renamed:
+                x = renamed[x]
+            return x
+
+        for name in renamed:
+            new = final(name)
+            keep = inside[name]
+            for b, instr in at.get(name, ()):
+                if b in keep:
+                    continue
+                if instr.op is Op.PHI:
+                    instr.a = [new if x == name else x for x in instr.a]
+                else:
+                    if instr.a == name:
+                        instr.a = new
+                    if instr.b == name:
+                        instr.b = new
+                if is_name(new):
+                    at.setdefault(new, []).append((b, instr))
+
+
+class _Layout:
+    """Changes to the block order of a region, applied all at once."""
+
+    def __init__(self):
+        self.before: Dict[BasicBlock, List[BasicBlock]] = {}
+        self.after: Dict[BasicBlock, List[BasicBlock]] = {}
+        self.dropped = set()
+
+    def apply(self, region: FunctionCFG):
+        order = []
+        for b in region.blocks:
+            order.extend(self.before.get(b, ()))
+            if b not in self.dropped:
+                order.append(b)
+            order.extend(self.after.get(b, ()))
+        region.blocks = order
+        region.renumber()
+        region.link()
+
+
+def _copy_header(header: BasicBlock, values, versions) -> List[TACInstr]:
+    # The header computations (no phis, no test) with fresh versions
+    instrs = []
+    for instr in header.instrs[len(phis(header)):-1]:
+        clone = copy.copy(instr)
+        if is_name(instr.a):
+            clone.a = values.get(instr.a, instr.a)
+        if is_name(instr.b):
+            clone.b = values.get(instr.b, instr.b)
+        clone.dest = values[instr.dest] = new_version(instr.dest, versions)
+        instrs.append(clone)
+    return instrs
+
+
+def _copy_iteration(counted: _CountedLoop, values, versions, program: ProgramCFG):
+    """Blocks that run one iteration with the header phis set to `values`.
+
+    Returns `(blocks, tail, next_values)`: the first block is the entry,
+    `tail` ends in the goto that leaves the copy (its label is for the caller
+    to set) and `next_values` are the phi values of the following iteration.
+    """
+    loop, latch = counted.loop, counted.latch
+    header = loop.header
+    values = dict(values)
+    head = BasicBlock(-1)
+    head.instrs = _copy_header(header, values, versions)
+    clones = {b: BasicBlock(-1, None if b.label is None else program.new_label())
+              for b in counted.body}
+    for b in counted.body:
+        for instr in b.instrs:
+            if instr.dest is not None:
+                values[instr.dest] = new_version(instr.dest, versions)
+    labels = {b.label: clones[b].label for b in counted.body if b.label is not None}
+
+    def value(x):
+        return values.get(x, x) if is_name(x) else x
+
+    entry = header.succs[0] if header.succs[0] in loop.blocks else header.succs[1]
+    head.instrs.append(TACInstr(Op.GOTO, label=program.label_of(clones[entry])))
+    for b in counted.body:
+        instrs = clones[b].instrs
+        for instr in b.instrs:
+            clone = copy.copy(instr)
+            if instr.dest is not None:
+                clone.dest = values[instr.dest]
+            if instr.op is Op.PHI:
+                clone.a = [value(x) for x in instr.a]
+                clone.b = [clones[p] for p in instr.b]
+            else:
+                clone.a = value(instr.a)
+                clone.b = value(instr.b)
+                for label in instr.targets():
+                    if label in labels:
+                        clone.retarget(label, labels[label])
+            instrs.append(clone)
+    tail = clones[latch]
+    if tail.terminator is None:
+        tail.instrs.append(TACInstr(Op.GOTO))
+    next_values = {phi.dest: value(phi.a[phi.b.index(latch)]) for phi in phis(header)}
+    return [head] + [clones[b] for b in counted.body], tail, next_values
+
+
+def _copy_iterations(counted: _CountedLoop, count: int, values, versions, program):
+    """`count` iterations one after the other: `(blocks, tail, next_values)`."""
+    blocks = []
+    tail = None
+    for _ in range(count):
+        copied, new_tail, values = _copy_iteration(counted, values, versions, program)
+        if tail is not None:
+            tail.instrs[-1].label = program.label_of(copied[0])
+        blocks.extend(copied)
+        tail = new_tail
+    return blocks, tail, values
+
+
+def _enter_from(block: BasicBlock, old: BasicBlock, new: BasicBlock, program: ProgramCFG):
+    # Jumps of `block` to `old` go to `new` (a fallthrough is laid out by the caller)
+    last = block.terminator
+    if last is not None and old.label in last.targets():
+        last.retarget(old.label, program.label_of(new))
+
+
+def _unroll_fully(program: ProgramCFG, counted: _CountedLoop, versions, layout: _Layout):
+    loop, preheader = counted.loop, counted.preheader
+    header = loop.header
+    values = {phi.dest: phi.a[phi.b.index(preheader)] for phi in phis(header)}
+    blocks, tail, values = _copy_iterations(counted, counted.trips, values, versions, program)
+    # The last test, which fails
+    final = BasicBlock(-1)
+    final.instrs = _copy_header(header, values, versions)
+    final.instrs.append(TACInstr(Op.GOTO, label=program.label_of(counted.exit)))
+    if tail is not None:
+        tail.instrs[-1].label = program.label_of(final)
+    blocks.append(final)
+    _enter_from(preheader, header, blocks[0], program)
+    for phi in phis(counted.exit):
+        phi.b = [final if p is header else p for p in phi.b]
+    layout.before[header] = blocks
+    layout.dropped.update(loop.blocks)
+    return values
+
+
+def _unroll_in_place(program: ProgramCFG, counted: _CountedLoop, versions, layout: _Layout):
+    """Unroll a loop that runs once without copying its body.
+
+    Returns `(final, values)`: the block with the last test, which fails,
+    and the names of the header with their value after the loop.
+    """
+    loop, preheader, latch = counted.loop, counted.preheader, counted.latch
+    header = loop.header
+    values = {phi.dest: phi.a[phi.b.index(latch)] for phi in phis(header)}
+    final = BasicBlock(-1, program.new_label())
+    final.instrs = _copy_header(header, values, versions)
+    final.instrs.append(TACInstr(Op.GOTO, label=program.label_of(counted.exit)))
+    # The header runs once, with the phis set to their first value
+    for phi in phis(header):
+        phi.op, phi.a, phi.b = Op.ASSIGN, phi.a[phi.b.index(preheader)], None
+    entry = header.succs[0] if header.succs[0] in loop.blocks else header.succs[1]
+    header.instrs[-1] = TACInstr(Op.GOTO, label=program.label_of(entry))
+    last = latch.terminator
+    if last is None:
+        latch.instrs.append(TACInstr(Op.GOTO))
+        last = latch.instrs[-1]
+    last.label = final.label
+    for phi in phis(counted.exit):
+        phi.b = [final if p is header else p for p in phi.b]
+    # Edges kept up to date: an enclosing loop may be unrolled before `link`
+    exit = counted.exit
+    exit.preds = [final if p is header else p for p in exit.preds]
+    header.preds = [preheader]
+    header.succs = [entry]
+    latch.succs = [final]
+    final.preds = [latch]
+    final.succs = [exit]
+    layout.after[latch] = [final]
+    return final, values
+
+
+def _unroll_by(program: ProgramCFG, counted: _CountedLoop, factor, versions, layout: _Layout):
+    loop, preheader, latch = counted.loop, counted.preheader, counted.latch
+    header = loop.header
+    # The remaining iterations go in front, so the loop runs a multiple of `factor` times
+    front, front_tail, front_values = _copy_iterations(
+        counted, counted.trips % factor,
+        {phi.dest: phi.a[phi.b.index(preheader)] for phi in phis(header)}, versions, program)
+    inside, inside_tail, inside_values = _copy_iterations(
+        counted, factor - 1,
+        {phi.dest: phi.a[phi.b.index(latch)] for phi in phis(header)}, versions, program)
+    inside_tail.instrs[-1].label = program.label_of(header)
+    last = latch.terminator
+    if last is None:
+        latch.instrs.append(TACInstr(Op.GOTO))
+        last = latch.instrs[-1]
+    last.label = program.label_of(inside[0])
+    for phi in phis(header):
+        for k, p in enumerate(phi.b):
+            if p is latch:
+                phi.a[k], phi.b[k] = inside_values[phi.dest], inside_tail
+            elif front:
+                phi.a[k], phi.b[k] = front_values[phi.dest], front_tail
+    if front:
+        front_tail.instrs[-1].label = program.label_of(header)
+        _enter_from(preheader, header, front[0], program)
+    layout.before[header] = front
+    layout.after[latch] = inside
+
+
+# -- induction variables ----------------------------------------------------------
+
+def _sum(x, y):
+    # x + y as one operand (int or name), or None
+    if type(x) is int and type(y) is int:
+        return x + y
+    if type(x) is int and x == 0:
+        return y
+    if type(y) is int and y == 0:
+        return x
+    return None
+
+
+def _product(x, y):
+    # x * y as one operand (int or name), or None
+    if type(x) is int and type(y) is int:
+        return x * y
+    if type(x) is int and x in (0, 1):
+        return y if x else 0
+    if type(y) is int and y in (0, 1):
+        return x if y else 0
+    return None
+
+
+def _negative(x):
+    return -x if type(x) is int else None
+
+
+def _linear(instr: TACInstr, form):
+    """`(m, b)` when `instr` computes `m * i + b` from the forms of its operands."""
+    fa = form(instr.a)
+    fb = form(instr.b)
+    if fa is None or fb is None:
+        return None
+    (ma, ba), (mb, bb) = fa, fb
+    oper = instr.oper
+    if oper == '+':
+        return _sum(ma, mb), _sum(ba, bb)
+    if oper == '-':
+        return _sum(ma, _negative(mb)), _sum(ba, _negative(bb))
+    if oper == '*':
+        # One side must be invariant (m == 0)
+        if type(mb) is int and mb == 0:
+            return _product(ma, bb), _product(ba, bb)
+        if type(ma) is int and ma == 0:
+            return _product(mb, ba), _product(bb, ba)
+    return None
+
+
+def strength_reduction(program: ProgramCFG) -> int:
+    """Rewrite the values of loops that grow linearly with an induction variable.
+
+    For an induction variable `i = phi(init, i + c)` (ints `init` and `c`)
+    of a loop with a single latch, an `+`, `-` or `*` of the loop is linear
+    when its value is `m * i + b`, `m` and `b` being ints or int names
+    defined outside the loop (`i * k`, `2 * i + 1`, `i * 3 - n`...). Each
+    `m` other than 1 gets a new induction variable `j = m * i + b0`, set up
+    in the preheader and increased by `m * c` at the end of the iteration;
+    the linear values that are used elsewhere become `j` or `j + (b - b0)`
+    (`i + b` when `m` is 1) and the operations that only fed them are left
+    to `dead_code_elimination`. A multiplication costs the VM as much as an
+    addition, so a loop is only rewritten when fewer operations are left
+    in each iteration. Returns the number of rewritten loops.
+    """
+    return sum(_reduce_region(region, program) for region in program.regions)
+
+
+def _reduce_region(region: FunctionCFG, program: ProgramCFG) -> int:
+    if not region.blocks:
+        return 0
+    order = region.compute_dominators()
+    loops = region.natural_loops()
+    if not loops:
+        return 0
+    defs: Dict[str, TACInstr] = {}
+    def_block: Dict[str, BasicBlock] = {}
+    users: Dict[str, List[Tuple[TACInstr, BasicBlock]]] = {}
+    for b in region.blocks:
+        for instr in b.instrs:
+            if instr.dest is not None:
+                defs[instr.dest] = instr
+                def_block[instr.dest] = b
+            for u in instr.uses():
+                users.setdefault(u, []).append((instr, b))
+    versions = last_versions(defs)
+    innermost: Dict[BasicBlock, object] = {}
+    for loop in loops:
+        for b in loop.blocks:
+            innermost.setdefault(b, loop)
+    position = {b: i for i, b in enumerate(order)}
+    ints = None
+    reduced = 0
+    for loop in loops:
+        header = loop.header
+        if len(loop.latches) != 1 or len(header.preds) != 2:
+            continue
+        latch = loop.latches[0]
+        if latch is header:
+            continue
+        # Each iteration runs the blocks of this loop once at most (inner
+        # loops are left to their own induction variables)
+        blocks = sorted((b for b in loop.blocks if innermost.get(b) is loop),
+                        key=position.__getitem__)
+        for phi in phis(header):
+            if _basic_step(phi, latch, defs) is None:
+                continue
+            if ints is None:
+                ints = _int_names(region)
+            if phi.dest not in ints:
+                continue
+            if _reduce_loop(region, program, loop, loops, phi, blocks, def_block,
+                            users, ints, versions, defs):
+                reduced += 1
+                break
+    return reduced
+
+
+def _reduce_loop(region, program, loop, loops, phi, blocks, def_block, users, ints,
+                 versions, defs) -> bool:
+    latch = loop.latches[0]
+    step = _basic_step(phi, latch, defs)
+
+    forms = {phi.dest: (1, 0)}
+
+    def form(x):
+        if type(x) is int:
+            return 0, x
+        if x in forms:
+            return forms[x]
+        if is_name(x) and x in ints and def_block.get(x) not in loop.blocks:
+            return 0, x
+        return None
+
+    members: List[Tuple[TACInstr, BasicBlock, tuple]] = []
+    for b in blocks:
+        for instr in b.instrs:
+            if instr.op is Op.ASSIGN and is_name(instr.a) and instr.a in forms:
+                forms[instr.dest] = forms[instr.a]
+            elif instr.op is Op.BINOP and instr.oper in ('+', '-', '*'):
+                linear = _linear(instr, form)
+                if linear is None or None in linear:
+                    continue
+                m, _ = linear
+                if type(m) is int and m == 0:
+                    continue  # invariant
+                forms[instr.dest] = linear
+                members.append((instr, b, linear))
+    if not members:
+        return False
+    member_instrs = {instr for instr, _, _ in members}
+    exposed: Dict[str, bool] = {}
+
+    def used_elsewhere(name):
+        # Read by something other than linear values and copies of them
+        if name not in exposed:
+            exposed[name] = False
+            exposed[name] = any(
+                user not in member_instrs
+                and not (user.op is Op.ASSIGN and user.dest in forms
+                         and not used_elsewhere(user.dest))
+                for user, _ in users.get(name, ()))
+        return exposed[name]
+
+    # Operations left per iteration, before and after (blocks that do not
+    # always run are only counted when they get cheaper)
+    before = after = 0
+    bases = {}  # m -> b0 of its new induction variable
+    plan = []
+    last = latch.terminator
+    for instr, b, (m, bm) in members:
+        weight = 1 if b.dominates(latch) else 0
+        before += 4 * weight
+        if not used_elsewhere(instr.dest):
+            continue  # only feeds other linear values
+        uses = users.get(instr.dest, ())
+        if type(m) is int and m == 1:
+            b0 = 0
+        else:
+            if m not in bases:
+                bases[m] = bm
+                after += 4
+            b0 = bases[m]
+        delta = _sum(bm, _negative(b0))
+        if delta is None:
+            return False
+        if type(delta) is int and delta == 0:
+            substitute = (type(instr.dest) is Temp and not (type(m) is int and m == 1)
+                          and all(ub in loop.blocks and user.op is not Op.PHI
+                                  and user is not last for user, ub in uses))
+            after += weight * (0 if substitute else 2)
+        else:
+            substitute = False
+            after += weight * 4
+        plan.append((instr, m, delta, substitute))
+    if after >= before:
+        return False
+    preheader = None
+    if bases:
+        preheader = _preheader(region, program, loop, loops, versions)
+        if preheader is None:
+            return False
+
+    # New induction variables, set up in the preheader
+    start = None
+    if preheader is not None:
+        start = phi.a[phi.b.index(preheader)]
+        known = _constant(start, defs)
+        if known is not None:
+            start = known
+    setup = []
+
+    def compute(oper, x, y):
+        folded = (_sum if oper == '+' else _product)(x, y)
+        if folded is not None:
+            return folded
+        t = program.new_temp()
+        if oper == '+' and type(y) is int and y < 0:
+            setup.append(TACInstr(Op.BINOP, t, x, -y, '-'))
+        else:
+            setup.append(TACInstr(Op.BINOP, t, x, y, oper))
+        return t
+
+    variables = {}
+    for m, b0 in bases.items():
+        base = program.new_temp()
+        current, following = new_version(base, versions), new_version(base, versions)
+        init = compute('+', compute('*', start, m), b0)
+        header_phi = TACInstr(Op.PHI, current, [init, following], [preheader, latch])
+        loop.header.instrs.insert(0, header_phi)
+        update = TACInstr(Op.BINOP, following, current, compute('*', m, step), '+')
+        latch.instrs.insert(len(latch.instrs) - (last is not None), update)
+        variables[m] = current
+    if setup:
+        at = len(preheader.instrs) - (preheader.terminator is not None)
+        preheader.instrs[at:at] = setup
+
+    for instr, m, delta, substitute in plan:
+        value = phi.dest if type(m) is int and m == 1 else variables[m]
+        if substitute:
+            for user, _ in users[instr.dest]:
+                if user.a == instr.dest and is_name(user.a):
+                    user.a = value
+                if user.b == instr.dest and is_name(user.b):
+                    user.b = value
+        elif type(delta) is int and delta == 0:
+            instr.op, instr.a, instr.b, instr.oper = Op.ASSIGN, value, None, None
+        elif type(delta) is int and delta < 0:
+            instr.a, instr.b, instr.oper = value, -delta, '-'
+        else:
+            instr.a, instr.b, instr.oper = value, delta, '+'
+    return True
+
+
+# -- copies -----------------------------------------------------------------------
+
+# Definitions that can write straight into the target of a copy of their value
+_RETARGETABLE = (Op.ASSIGN, Op.BINOP, Op.UNARYOP, Op.CALL)
+
+
+def copy_propagation(program: ProgramCFG) -> int:
+    """Remove copies from `program`, which must be in SSA form; return how many.
+
+    `t = <expr>` followed in the same block by `x = t`, the only use of the
+    temp, becomes `x = <expr>` (`<expr>` may be a `call`). Uses of the
+    target of any other copy read its source instead (in every instruction,
+    `param` and phis included), which leaves the copy to
+    `dead_code_elimination`. A copy is only propagated when its source is
+    the one version of its variable, so that from_ssa does not need new
+    copies to keep versions apart.
+    """
+    return sum(_propagate_copies(region) for region in program.regions)
+
+
+def _propagate_copies(region: FunctionCFG) -> int:
+    use_count: Dict[str, int] = {}
+    def_count: Dict[str, int] = {}  # by original name
+    for instr in region.instructions():
+        for u in instr.uses():
+            use_count[u] = use_count.get(u, 0) + 1
+        if instr.dest is not None:
+            base = base_name(instr.dest)
+            def_count[base] = def_count.get(base, 0) + 1
+    rewritten = 0
+
+    # Definitions of single-use temps take the target of their copy
+    for b in region.blocks:
+        kept = []
+        temp_defs: Dict[str, int] = {}  # temp -> position in `kept`
+        for instr in b.instrs:
+            src = instr.a
+            if (instr.op is Op.ASSIGN and type(src) is Temp and use_count.get(src) == 1
+                    and src in temp_defs):
+                k = temp_defs.pop(src)
+                target = base_name(instr.dest)
+                # Nothing in between may touch another version of the target
+                if all(not _touches(i, target) for i in kept[k + 1:]):
+                    kept[k].dest = instr.dest
+                    rewritten += 1
+                    continue
+            if type(instr.dest) is Temp and instr.op in _RETARGETABLE:
+                temp_defs[instr.dest] = len(kept)
+            kept.append(instr)
+        b.instrs = kept
+
+    # Uses of the remaining copies read the source
+    source: Dict[str, str] = {}
+    for instr in region.instructions():
+        src = instr.a
+        if instr.op is Op.ASSIGN and is_name(src):
+            base = base_name(src)
+            if def_count.get(base, 0) == (0 if src == base else 1):
+                source[instr.dest] = src
+
+    def resolve(x):
+        while x in source:
+            x = source[x]
+        return x
+
+    if source:
+        for instr in region.instructions():
+            if instr.op is Op.PHI:
+                if any(x in source for x in instr.a):
+                    instr.a = [resolve(x) if x in source else x for x in instr.a]
+                    rewritten += 1
+                continue
+            changed = False
+            if instr.a in source and is_name(instr.a):
+                instr.a = resolve(instr.a)
+                changed = True
+            if instr.b in source and is_name(instr.b):
+                instr.b = resolve(instr.b)
+                changed = True
+            if changed:
+                rewritten += 1
+    return rewritten
+
+
+def _touches(instr: TACInstr, base: str) -> bool:
+    # Defines or uses some version of the variable `base`
+    if instr.dest is not None and base_name(instr.dest) == base:
+        return True
+    return any(base_name(u) == base for u in instr.uses())
+
+
+# -- dead code --------------------------------------------------------------------
+
+# Instructions without side effects, removable when their value is not used
+_PURE = (Op.ASSIGN, Op.BINOP, Op.UNARYOP, Op.PHI)
+
+
+def dead_code_elimination(program: ProgramCFG) -> int:
+    """Remove code that has no effect; return the number of removed TAC lines.
+
+    Drops the blocks that cannot be reached, the assigns and operations whose
+    value is never used, jumps to the next block and labels no jump goes to.
+    `print`, `read`, `call`, `param` and `return` always stay. Works in SSA
+    and in regular form (where a variable keeps all its definitions as long
+    as one use is left).
+    """
+    return sum(_remove_dead_code(region) for region in program.regions)
+
+
+def _falls_off_end(region: FunctionCFG) -> bool:
+    for b in region.blocks:
+        last = b.terminator
+        if b.fallthrough is None and (last is None or last.op is Op.IFGOTO):
+            return True
+    return False
+
+
+def _remove_dead_code(region: FunctionCFG) -> int:
+    if not region.blocks:
+        return 0
+    before = sum(len(b.instrs) + (b.label is not None) for b in region.blocks)
+    region.remove_unreachable()
+    blocks = region.blocks
+
+    # Jumps to the block that follows anyway (an ifgoto or a switch has no
+    # side effects)
+    for b, nxt in zip(blocks, blocks[1:]):
+        last = b.terminator
+        if last is not None and last.op is not Op.RETURN and all(
+                label == nxt.label for label in last.targets()):
+            b.instrs.pop()
+    region.link()
+
+    # A function that can fall off its end runs into the code after it with
+    # its variables still set, so there any variable may be read later.
+    keep_vars = region.name is not None and _falls_off_end(region)
+    defs: Dict[str, List[TACInstr]] = {}
+    work = []
+    for b in blocks:
+        for instr in b.instrs:
+            if instr.op in _PURE and not (keep_vars and type(instr.dest) is Var):
+                defs.setdefault(instr.dest, []).append(instr)
+            else:
+                work.extend(instr.uses())
+    used = set()
+    while work:
+        name = work.pop()
+        if name not in used:
+            used.add(name)
+            for instr in defs.get(name, ()):
+                work.extend(instr.uses())
+    for b in blocks:
+        b.instrs = [instr for instr in b.instrs
+                    if instr.op not in _PURE or instr.dest in used or instr.dest not in defs]
+
+    targets = set()
+    for b in blocks:
+        last = b.terminator
+        if last is not None:
+            targets.update(last.targets())
+    for b in blocks:
+        if b.label not in targets:
+            b.label = None
+    return before - sum(len(b.instrs) + (b.label is not None) for b in blocks)
+
+
+# -- jumps ------------------------------------------------------------------------
+
+def loop_rotation(program: ProgramCFG, max_header: int = 8) -> int:
+    """Test the condition of loops at their end; return how many loops changed.
+
+    `program` must be in regular form (after `from_ssa`). A loop whose
+    header ends in an `ifgoto` out of the loop and whose only latch jumps
+    back to it gets a copy of the header at the end of the latch, with the
+    jump going back into the body. Each iteration then runs one conditional
+    jump instead of the test plus the jump back to the header, which is
+    left as the test before the first iteration. Headers with more than
+    `max_header` other instructions are not copied.
+    """
+    return sum(_rotate_loops(region, program, max_header) for region in program.regions)
+
+
+def _rotate_loops(region: FunctionCFG, program: ProgramCFG, max_header) -> int:
+    if not region.blocks:
+        return 0
+    region.compute_dominators()
+    exits: Dict[int, BasicBlock] = {}  # latch index -> block it must now fall into
+    for loop in region.natural_loops():
+        header = loop.header
+        test = header.terminator
+        if (len(loop.latches) != 1 or test is None or test.op is not Op.IFGOTO
+                or len(header.succs) != 2 or len(header.instrs) - 1 > max_header):
+            continue
+        latch = loop.latches[0]
+        last = latch.terminator
+        if latch is header or latch.succs != [header] or (last is not None and last.op is not Op.GOTO):
+            continue
+        target, fallthrough = header.succs
+        if (target in loop.blocks) == (fallthrough in loop.blocks):
+            continue
+        if target in loop.blocks:
+            entry, exit, oper = target, fallthrough, test.oper
+        else:
+            entry, exit, oper = fallthrough, target, NEGATED[test.oper]
+        if last is not None:
+            latch.instrs.pop()
+        latch.instrs.extend(copy.copy(instr) for instr in header.instrs[:-1])
+        latch.instrs.append(TACInstr(Op.IFGOTO, None, test.a, test.b, oper,
+                                     program.label_of(entry)))
+        exits[latch.index] = exit
+    if not exits:
+        return 0
+    blocks = []
+    for i, b in enumerate(region.blocks):
+        blocks.append(b)
+        exit = exits.get(i)
+        if exit is not None and (i + 1 == len(region.blocks) or region.blocks[i + 1] is not exit):
+            jump = BasicBlock(-1)
+            jump.instrs.append(TACInstr(Op.GOTO, label=program.label_of(exit)))
+            blocks.append(jump)
+    region.blocks = blocks
+    region.renumber()
+    region.link()
+    return len(exits)
+
+
+def jump_threading(program: ProgramCFG) -> int:
+    """Send jumps that land on another jump to its destination; return how many.
+
+    `program` must be in regular form (after `from_ssa`). A jump or a
+    fallthrough into a block that only holds a `goto` goes to its target
+    instead. A `goto` or fallthrough into a block that only holds an
+    `ifgoto` (or a `switch`) goes straight to the side the test takes, when
+    the block before it ends by assigning int constants to the operands (as
+    the code before a loop does). Each case of a `switch` is threaded like a
+    jump.
+    """
+    return sum(_thread_jumps(region, program) for region in program.regions)
+
+
+def _known_value(x, block: BasicBlock):
+    # Value of `x` at the end of `block` (before its jump), if a constant
+    if type(x) is int:
+        return x
+    if not is_name(x):
+        return None
+    for instr in reversed(block.instrs):
+        if instr.dest == x:
+            return instr.a if instr.op is Op.ASSIGN and type(instr.a) is int else None
+    return None
+
+
+def _jump_destination(b: BasicBlock, target: BasicBlock, unconditional: bool):
+    # Where a jump from `b` to `target` can go instead, or None
+    only = target.instrs[0] if len(target.instrs) == 1 else None
+    if only is None or target is b:
+        return None
+    if only.op is Op.GOTO:
+        return target.succs[0]
+    if only.op is Op.IFGOTO and unconditional and len(target.succs) == 2:
+        a, c = _known_value(only.a, b), _known_value(only.b, b)
+        if a is not None and c is not None:
+            return target.succs[0] if fold_binop(only.oper, a, c) else target.succs[1]
+    if only.op is Op.SWITCH and unconditional:
+        a = _known_value(only.a, b)
+        if a is not None:
+            label = dict(only.b).get(a, only.label)
+            return next(s for s in target.succs if s.label == label)
+    return None
+
+
+def _thread_switch(b: BasicBlock, switch: TACInstr, program: ProgramCFG, limit: int) -> int:
+    # Each target of the switch of `b` that lands on a goto goes to its destination
+    threaded = 0
+    blocks = {s.label: s for s in b.succs}
+    for label in dict.fromkeys(switch.targets()):
+        target = blocks[label]
+        for _ in range(limit):
+            dest = _jump_destination(b, target, False)
+            if dest is None or dest is target:
+                break
+            target = dest
+        if target is not blocks[label]:
+            switch.retarget(label, program.label_of(target))
+            threaded += 1
+    return threaded
+
+
+def _thread_jumps(region: FunctionCFG, program: ProgramCFG) -> int:
+    threaded = 0
+    for b in region.blocks:
+        last = b.terminator
+        if last is not None and last.op is Op.SWITCH:
+            threaded += _thread_switch(b, last, program, len(region.blocks))
+            continue
+        for _ in range(len(region.blocks)):  # at most once through every block
+            last = b.terminator
+            if last is not None and last.op is Op.RETURN:
+                break
+            if last is None:
+                if not b.succs:
+                    break
+                target = b.succs[0]
+            elif last.op is Op.GOTO:
+                target = b.succs[0]
+            else:
+                target = b.succs[0]  # the jump side of an ifgoto
+            unconditional = last is None or last.op is Op.GOTO
+            dest = _jump_destination(b, target, unconditional)
+            if dest is None or dest is target:
+                break
+            if last is None:
+                b.instrs.append(TACInstr(Op.GOTO, label=program.label_of(dest)))
+            else:
+                last.label = program.label_of(dest)
+            if unconditional:
+                b.succs = [dest]
+            else:
+                b.succs[0] = dest
+            threaded += 1
+    if threaded:
+        region.link()
+        region.remove_unreachable()
+    return threaded
+
+
+# -- pass manager -----------------------------------------------------------------
+
+# Passes by name; each takes a `ProgramCFG` and returns how many changes it
+# made (0 when it left the program as it was). They work in SSA form, except
+# those in _REGULAR_FORM, which go after the `from_ssa` step of a pipeline
+# (dead_code_elimination works in both).
+PASSES: Dict[str, Callable[[ProgramCFG], int]] = {
+    'tail_call_elimination': tail_call_elimination,
+    'inline_functions': inline_functions,
+    'constant_propagation': constant_propagation,
+    'loop_unrolling': loop_unrolling,
+    'full_unrolling': functools.partial(loop_unrolling, factor=1),
+    'loop_invariant_code_motion': loop_invariant_code_motion,
+    'value_numbering': value_numbering,
+    'strength_reduction': strength_reduction,
+    'copy_propagation': copy_propagation,
+    'dead_code_elimination': dead_code_elimination,
+    'loop_rotation': loop_rotation,
+    'jump_threading': jump_threading,
+}
+
+_REGULAR_FORM = ('loop_rotation', 'jump_threading')
+
+# Pipeline of each optimization level: pass names, tuples of names that run
+# again and again until none of them changes anything, and the point where
+# the program leaves SSA form ('from_ssa', at the end if missing). -O0 only
+# runs `constant_folding` over the TAC list, as the compiler always did; -O1
+# does the scalar cleanups and the jump layout; -O2 also transforms calls
+# and loops, at the price of compile time and code size.
+_LAYOUT = ['from_ssa', 'loop_rotation', 'jump_threading', 'dead_code_elimination']
+
+PIPELINES: Dict[int, list] = {
+    0: [],
+    1: [('constant_propagation', 'value_numbering', 'copy_propagation',
+         'dead_code_elimination')] + _LAYOUT,
+    2: ['tail_call_elimination', 'inline_functions',
+        'constant_propagation', 'dead_code_elimination',
+        'loop_unrolling',
+        # then the loops whose bounds only fold after that
+        ('full_unrolling', 'constant_propagation', 'dead_code_elimination'),
+        'loop_invariant_code_motion', 'value_numbering', 'strength_reduction',
+        'copy_propagation', 'dead_code_elimination'] + _LAYOUT,
+}
+
+# Level of the compiler's -O flag when it is not given. Some passes of -O1
+# and -O2 (loop_rotation, for one) are not linear in the nesting depth yet,
+# so by default a deeply nested program only gets the folding it always got.
+DEFAULT_LEVEL = 0
+
+
+class PassStats:
+    """What one pass did over a whole pipeline run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.seconds = 0.0
+        self.changes = 0   # as counted by the pass
+        self.removed = 0   # TAC lines; negative when the pass adds code
+        self.capped = 0    # groups cut off by max_rounds while still changing
+
+    def __repr__(self) -> str:
+        return (f"PassStats({self.name}, runs={self.runs}, changes={self.changes}, "
+                f"removed={self.removed}, capped={self.capped}, "
+                f"{self.seconds * 1e3:.2f} ms)")
+
+
+def _size(program: ProgramCFG) -> int:
+    return sum(len(b.instrs) for region in program.regions for b in region.blocks)
+
+
+class PassManager:
+    """Runs a pipeline (see `PIPELINES`) and keeps a `PassStats` per pass.
+
+    Groups of passes (tuples) are repeated until a whole round changes
+    nothing, at most `max_rounds` times; a group that is still changing
+    when it hits the cap bumps `capped` in the stats of its passes and is
+    listed by `report`. The CFG construction and the way in and out of SSA
+    are timed as well, so `stats` shows the whole cost of `run`.
+    """
+
+    def __init__(self, pipeline, max_rounds: int = 100):
+        in_ssa = True
+        for step in pipeline:
+            if step == 'from_ssa':
+                in_ssa = False
+                continue
+            for name in (step if isinstance(step, tuple) else (step,)):
+                if name not in PASSES:
+                    raise ValueError(f"unknown optimization pass: {name}")
+                if in_ssa and name in _REGULAR_FORM:
+                    raise ValueError(f"{name} must come after from_ssa")
+                if not in_ssa and name not in _REGULAR_FORM and name != 'dead_code_elimination':
+                    raise ValueError(f"{name} must come before from_ssa")
+        self.pipeline = list(pipeline)
+        self.max_rounds = max_rounds
+        self.stats: Dict[str, PassStats] = {}
+
+    def run(self, tac_list: List[TACInstr]) -> List[TACInstr]:
+        """Optimized copy of `tac_list` (only folded, for an empty pipeline)."""
+        if not self.pipeline:
+            return self._timed('constant_folding', constant_folding, tac_list)
+        program = self._timed('build_cfg', build_cfg, [copy.copy(instr) for instr in tac_list])
+        self._timed('to_ssa', to_ssa, program)
+        in_ssa = True
+        for step in self.pipeline:
+            if step == 'from_ssa':
+                self._timed('from_ssa', from_ssa, program)
+                in_ssa = False
+            elif isinstance(step, tuple):
+                for _ in range(self.max_rounds):
+                    if not sum([self._run_pass(name, program) for name in step]):
+                        break
+                else:
+                    for name in step:
+                        self.stats[name].capped += 1
+            else:
+                self._run_pass(step, program)
+        if in_ssa:
+            self._timed('from_ssa', from_ssa, program)
+        return self._timed('linearize', program.linearize)
+
+    def _stats(self, name: str) -> PassStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PassStats(name)
+        return stats
+
+    def _timed(self, name: str, fn, *args):
+        stats = self._stats(name)
+        start = time.perf_counter()
+        result = fn(*args)
+        stats.seconds += time.perf_counter() - start
+        stats.runs += 1
+        return result
+
+    def _run_pass(self, name: str, program: ProgramCFG) -> int:
+        before = _size(program)
+        changes = self._timed(name, PASSES[name], program)
+        stats = self.stats[name]
+        stats.changes += changes
+        stats.removed += before - _size(program)
+        return changes
+
+    def report(self) -> List[str]:
+        """The statistics as table lines, in the order the passes first ran."""
+        lines = [f"{'pass':28} {'runs':>4} {'ms':>9} {'changes':>8} {'removed':>8}"]
+        for stats in self.stats.values():
+            lines.append(f"{stats.name:28} {stats.runs:4} {stats.seconds * 1e3:9.2f} "
+                         f"{stats.changes:8} {stats.removed:8}")
+        total = sum(stats.seconds for stats in self.stats.values())
+        lines.append(f"{'total':28} {'':4} {total * 1e3:9.2f}")
+        capped = [stats.name for stats in self.stats.values() if stats.capped]
+        if capped:
+            lines.append(f"still changing after {self.max_rounds} rounds: "
+                         f"{', '.join(capped)}")
+        return lines
+
+
+def optimize(tac_list: List[TACInstr], level: int = 2) -> List[TACInstr]:
+    """Optimized copy of `tac_list` with the pipeline of `level` (0, 1 or 2)."""
+    if level not in PIPELINES:
+        raise ValueError(f"unknown optimization level: {level}")
+    return PassManager(PIPELINES[level]).run(tac_list)
@@ -1,47 +1,93 @@
 """Parser recursivo descendente para MiniLang.
 
 Construye el AST definido en `ast_nodes.py`.
+`Parser` trabaja sobre una lista de tokens; `StreamParser` consume un iterador
+(p. ej. `lexer.iter_tokens`) con un pequeño búfer de anticipación, y
+`CompactParser` lee un `TokenStream` (`lexer.tokenize_compact`) directamente
+de sus arrays, sin crear un `Token` por token.
 """
-from typing import List
-from .tokens import Token, TokenType
+import weakref
+from collections import deque
+from typing import Iterable, List
+from .tokens import _TYPES_BY_CODE, Token, TokenStream, TokenType
 from . import ast_nodes
+from .visitor import trampoline
 
 
 class ParserError(Exception):
     pass
 
 
+# Binding powers for the operator-precedence expression engine (higher binds
+# tighter). Relational operators are non-associative, as in `parse_relational`.
+_OR_BP, _AND_BP, _NOT_BP, _REL_BP, _ADD_BP, _MUL_BP, _ATOM = 10, 20, 25, 30, 40, 50, 100
+_BINARY_BP = {
+    TokenType.OR: _OR_BP,
+    TokenType.AND: _AND_BP,
+    TokenType.LT: _REL_BP,
+    TokenType.GT: _REL_BP,
+    TokenType.LE: _REL_BP,
+    TokenType.GE: _REL_BP,
+    TokenType.EQ: _REL_BP,
+    TokenType.NE: _REL_BP,
+    TokenType.PLUS: _ADD_BP,
+    TokenType.MINUS: _ADD_BP,
+    TokenType.MUL: _MUL_BP,
+    TokenType.DIV: _MUL_BP,
+    TokenType.MOD: _MUL_BP,
+}
+
+# Operator-stack frame kinds used by `parse_expr_pratt`.
+_BINARY, _PREFIX, _PAREN, _CALL = range(4)
+
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], expr_engine: str = "pratt"):
         self.tokens = tokens
         self.pos = 0
-        self.current = tokens[0]
+        self._set_current(tokens[0])
+        # "pratt": operator-precedence engine; "chain": one method per precedence level
+        self.expr_engine = expr_engine
+
+    def _set_current(self, tok: Token):
+        # The hot paths only read the type and value of the current token
+        self.current = tok
+        self.current_type = tok.type
+        self.current_value = tok.value
 
     def advance(self):
         self.pos += 1
         if self.pos < len(self.tokens):
-            self.current = self.tokens[self.pos]
+            self._set_current(self.tokens[self.pos])
         else:
-            self.current = Token(TokenType.EOF, None, -1, -1)
+            self._set_current(Token(TokenType.EOF, None, -1, -1))
+
+    def peek(self, offset: int = 1) -> Token:
+        """Return the token `offset` positions after the current one."""
+        idx = self.pos + offset
+        if idx < len(self.tokens):
+            return self.tokens[idx]
+        return Token(TokenType.EOF, None, -1, -1)
 
     def expect(self, ttype: TokenType):
-        if self.current.type == ttype:
-            tok = self.current
+        """Consume a token of type `ttype` and return its value."""
+        if self.current_type == ttype:
+            value = self.current_value
             self.advance()
-            return tok
-        raise ParserError(f"Expected {ttype.name} at {self.current.line}:{self.current.column}, got {self.current.type.name}")
+            return value
+        raise ParserError(f"Expected {ttype.name} at {self.current.line}:{self.current.column}, got {self.current_type.name}")
 
     def parse(self) -> ast_nodes.Program:
         functions = []
         stmts = []
         # Parse function definitions first
-        while self.current.type == TokenType.DEF:
+        while self.current_type == TokenType.DEF:
             functions.append(self.parse_func_def())
         # Then parse main program statements
-        while self.current.type != TokenType.END and self.current.type != TokenType.EOF:
+        while self.current_type != TokenType.END and self.current_type != TokenType.EOF:
             stmts.append(self.parse_stmt())
         # consume 'end'
-        if self.current.type == TokenType.END:
+        if self.current_type == TokenType.END:
             self.advance()
         else:
             raise ParserError(f"Expected 'end' at {self.current.line}:{self.current.column}")
@@ -51,51 +97,69 @@ class Parser:
     def parse_func_def(self):
         # def name(param1, param2, ...) { body }
         self.expect(TokenType.DEF)
-        name = self.expect(TokenType.IDENT).value
+        name = self.expect(TokenType.IDENT)
         self.expect(TokenType.LPAREN)
         params = []
-        if self.current.type != TokenType.RPAREN:
-            params.append(self.expect(TokenType.IDENT).value)
-            while self.current.type == TokenType.COMMA:
+        if self.current_type != TokenType.RPAREN:
+            params.append(self.expect(TokenType.IDENT))
+            while self.current_type == TokenType.COMMA:
                 self.advance()
-                params.append(self.expect(TokenType.IDENT).value)
+                params.append(self.expect(TokenType.IDENT))
         self.expect(TokenType.RPAREN)
         self.expect(TokenType.LBRACE)
         body = []
-        while self.current.type != TokenType.RBRACE and self.current.type != TokenType.EOF:
+        while self.current_type != TokenType.RBRACE and self.current_type != TokenType.EOF:
             body.append(self.parse_stmt())
         self.expect(TokenType.RBRACE)
         return ast_nodes.FuncDef(name=name, params=params, body=body)
 
+    # Statements are parsed by generators driven by `trampoline`: a nested
+    # block is parsed with `yield self._parse_block(stmts)` instead of a
+    # recursive call, so nesting depth is not bounded by the Python call
+    # stack. Each handler appends what it parsed to the list it is given.
     def parse_stmt(self):
-        ct = self.current.type
+        out = []
+        trampoline(self._parse_stmt(out))
+        return out[0]
+
+    def parse_block(self):
+        stmts = []
+        trampoline(self._parse_block(stmts))
+        return stmts
+
+    def _parse_stmt(self, out):
+        ct = self.current_type
         if ct == TokenType.READ:
             self.advance()
-            ident = self.expect(TokenType.IDENT)
+            name = self.expect(TokenType.IDENT)
             self.expect(TokenType.SEMI)
-            return ast_nodes.Read(var=ident.value)
+            out.append(ast_nodes.Read(var=name))
+            return
 
         if ct == TokenType.PRINT:
             self.advance()
             expr = self.parse_expr()
             self.expect(TokenType.SEMI)
-            return ast_nodes.Print(expr=expr)
+            out.append(ast_nodes.Print(expr=expr))
+            return
 
         if ct == TokenType.RETURN:
             self.advance()
             expr = self.parse_expr()
             self.expect(TokenType.SEMI)
-            return ast_nodes.Return(expr=expr)
+            out.append(ast_nodes.Return(expr=expr))
+            return
 
         if ct == TokenType.IDENT:
-            ident = self.current
+            target = self.current_value
             self.advance()
             # assignment
-            if self.current.type == TokenType.ASSIGN:
+            if self.current_type == TokenType.ASSIGN:
                 self.advance()
                 expr = self.parse_expr()
                 self.expect(TokenType.SEMI)
-                return ast_nodes.Assign(target=ident.value, expr=expr)
+                out.append(ast_nodes.Assign(target=target, expr=expr))
+                return
             else:
                 raise ParserError(f"Unexpected token after identifier at {self.current.line}:{self.current.column}")
 
@@ -103,107 +167,229 @@ class Parser:
             self.advance()
             cond = self.parse_expr()
             self.expect(TokenType.LBRACE)
-            then_block = self.parse_block()
+            then_block = []
+            yield self._parse_block(then_block)
             # Parse elif blocks
             elif_blocks = []
-            while self.current.type == TokenType.ELIF:
+            while self.current_type == TokenType.ELIF:
                 self.advance()
                 elif_cond = self.parse_expr()
                 self.expect(TokenType.LBRACE)
-                elif_body = self.parse_block()
-                elif_blocks.append((elif_cond, elif_body))
+                elif_body = []
+                yield self._parse_block(elif_body)
+                elif_blocks.append(ast_nodes.ElifBlock(cond=elif_cond, body=elif_body))
             # Parse else block
             else_block = None
-            if self.current.type == TokenType.ELSE:
+            if self.current_type == TokenType.ELSE:
                 self.advance()
                 self.expect(TokenType.LBRACE)
-                else_block = self.parse_block()
-            return ast_nodes.If(cond=cond, then_block=then_block, elif_blocks=elif_blocks, else_block=else_block)
+                else_block = []
+                yield self._parse_block(else_block)
+            out.append(ast_nodes.If(cond=cond, then_block=then_block, elif_blocks=elif_blocks, else_block=else_block))
+            return
 
         if ct == TokenType.WHILE:
             self.advance()
             cond = self.parse_expr()
             self.expect(TokenType.LBRACE)
-            body = self.parse_block()
-            return ast_nodes.While(cond=cond, body=body)
+            body = []
+            yield self._parse_block(body)
+            out.append(ast_nodes.While(cond=cond, body=body))
+            return
 
         if ct == TokenType.FOR:
             # for init; cond; update { body }
             self.advance()
             # parse init (assignment)
-            ident = self.expect(TokenType.IDENT)
+            target = self.expect(TokenType.IDENT)
             self.expect(TokenType.ASSIGN)
             init_expr = self.parse_expr()
-            init = ast_nodes.Assign(target=ident.value, expr=init_expr)
+            init = ast_nodes.Assign(target=target, expr=init_expr)
             self.expect(TokenType.SEMI)
             # parse condition
             cond = self.parse_expr()
             self.expect(TokenType.SEMI)
             # parse update (assignment)
-            update_ident = self.expect(TokenType.IDENT)
+            update_target = self.expect(TokenType.IDENT)
             self.expect(TokenType.ASSIGN)
             update_expr = self.parse_expr()
-            update = ast_nodes.Assign(target=update_ident.value, expr=update_expr)
+            update = ast_nodes.Assign(target=update_target, expr=update_expr)
             # parse body
             self.expect(TokenType.LBRACE)
-            body = self.parse_block()
-            return ast_nodes.For(init=init, cond=cond, update=update, body=body)
+            body = []
+            yield self._parse_block(body)
+            out.append(ast_nodes.For(init=init, cond=cond, update=update, body=body))
+            return
 
-        raise ParserError(f"Unexpected token {self.current.type.name} at {self.current.line}:{self.current.column}")
+        raise ParserError(f"Unexpected token {self.current_type.name} at {self.current.line}:{self.current.column}")
 
-    def parse_block(self):
-        stmts = []
-        while self.current.type != TokenType.RBRACE and self.current.type != TokenType.EOF:
-            stmts.append(self.parse_stmt())
+    def _parse_block(self, stmts):
+        while self.current_type != TokenType.RBRACE and self.current_type != TokenType.EOF:
+            yield self._parse_stmt(stmts)
         self.expect(TokenType.RBRACE)
-        return stmts
 
     # Expressions: support logical, relational operators and arithmetic with precedence
     # Precedence (lowest to highest): OR -> AND -> relational -> additive -> multiplicative -> factor
     def parse_expr(self):
-        return self.parse_or()
+        if self.expr_engine == "chain":
+            return self.parse_or()
+        return self.parse_expr_pratt()
+
+    def parse_expr_pratt(self):
+        """Operator-precedence parse driven by `_BINARY_BP`, without recursion.
+
+        Builds exactly the trees of the `parse_or` ... `parse_factor` chain (and
+        raises the same errors), but parentheses, calls and prefix operators are
+        kept on an explicit stack, so nesting depth is limited only by memory.
+        Every operand carries the binding power of the operator that produced
+        it: an operator may only take it as left operand if the chain grammar
+        would have (e.g. `a < b < c` stops after `a < b`).
+        """
+        ops = []        # frames: (_BINARY, op, bp) / (_PREFIX, op, bp) / (_PAREN,) / (_CALL, name, args)
+        operands = []   # nodes
+        levels = []     # binding power that produced each operand
+        binary_bp = _BINARY_BP
+        advance = self.advance
+
+        while True:
+            # Operand position: prefix operators, then an atom.
+            while True:
+                ct = self.current_type
+                value = self.current_value
+                if ct == TokenType.IDENT:
+                    advance()
+                    if self.current_type == TokenType.LPAREN:
+                        advance()
+                        if self.current_type == TokenType.RPAREN:
+                            advance()
+                            operands.append(ast_nodes.FuncCall(name=value, args=[]))
+                            levels.append(_ATOM)
+                            break
+                        ops.append((_CALL, value, []))
+                        continue
+                    operands.append(ast_nodes.Var(name=value))
+                    levels.append(_ATOM)
+                    break
+                if ct == TokenType.NUMBER:
+                    advance()
+                    operands.append(ast_nodes.Literal(value=int(value)))
+                    levels.append(_ATOM)
+                    break
+                if ct == TokenType.LPAREN:
+                    advance()
+                    ops.append((_PAREN,))
+                    continue
+                if ct == TokenType.MINUS or ct == TokenType.PLUS:
+                    advance()
+                    ops.append((_PREFIX, value, _ATOM))
+                    continue
+                if ct == TokenType.STRING:
+                    advance()
+                    operands.append(ast_nodes.StringLiteral(value=value))
+                    levels.append(_ATOM)
+                    break
+                if ct == TokenType.NOT and (not ops or ops[-1][0] >= _PAREN or ops[-1][2] <= _NOT_BP):
+                    advance()
+                    ops.append((_PREFIX, value, _NOT_BP))
+                    continue
+                raise ParserError(f"Unexpected factor {ct.name} ({value}) at {self.current.line}:{self.current.column}")
+
+            # Operator position: binary operators, or the end of a group.
+            while True:
+                bp = binary_bp.get(self.current_type)
+                if bp is not None:
+                    # Reduce stacked operators that bind at least as tightly.
+                    while ops:
+                        frame = ops[-1]
+                        kind = frame[0]
+                        if kind == _BINARY and frame[2] >= bp:
+                            ops.pop()
+                            right = operands.pop()
+                            levels.pop()
+                            operands[-1] = ast_nodes.BinaryOp(op=frame[1], left=operands[-1], right=right)
+                            levels[-1] = frame[2]
+                        elif kind == _PREFIX and frame[2] > bp:
+                            ops.pop()
+                            operands[-1] = ast_nodes.UnaryOp(op=frame[1], operand=operands[-1])
+                            levels[-1] = frame[2]
+                        else:
+                            break
+                    level = levels[-1]
+                    if level > bp or (level == bp and bp != _REL_BP):
+                        ops.append((_BINARY, self.current_value, bp))
+                        advance()
+                        break
+                # No operator applies here: close the innermost group.
+                while ops and ops[-1][0] < _PAREN:
+                    frame = ops.pop()
+                    if frame[0] == _BINARY:
+                        right = operands.pop()
+                        levels.pop()
+                        operands[-1] = ast_nodes.BinaryOp(op=frame[1], left=operands[-1], right=right)
+                    else:
+                        operands[-1] = ast_nodes.UnaryOp(op=frame[1], operand=operands[-1])
+                    levels[-1] = frame[2]
+                if not ops:
+                    return operands[-1]
+                frame = ops[-1]
+                if frame[0] == _PAREN:
+                    if self.current_type != TokenType.RPAREN:
+                        raise ParserError(f"Expected ')' at {self.current.line}:{self.current.column}")
+                    advance()
+                    ops.pop()
+                    levels[-1] = _ATOM
+                    continue
+                frame[2].append(operands.pop())
+                levels.pop()
+                if self.current_type == TokenType.COMMA:
+                    advance()
+                    break
+                self.expect(TokenType.RPAREN)
+                ops.pop()
+                operands.append(ast_nodes.FuncCall(name=frame[1], args=frame[2]))
+                levels.append(_ATOM)
 
     def parse_or(self):
         left = self.parse_and()
-        while self.current.type == TokenType.OR:
-            op_token = self.current
+        while self.current_type == TokenType.OR:
+            op = self.current_value
             self.advance()
             right = self.parse_and()
-            left = ast_nodes.BinaryOp(op=op_token.value, left=left, right=right)
+            left = ast_nodes.BinaryOp(op=op, left=left, right=right)
         return left
 
     def parse_and(self):
         left = self.parse_not()
-        while self.current.type == TokenType.AND:
-            op_token = self.current
+        while self.current_type == TokenType.AND:
+            op = self.current_value
             self.advance()
             right = self.parse_not()
-            left = ast_nodes.BinaryOp(op=op_token.value, left=left, right=right)
+            left = ast_nodes.BinaryOp(op=op, left=left, right=right)
         return left
 
     def parse_not(self):
         # Handle NOT as unary operator
-        if self.current.type == TokenType.NOT:
-            op_token = self.current
+        if self.current_type == TokenType.NOT:
+            op = self.current_value
             self.advance()
             operand = self.parse_not()  # Allow chaining: not not x
-            return ast_nodes.UnaryOp(op=op_token.value, operand=operand)
+            return ast_nodes.UnaryOp(op=op, operand=operand)
         return self.parse_relational()
 
     def parse_relational(self):
         left = self.parse_additive()
         # relational operators
-        if self.current.type in (TokenType.LT, TokenType.GT, TokenType.LE, TokenType.GE, TokenType.EQ, TokenType.NE):
-            op_token = self.current
+        if self.current_type in (TokenType.LT, TokenType.GT, TokenType.LE, TokenType.GE, TokenType.EQ, TokenType.NE):
+            op = self.current_value
             self.advance()
             right = self.parse_additive()
-            return ast_nodes.BinaryOp(op=op_token.value, left=left, right=right)
+            return ast_nodes.BinaryOp(op=op, left=left, right=right)
         return left
 
     def parse_additive(self):
         node = self.parse_term()
-        while self.current.type in (TokenType.PLUS, TokenType.MINUS):
-            op = self.current.value
+        while self.current_type in (TokenType.PLUS, TokenType.MINUS):
+            op = self.current_value
             self.advance()
             right = self.parse_term()
             node = ast_nodes.BinaryOp(op=op, left=node, right=right)
@@ -211,39 +397,39 @@ class Parser:
 
     def parse_term(self):
         node = self.parse_factor()
-        while self.current.type in (TokenType.MUL, TokenType.DIV, TokenType.MOD):
-            op = self.current.value
+        while self.current_type in (TokenType.MUL, TokenType.DIV, TokenType.MOD):
+            op = self.current_value
             self.advance()
             right = self.parse_factor()
             node = ast_nodes.BinaryOp(op=op, left=node, right=right)
         return node
 
     def parse_factor(self):
-        ct = self.current.type
+        ct = self.current_type
         # Handle unary operators (+ and -)
         if ct == TokenType.MINUS or ct == TokenType.PLUS:
-            op = self.current.value
+            op = self.current_value
             self.advance()
             operand = self.parse_factor()
             return ast_nodes.UnaryOp(op=op, operand=operand)
         if ct == TokenType.NUMBER:
-            val = int(self.current.value)
+            val = int(self.current_value)
             self.advance()
             return ast_nodes.Literal(value=val)
         if ct == TokenType.STRING:
-            val = self.current.value
+            val = self.current_value
             self.advance()
             return ast_nodes.StringLiteral(value=val)
         if ct == TokenType.IDENT:
-            name = self.current.value
+            name = self.current_value
             self.advance()
             # Check if it's a function call
-            if self.current.type == TokenType.LPAREN:
+            if self.current_type == TokenType.LPAREN:
                 self.advance()
                 args = []
-                if self.current.type != TokenType.RPAREN:
+                if self.current_type != TokenType.RPAREN:
                     args.append(self.parse_expr())
-                    while self.current.type == TokenType.COMMA:
+                    while self.current_type == TokenType.COMMA:
                         self.advance()
                         args.append(self.parse_expr())
                 self.expect(TokenType.RPAREN)
@@ -254,9 +440,84 @@ class Parser:
             self.advance()
             node = self.parse_expr()
             # expect ')'
-            if self.current.type != TokenType.RPAREN:
+            if self.current_type != TokenType.RPAREN:
                 raise ParserError(f"Expected ')' at {self.current.line}:{self.current.column}")
             self.advance()
             return node
 
-        raise ParserError(f"Unexpected factor {self.current.type.name} ({self.current.value}) at {self.current.line}:{self.current.column}")
+        raise ParserError(f"Unexpected factor {self.current_type.name} ({self.current_value}) at {self.current.line}:{self.current.column}")
+
+
+class StreamParser(Parser):
+    """Parser that pulls tokens from an iterator instead of indexing a list.
+
+    Consumed tokens are dropped immediately, so only the current token and the
+    lookahead buffer filled by `peek()` are alive while parsing.
+    """
+
+    def __init__(self, tokens: Iterable[Token], expr_engine: str = "pratt"):
+        self.expr_engine = expr_engine
+        self._stream = iter(tokens)
+        self._lookahead = deque()
+        self.pos = 0
+        self._set_current(next(self._stream, None) or Token(TokenType.EOF, None, -1, -1))
+
+    def advance(self):
+        self.pos += 1
+        if self._lookahead:
+            self._set_current(self._lookahead.popleft())
+        else:
+            self._set_current(next(self._stream, None) or Token(TokenType.EOF, None, -1, -1))
+
+    def peek(self, offset: int = 1) -> Token:
+        buf = self._lookahead
+        while len(buf) < offset:
+            tok = next(self._stream, None)
+            if tok is None:
+                return Token(TokenType.EOF, None, -1, -1)
+            buf.append(tok)
+        return buf[offset - 1]
+
+
+class CompactParser(Parser):
+    """Parser over a `TokenStream` that reads its arrays by index.
+
+    Parsing builds no `Token`: `advance()` only looks up the type code and
+    slices the value. `current` makes a token on demand, for error messages.
+    """
+
+    def __init__(self, tokens: TokenStream, expr_engine: str = "pratt"):
+        self.tokens = tokens
+        self.expr_engine = expr_engine
+        self.pos = -1
+        self.advance = _advancer(weakref.ref(self), tokens)
+        self.advance()
+
+    @property
+    def current(self) -> Token:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return Token(TokenType.EOF, None, -1, -1)
+
+
+def _advancer(parser, tokens: TokenStream):
+    # `CompactParser.advance` as a closure over the arrays, so a token costs
+    # no attribute lookups; `parser` is a weak reference, to avoid a cycle
+    kinds, starts, ends, source = tokens.kinds, tokens.starts, tokens.ends, tokens.source
+    count = len(kinds)
+    types = _TYPES_BY_CODE
+    string, eof = TokenType.STRING, TokenType.EOF
+
+    def advance():
+        p = parser()
+        pos = p.pos = p.pos + 1
+        if pos < count:
+            ttype = p.current_type = types[kinds[pos]]
+            if ttype is string or ttype is eof:
+                p.current_value = tokens.value(pos)
+            else:
+                p.current_value = source[starts[pos]:ends[pos]]
+        else:
+            p.current_type = eof
+            p.current_value = None
+    return advance
@@ -0,0 +1,293 @@
+"""Optimización de mirilla (peephole) sobre el ensamblador simbólico.
+
+`generate_asm` traduce cada instrucción TAC por separado, así que deja
+secuencias que sobran al juntarlas: `STORE t3` seguido de `LOAD t3`, un `JMP`
+a la etiqueta siguiente, `PUSH 0 / LOAD x / SUB` para cambiar el signo...
+`peephole` las reescribe con una tabla de reglas (`_RULES`) que se aplican
+sobre una ventana al final del código ya reescrito, de modo que el resultado
+de una regla puede volver a encajar en otra, y después con unas pasadas
+globales sobre los saltos (también los de `SWITCH`): encadenado de saltos a
+saltos, eliminación del código inalcanzable, de los saltos a la instrucción
+siguiente y de las etiquetas a las que nadie salta. Todo se repite hasta que
+nada cambia.
+
+Las reglas respetan la semántica de `SimpleVM`: solo se pliegan enteros (una
+cadena en una operación aritmética sigue dando el mismo error en la VM) y un
+`STORE x` / `LOAD x` solo desaparece entero cuando ese es el único lugar del
+programa que lee `x`. Usa dos instrucciones de la VM pensadas para esto:
+`DUP` (duplica la cima de la pila) y `NEG` (le cambia el signo).
+"""
+from typing import Dict, List, Optional
+
+from .optimizer import fold_binop, fold_unaryop
+
+# Mnemonics of the binary operations, by TAC operator
+_BINOPS = {
+    "ADD": '+', "SUB": '-', "MUL": '*', "DIV": '/', "MOD": '%',
+    "LT": '<', "GT": '>', "LE": '<=', "GE": '>=', "EQ": '==', "NE": '!=',
+    "AND": 'and', "OR": 'or',
+}
+
+_JUMPS = ("JMP", "JZ", "JNZ")
+
+
+def _split(line: str):
+    """(mnemonic, argument) of an assembly line; the argument may be ''."""
+    op, _, arg = line.partition(' ')
+    return op, arg
+
+
+def _int(arg: str) -> Optional[int]:
+    # The VM pushes any argument that int() accepts as a number
+    try:
+        return int(arg)
+    except ValueError:
+        return None
+
+
+def _is_label(line: str) -> bool:
+    return line.endswith(':') and ' ' not in line
+
+
+def _switch_cases(arg: str):
+    """(default label, [(value, label), ...]) of the argument of a SWITCH."""
+    default, *cases = arg.split()
+    return default, [tuple(case.rsplit(':', 1)) for case in cases]
+
+
+def _targets(op: str, arg: str) -> List[str]:
+    # Labels a jump or a SWITCH can go to
+    if op in _JUMPS:
+        return [arg]
+    if op == "SWITCH":
+        default, cases = _switch_cases(arg)
+        return [label for _, label in cases] + [default]
+    return []
+
+
+def _reads(asm: List[str]) -> Dict[str, int]:
+    """How many instructions read each name (`LOAD x` and `PUSH x`)."""
+    reads: Dict[str, int] = {}
+    for line in asm:
+        op, arg = _split(line)
+        if op == "LOAD" or (op == "PUSH" and _int(arg) is None and not arg.startswith('"')):
+            reads[arg] = reads.get(arg, 0) + 1
+    return reads
+
+
+# -- window rules -----------------------------------------------------------------
+#
+# Each rule looks at the end of the code rewritten so far (`out`, already
+# split into (mnemonic, argument) pairs) and, when it applies, returns how
+# many of the last lines to replace and the lines that replace them.
+
+def _store_load(out, reads):
+    # STORE x / LOAD x: the value is still on the stack
+    (op1, x), (op2, y) = out[-2:]
+    if op1 == "STORE" and op2 == "LOAD" and x == y:
+        if reads.get(x) == 1:
+            return 2, []
+        return 2, ["DUP", f"STORE {x}"]
+    return None
+
+
+def _load_load(out, reads):
+    (op1, x), (op2, y) = out[-2:]
+    if op1 == "LOAD" and op2 == "LOAD" and x == y:
+        return 1, ["DUP"]
+    return None
+
+
+def _fold_binop(out, reads):
+    (op1, a), (op2, b), (op3, _) = out[-3:]
+    if op1 == "PUSH" and op2 == "PUSH" and op3 in _BINOPS:
+        a, b = _int(a), _int(b)
+        if a is not None and b is not None:
+            value = fold_binop(_BINOPS[op3], a, b)
+            if value is not None:
+                return 3, [f"PUSH {value}"]
+    return None
+
+
+def _fold_unary(out, reads):
+    (op1, a), (op2, _) = out[-2:]
+    if op1 == "PUSH" and op2 in ("NEG", "NOT"):
+        a = _int(a)
+        if a is not None:
+            return 2, [f"PUSH {-a if op2 == 'NEG' else fold_unaryop('not', a)}"]
+    return None
+
+
+def _fold_branch(out, reads):
+    # A conditional jump on a constant always or never jumps
+    (op1, a), (op2, label) = out[-2:]
+    if op1 == "PUSH" and op2 in ("JZ", "JNZ"):
+        a = _int(a)
+        if a is not None:
+            return 2, [f"JMP {label}"] if (a != 0) == (op2 == "JNZ") else []
+    return None
+
+
+def _fold_switch(out, reads):
+    # A SWITCH on a constant always goes to the same label
+    (op1, a), (op2, arg) = out[-2:]
+    if op1 == "PUSH" and op2 == "SWITCH":
+        a = _int(a)
+        if a is not None:
+            default, cases = _switch_cases(arg)
+            return 2, [f"JMP {dict(cases).get(str(a), default)}"]
+    return None
+
+
+def _negate(out, reads):
+    # PUSH 0 / LOAD x / SUB computes -x
+    (op1, zero), (op2, x), (op3, _) = out[-3:]
+    if op1 == "PUSH" and zero == "0" and op2 == "LOAD" and op3 == "SUB":
+        return 3, [f"LOAD {x}", "NEG"]
+    return None
+
+
+def _compare_zero(out, reads):
+    # x != 0 / JNZ jumps when x is not 0 (a string is never 0), x == 0 when it is
+    (op1, zero), (op2, _), (op3, label) = out[-3:]
+    if op1 == "PUSH" and zero == "0" and op2 in ("NE", "EQ") and op3 == "JNZ":
+        return 3, [f"{'JNZ' if op2 == 'NE' else 'JZ'} {label}"]
+    return None
+
+
+def _not_branch(out, reads):
+    (op1, _), (op2, label) = out[-2:]
+    if op1 == "NOT" and op2 in ("JZ", "JNZ"):
+        return 2, [f"{'JNZ' if op2 == 'JZ' else 'JZ'} {label}"]
+    return None
+
+
+# (name, window size, rule)
+_RULES = (
+    ("store_load", 2, _store_load),
+    ("load_load", 2, _load_load),
+    ("fold_binop", 3, _fold_binop),
+    ("fold_unary", 2, _fold_unary),
+    ("fold_branch", 2, _fold_branch),
+    ("fold_switch", 2, _fold_switch),
+    ("negate", 3, _negate),
+    ("compare_zero", 3, _compare_zero),
+    ("not_branch", 2, _not_branch),
+)
+
+
+def _apply_rules(asm: List[str], hits: Dict[str, int]) -> List[str]:
+    reads = _reads(asm)
+    out = []
+    for line in asm:
+        pending = [line]
+        while pending:
+            out.append(_split(pending.pop()))
+            for name, size, rule in _RULES:
+                if len(out) < size:
+                    continue
+                replaced = rule(out, reads)
+                if replaced is not None:
+                    n, lines = replaced
+                    del out[-n:]
+                    # Back onto the input, so that they can match other rules
+                    pending.extend(reversed(lines))
+                    hits[name] = hits.get(name, 0) + 1
+                    break
+    return [f"{op} {arg}" if arg else op for op, arg in out]
+
+
+# -- jumps ------------------------------------------------------------------------
+
+def _chain_jumps(asm: List[str], hits: Dict[str, int]) -> List[str]:
+    # Jumps to a label followed (after other labels) by `JMP M` go to M
+    target = {}
+    for i, line in enumerate(asm):
+        if _is_label(line):
+            j = i + 1
+            while j < len(asm) and _is_label(asm[j]):
+                j += 1
+            if j < len(asm):
+                op, arg = _split(asm[j])
+                if op == "JMP":
+                    target[line[:-1]] = arg
+    if not target:
+        return asm
+
+    def final(label):
+        # Where a jump to `label` ends up, or None
+        seen = {label}
+        while label in target:
+            label = target[label]
+            if label in seen:
+                return None  # a loop of jumps: left as it is
+            seen.add(label)
+        return label
+
+    result = []
+    for line in asm:
+        op, arg = _split(line)
+        if op in _JUMPS and arg in target:
+            label = final(arg)
+            if label is not None:
+                line = f"{op} {label}"
+                hits["jump_chain"] = hits.get("jump_chain", 0) + 1
+        elif op == "SWITCH":
+            default, cases = _switch_cases(arg)
+            chained = ' '.join([final(default) or default]
+                               + [f"{value}:{final(label) or label}" for value, label in cases])
+            if chained != arg:
+                line = f"SWITCH {chained}"
+                hits["jump_chain"] = hits.get("jump_chain", 0) + 1
+        result.append(line)
+    return result
+
+
+def _remove_dead_jumps(asm: List[str], hits: Dict[str, int]) -> List[str]:
+    # Code after JMP or RET that no label leads to, jumps to the next
+    # instruction and labels no jump goes to
+    used = set()
+    for line in asm:
+        used.update(_targets(*_split(line)))
+    result = []
+    reachable = True
+    for i, line in enumerate(asm):
+        if _is_label(line):
+            name = line[:-1]
+            if name in used or name.upper().startswith("FUNC_"):
+                reachable = True
+                result.append(line)
+            else:
+                hits["unused_label"] = hits.get("unused_label", 0) + 1
+            continue
+        if not reachable:
+            hits["unreachable"] = hits.get("unreachable", 0) + 1
+            continue
+        op, arg = _split(line)
+        if op == "JMP":
+            j = i + 1
+            while j < len(asm) and _is_label(asm[j]) and asm[j][:-1] != arg:
+                j += 1
+            if j < len(asm) and asm[j] == f"{arg}:":
+                hits["jump_to_next"] = hits.get("jump_to_next", 0) + 1
+                continue
+        if op in ("JMP", "RET", "SWITCH"):
+            reachable = False
+        result.append(line)
+    return result
+
+
+def peephole(asm: List[str], hits: Optional[Dict[str, int]] = None) -> List[str]:
+    """Rewritten copy of the assembly `asm` (as made by `generate_asm`).
+
+    Counts in `hits`, when given, how many times each rule applied.
+    """
+    if hits is None:
+        hits = {}
+    while True:
+        before = sum(hits.values())
+        asm = _apply_rules(asm, hits)
+        asm = _chain_jumps(asm, hits)
+        asm = _remove_dead_jumps(asm, hits)
+        if sum(hits.values()) == before:
+            return asm
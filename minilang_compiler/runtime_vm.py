@@ -6,14 +6,55 @@ El assembler produce una lista donde cada entrada puede ser:
 - ('LOAD', [var])
 - ('STORE', [var])
 - ('ADD'/'SUB'/...') with no args
+- ('DUP', []) / ('NEG', [])  (only in code rewritten by `peephole`)
 - ('JNZ', [label]) / ('JZ', [label])
+- ('SWITCH', [default, 'value:label', ...])
 - ('IN', [var]) / ('OUT', [])
 
-Esta VM implementa una pila y una memoria de variables.
+Esta VM implementa una pila y una memoria de variables. `SWITCH` saca un
+valor de la pila y salta a la etiqueta de su caso (o a la de por defecto) en
+un solo paso: con valores de caso densos usa una tabla de saltos indexada por
+el valor y, si no, una búsqueda binaria sobre los valores ordenados.
 """
+from bisect import bisect_left
 from typing import List, Tuple, Any
 
 
+class SwitchTable:
+    """Targets (instruction indexes) of one SWITCH."""
+    __slots__ = ('low', 'values', 'targets', 'default')
+
+    # A jump table is used when it has at most this many slots per case
+    DENSITY = 2
+
+    def __init__(self, cases: List[Tuple[int, int]], default: int):
+        cases = sorted(cases)
+        self.default = default
+        self.low = cases[0][0] if cases else 0
+        span = cases[-1][0] - self.low + 1 if cases else 0
+        if span <= self.DENSITY * len(cases):
+            # Jump table: holes go to the default
+            self.values = None
+            self.targets = [default] * span
+            for value, target in cases:
+                self.targets[value - self.low] = target
+        else:
+            # Binary search over the sorted values
+            self.values = [value for value, _ in cases]
+            self.targets = [target for _, target in cases]
+
+    def target(self, value) -> int:
+        if type(value) is not int:
+            return self.default  # a string matches no case
+        if self.values is None:
+            k = value - self.low
+            return self.targets[k] if 0 <= k < len(self.targets) else self.default
+        k = bisect_left(self.values, value)
+        if k < len(self.values) and self.values[k] == value:
+            return self.targets[k]
+        return self.default
+
+
 class SimpleVM:
     def __init__(self, code: List[Tuple[Any, list]]):
         self.code = code
@@ -39,6 +80,15 @@ class SimpleVM:
                         params_str = comment[7:]  # Remove 'PARAMS ' prefix
                         param_names = [p.strip() for p in params_str.split(',')]
                         self.function_params[instr[1]] = param_names
+        # SWITCH index -> its table
+        self.switches = {}
+        for idx, instr in enumerate(self.code):
+            if instr[0] == 'SWITCH':
+                default, *cases = instr[1]
+                cases = [case.rpartition(':') for case in cases]
+                self.switches[idx] = SwitchTable(
+                    [(int(value), self.labels.get(label, idx + 1)) for value, _, label in cases],
+                    self.labels.get(default, idx + 1))
 
     def run(self):
         while self.ip < len(self.code):
@@ -74,6 +124,9 @@ class SimpleVM:
                 val = self.stack.pop() if self.stack else 0
                 self.vars[name] = val
                 continue
+            if op == 'DUP':
+                self.stack.append(self.stack[-1])
+                continue
             if op == 'ADD':
                 b = self.stack.pop(); a = self.stack.pop()
                 self.stack.append(a + b)
@@ -114,6 +167,9 @@ class SimpleVM:
                     res = 1 if (a != 0 or b != 0) else 0
                 self.stack.append(res)
                 continue
+            if op == 'NEG':
+                self.stack.append(-self.stack.pop())
+                continue
             if op == 'NOT':
                 a = self.stack.pop()
                 res = 1 if a == 0 else 0  # NOT: 0 becomes 1, non-zero becomes 0
@@ -132,6 +188,10 @@ class SimpleVM:
                 if cond == 0:
                     self.ip = self.labels.get(label, self.ip)
                 continue
+            if op == 'SWITCH':
+                value = self.stack.pop() if self.stack else 0
+                self.ip = self.switches[self.ip - 1].target(value)
+                continue
             if op == 'JMP' or op == 7:
                 label = args[0]
                 self.ip = self.labels.get(label, self.ip)
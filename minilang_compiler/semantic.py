@@ -6,30 +6,28 @@ Realiza comprobaciones básicas:
 - Comprueba tipos (solo int implícito).
 """
 from typing import Dict
-from .ast_nodes import Program, FuncDef, Return, Read, Assign, Print, If, While, For, BinaryOp, UnaryOp, Literal, StringLiteral, Var, FuncCall
+from .ast_nodes import Program
+from .visitor import Visitor
 
 
 class SemanticError(Exception):
     pass
 
 
-class SemanticAnalyzer:
+class SemanticAnalyzer(Visitor):
     def __init__(self):
         # symbol table: name -> initialized (bool)
         self.symbols: Dict[str, bool] = {}
         self.functions: Dict[str, int] = {}  # func_name -> param_count
+        self._stmt_handlers = self.dispatch_table('stmt_', self._unknown_stmt)
+        self._expr_handlers = self.dispatch_table('expr_', self._unknown_expr)
 
     def analyze(self, program: Program):
         self.symbols = {}
         self.functions = {}
         # Analyze functions first
         for func in program.functions:
-            if func.name in self.functions:
-                raise SemanticError(f"Duplicate function definition: '{func.name}'")
-            self.functions[func.name] = len(func.params)
-            # Analyze function body with params initialized
-            saved_symbols = self.symbols.copy()
-            self.symbols = {param: True for param in func.params}
+            saved_symbols = self.enter_function(func)
             for stmt in func.body:
                 self.visit_stmt(stmt)
             self.symbols = saved_symbols
@@ -38,82 +36,110 @@ class SemanticAnalyzer:
             self.visit_stmt(stmt)
         return self.symbols
 
+    def enter_function(self, func):
+        """Register `func` and switch to its scope; return the enclosing symbols."""
+        if func.name in self.functions:
+            raise SemanticError(f"Duplicate function definition: '{func.name}'")
+        self.functions[func.name] = len(func.params)
+        # Analyze function body with params initialized
+        saved_symbols = self.symbols.copy()
+        self.symbols = {param: True for param in func.params}
+        return saved_symbols
+
+    # Handlers are found through dispatch tables (one dict lookup per node).
+    # Statements with nested blocks are generators run by `trampoline` and
+    # expressions use an explicit stack, so nesting depth is not bounded by
+    # the Python stack.
     def visit_stmt(self, node):
-        if isinstance(node, Read):
-            self.symbols[node.var] = True
-            return
-        if isinstance(node, Print):
-            self.visit_expr(node.expr)
-            return
-        if isinstance(node, Return):
-            self.visit_expr(node.expr)
-            return
-        if isinstance(node, Assign):
-            self.visit_expr(node.expr)
-            # assignment implicitly declares and initializes variable
-            self.symbols[node.target] = True
-            return
-        if isinstance(node, If):
-            self.visit_expr(node.cond)
-            # analyze then-block
-            for s in node.then_block:
-                self.visit_stmt(s)
-            # analyze elif blocks
-            for elif_cond, elif_body in node.elif_blocks:
-                self.visit_expr(elif_cond)
-                for s in elif_body:
-                    self.visit_stmt(s)
-            # analyze else-block if present
-            if node.else_block:
-                for s in node.else_block:
-                    self.visit_stmt(s)
-            return
-        if isinstance(node, While):
-            self.visit_expr(node.cond)
-            for s in node.body:
-                self.visit_stmt(s)
-            return
-        if isinstance(node, For):
-            # init
-            self.visit_stmt(node.init)
-            # condition
-            self.visit_expr(node.cond)
-            # update
-            self.visit_expr(node.update.expr)
-            # body
-            for s in node.body:
-                self.visit_stmt(s)
-            return
+        self.run_stmt(self._stmt_handlers, node)
+
+    def _unknown_stmt(self, node):
         raise SemanticError(f"Unknown statement type: {type(node)}")
 
+    def stmt_Read(self, node):
+        self.symbols[node.var] = True
+
+    def stmt_Print(self, node):
+        self.visit_expr(node.expr)
+
+    def stmt_Return(self, node):
+        self.visit_expr(node.expr)
+
+    def stmt_Assign(self, node):
+        self.visit_expr(node.expr)
+        # assignment implicitly declares and initializes variable
+        self.symbols[node.target] = True
+
+    def stmt_If(self, node):
+        self.visit_expr(node.cond)
+        # analyze then-block
+        yield self.run_block(self._stmt_handlers, node.then_block)
+        # analyze elif blocks
+        for elif_block in node.elif_blocks:
+            self.visit_expr(elif_block.cond)
+            yield self.run_block(self._stmt_handlers, elif_block.body)
+        # analyze else-block if present
+        if node.else_block:
+            yield self.run_block(self._stmt_handlers, node.else_block)
+
+    def stmt_While(self, node):
+        self.visit_expr(node.cond)
+        yield self.run_block(self._stmt_handlers, node.body)
+
+    def stmt_For(self, node):
+        # init
+        self.visit_stmt(node.init)
+        # condition
+        self.visit_expr(node.cond)
+        # update
+        self.visit_expr(node.update.expr)
+        # body
+        yield self.run_block(self._stmt_handlers, node.body)
+
     def visit_expr(self, node):
-        if isinstance(node, Literal):
-            return
-        if isinstance(node, StringLiteral):
-            return
-        if isinstance(node, Var):
-            name = node.name
-            if name not in self.symbols or not self.symbols[name]:
-                raise SemanticError(f"Use of uninitialized variable '{name}'")
-            return
-        if isinstance(node, FuncCall):
-            # Check function exists
-            if node.name not in self.functions:
-                raise SemanticError(f"Undefined function '{node.name}'")
-            # Check argument count
-            expected = self.functions[node.name]
-            got = len(node.args)
-            if expected != got:
-                raise SemanticError(f"Function '{node.name}' expects {expected} arguments, got {got}")
-            # Check arguments
-            for arg in node.args:
-                self.visit_expr(arg)
-            return
-        if isinstance(node, BinaryOp):
-            self.visit_expr(node.left)
-            self.visit_expr(node.right)
-            return
-        if isinstance(node, UnaryOp):
-            self.visit_expr(node.operand)
-            return
+        # Pre-order walk with an explicit stack; handlers push children in
+        # reverse so errors are reported in left-to-right order.
+        handlers = self._expr_handlers
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            handlers[type(node)](node, stack)
+
+    def _unknown_expr(self, node, stack):
         raise SemanticError(f"Unknown expression type: {type(node)}")
+
+    def expr_Literal(self, node, stack):
+        pass
+
+    def expr_StringLiteral(self, node, stack):
+        pass
+
+    def expr_Var(self, node, stack):
+        self.check_var(node.name)
+
+    def expr_FuncCall(self, node, stack):
+        self.check_call(node)
+        # Check arguments
+        stack.extend(reversed(node.args))
+
+    def check_var(self, name: str):
+        if name not in self.symbols or not self.symbols[name]:
+            raise SemanticError(f"Use of uninitialized variable '{name}'")
+
+    def check_call(self, node):
+        """Check that the function called by `node` exists and its arity (not the arguments)."""
+        # Check function exists
+        if node.name not in self.functions:
+            raise SemanticError(f"Undefined function '{node.name}'")
+        # Check argument count
+        expected = self.functions[node.name]
+        got = len(node.args)
+        if expected != got:
+            raise SemanticError(f"Function '{node.name}' expects {expected} arguments, got {got}")
+
+    def expr_BinaryOp(self, node, stack):
+        stack.append(node.right)
+        stack.append(node.left)
+
+    def expr_UnaryOp(self, node, stack):
+        stack.append(node.operand)
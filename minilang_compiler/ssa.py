@@ -0,0 +1,369 @@
+"""Forma SSA (asignación estática única) del TAC.
+
+`to_ssa` convierte cada región de un `ProgramCFG` a SSA: cada variable y
+temporal pasa a tener una sola definición. Las versiones se llaman
+`nombre.k` (un punto nunca aparece en un identificador de MiniLang) y
+conservan su tipo (`Var` o `Temp`). Se insertan `PHI` en la frontera de
+dominancia iterada de las definiciones, solo donde el nombre está vivo (SSA
+"podada"). Un uso sin definición previa conserva el nombre original, que es
+la versión de entrada: el valor del parámetro (los parámetros los asigna
+`CALL` por nombre) o, para cualquier otro nombre, una variable sin asignar,
+que la VM lee como 0.
+
+`from_ssa` vuelve al TAC normal: cada `PHI` se reemplaza por copias paralelas
+al final de los predecesores (partiendo la arista cuando el predecesor
+termina en `ifgoto` o `switch`) y después se fusionan con su nombre original las
+versiones cuyos rangos de vida no se solapan, de modo que un programa que
+solo pasa por `to_ssa` y `from_ssa` queda prácticamente igual.
+
+Ambas funciones trabajan en tiempo casi lineal y modifican el CFG en sitio.
+"""
+from typing import Dict, List
+
+from .cfg import BasicBlock, FunctionCFG, ProgramCFG
+from .ir import Op, TACInstr, Temp, Var, is_name
+
+
+def base_name(name):
+    """Original name of an SSA version (`x.3` -> `x`)."""
+    base, dot, _ = name.partition('.')
+    return type(name)(base) if dot else name
+
+
+def last_versions(names) -> Dict[str, int]:
+    """Highest version number of each original name among `names`."""
+    last: Dict[str, int] = {}
+    for name in names:
+        base, dot, k = name.partition('.')
+        if dot and k.isdigit() and int(k) > last.get(base, 0):
+            last[base] = int(k)
+    return last
+
+
+def new_version(name, last: Dict[str, int]):
+    """A version of `name` after those counted in `last` (see `last_versions`)."""
+    base = base_name(name)
+    k = last.get(base, 0) + 1
+    last[base] = k
+    return type(base)(f"{base}.{k}")
+
+
+def phis(block: BasicBlock) -> List[TACInstr]:
+    """The phi instructions at the start of `block`."""
+    result = []
+    for instr in block.instrs:
+        if instr.op is not Op.PHI:
+            break
+        result.append(instr)
+    return result
+
+
+def to_ssa(program: ProgramCFG):
+    """Convert every region of `program` to SSA form."""
+    for region in program.regions:
+        _region_to_ssa(region)
+
+
+def from_ssa(program: ProgramCFG):
+    """Replace phis by copies and give versions back their original names."""
+    for region in program.regions:
+        _region_from_ssa(region, program)
+
+
+# -- into SSA ---------------------------------------------------------------------
+
+def _ensure_entry_without_preds(region: FunctionCFG):
+    # Loops back to the first block would need a phi at the entry; give the
+    # region a fresh entry that falls into it instead.
+    if region.entry.preds:
+        region.blocks.insert(0, BasicBlock(0))
+        region.renumber()
+        region.link()
+
+
+def _region_to_ssa(region: FunctionCFG):
+    if not region.blocks:
+        return
+    region.remove_unreachable()
+    _ensure_entry_without_preds(region)
+    region.compute_dominators()
+    frontiers = region.dominance_frontiers()
+    bits, live_in, _ = region.liveness()
+
+    # Names used before being defined in some block, and their definition sites
+    global_names = set()
+    def_blocks: Dict[str, List[BasicBlock]] = {}
+    for b in region.blocks:
+        defined = set()
+        for instr in b.instrs:
+            for u in instr.uses():
+                if u not in defined:
+                    global_names.add(u)
+            d = instr.dest
+            if d is not None:
+                defined.add(d)
+                sites = def_blocks.setdefault(d, [])
+                if not sites or sites[-1] is not b:
+                    sites.append(b)
+
+    # Phi insertion on the iterated dominance frontier, where the name is live
+    new_phis: Dict[int, List[TACInstr]] = {}
+    phi_base: Dict[TACInstr, str] = {}
+    for name, sites in def_blocks.items():
+        if name not in global_names:
+            continue
+        has_phi = set()
+        queued = {b.index for b in sites}
+        work = list(sites)
+        while work:
+            x = work.pop()
+            for y in frontiers[x.index]:
+                if y.index in has_phi:
+                    continue
+                has_phi.add(y.index)
+                # Only blocks that get a phi define the name and go on to
+                # their frontiers; a live block further on is reached through
+                # live ones
+                if live_in[y.index] & bits[name]:
+                    phi = TACInstr(Op.PHI, name, a=[name] * len(y.preds), b=list(y.preds))
+                    phi_base[phi] = name
+                    new_phis.setdefault(y.index, []).append(phi)
+                    if y.index not in queued:
+                        queued.add(y.index)
+                        work.append(y)
+    for index, block_phis in new_phis.items():
+        block = region.blocks[index]
+        block.instrs[:0] = block_phis
+
+    # Renaming, in a preorder walk of the dominator tree
+    stacks: Dict[str, list] = {}
+    counters: Dict[str, int] = {}
+
+    def current(name):
+        stack = stacks.get(name)
+        if stack:
+            return stack[-1]
+        return name
+
+    def new_version(name, pushed):
+        k = counters.get(name, 0) + 1
+        counters[name] = k
+        version = type(name)(f"{name}.{k}")
+        stacks.setdefault(name, []).append(version)
+        pushed.append(name)
+        return version
+
+    def visit(block):
+        pushed = []
+        for instr in block.instrs:
+            if instr.op is not Op.PHI:
+                a = instr.a
+                if type(a) is Var or type(a) is Temp:
+                    instr.a = current(a)
+                b = instr.b
+                if type(b) is Var or type(b) is Temp:
+                    instr.b = current(b)
+            if instr.dest is not None:
+                instr.dest = new_version(phi_base.get(instr, instr.dest), pushed)
+        seen = set()
+        for s in block.succs:
+            if s.index in seen:
+                continue
+            seen.add(s.index)
+            for phi in phis(s):
+                base = phi_base[phi]
+                for k, p in enumerate(phi.b):
+                    if p is block:
+                        phi.a[k] = current(base)
+        return pushed
+
+    entry = region.entry
+    stack = [(entry, iter(entry.dom_children), visit(entry))]
+    while stack:
+        block, children, pushed = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            for name in pushed:
+                stacks[name].pop()
+        else:
+            stack.append((child, iter(child.dom_children), visit(child)))
+
+
+# -- out of SSA -------------------------------------------------------------------
+
+def _sequentialize(copies, program: ProgramCFG) -> List[TACInstr]:
+    """Assigns with the effect of the parallel copies `[(dest, src), ...]`."""
+    pending = {d: s for d, s in copies if d != s}
+    readers: Dict[str, int] = {}
+    for s in pending.values():
+        if s in pending:
+            readers[s] = readers.get(s, 0) + 1
+    ready = [d for d in pending if not readers.get(d)]
+    code = []
+    while pending:
+        while ready:
+            d = ready.pop()
+            s = pending.pop(d)
+            code.append(TACInstr(Op.ASSIGN, d, s))
+            if s in pending:
+                readers[s] -= 1
+                if not readers[s]:
+                    ready.append(s)
+        if pending:
+            # Only cycles left: save one destination and read it from the copy
+            d = next(iter(pending))
+            tmp = program.new_temp()
+            code.append(TACInstr(Op.ASSIGN, tmp, d))
+            for dd, s in pending.items():
+                if s == d:
+                    pending[dd] = tmp
+            readers[d] = 0
+            ready.append(d)
+    return code
+
+
+def _remove_phis(region: FunctionCFG, program: ProgramCFG):
+    # Copies cannot go before an ifgoto or a switch (they may read the copied
+    # names, and the copies are for one successor only), so those edges get
+    # a block of their own.
+    edges = []
+    for b in region.blocks:
+        if b.instrs and b.instrs[0].op is Op.PHI:
+            for p in b.preds:
+                last = p.terminator
+                if last is not None and (last.op is Op.IFGOTO or last.op is Op.SWITCH):
+                    edges.append((p, b))
+    if edges:
+        region.split_edges(program, edges)
+    for b in region.blocks:
+        block_phis = phis(b)
+        if not block_phis:
+            continue
+        del b.instrs[:len(block_phis)]
+        for p in b.preds:
+            copies = []
+            for phi in block_phis:
+                for v, q in zip(phi.a, phi.b):
+                    if q is p:
+                        copies.append((phi.dest, v))
+                        break
+            code = _sequentialize(copies, program)
+            last = p.terminator
+            at = len(p.instrs) - 1 if last is not None else len(p.instrs)
+            p.instrs[at:at] = code
+
+
+def _fix_reads(region: FunctionCFG):
+    # `read` shows the variable name in its prompt, so it must store into the
+    # original name, which is also the name of the entry value: uses of that
+    # value move to `x.0` (a copy made on entry) for a parameter and to the
+    # constant 0 for any other variable.
+    reads = []
+    for b in region.blocks:
+        for instr in b.instrs:
+            if instr.op is Op.READ:
+                reads.append((b, instr))
+    if not reads:
+        return
+    params = set(region.params)
+    moved = {}
+    for _, instr in reads:
+        base = base_name(instr.dest)
+        moved[base] = Var(f"{base}.0") if base in params else 0
+    used = set()
+    for instr in region.instructions():
+        if type(instr.a) is Var and instr.a in moved:
+            used.add(instr.a)
+            instr.a = moved[instr.a]
+        if type(instr.b) is Var and instr.b in moved:
+            used.add(instr.b)
+            instr.b = moved[instr.b]
+    entry_copies = [TACInstr(Op.ASSIGN, moved[p], p) for p in region.params if p in used and p in moved]
+    if entry_copies:
+        _ensure_entry_without_preds(region)
+        region.entry.instrs[:0] = entry_copies
+    for b, instr in reads:
+        version = instr.dest
+        base = base_name(version)
+        if version != base:
+            instr.dest = base
+            k = b.instrs.index(instr)
+            b.instrs.insert(k + 1, TACInstr(Op.ASSIGN, version, base))
+
+
+def _coalesce(region: FunctionCFG):
+    # Interference between names of the same base: one is live where the
+    # other is defined (a copy does not make its source interfere).
+    bits, _, live_out = region.liveness()
+    names = list(bits)
+    by_base: Dict[str, int] = {}
+    for name, bit in bits.items():
+        base = name.partition('.')[0]
+        by_base[base] = by_base.get(base, 0) | bit
+    edges: Dict[str, set] = {}
+    for b in region.blocks:
+        live = live_out[b.index]
+        local: Dict[str, set] = {}  # live names without a bit, by base
+        for instr in reversed(b.instrs):
+            d = instr.dest
+            if d is not None:
+                base = d.partition('.')[0]
+                bit = bits.get(d)
+                if bit is None:
+                    local.get(base, set()).discard(d)
+                elif live & bit:
+                    live ^= bit
+                others = list(local.get(base, ()))
+                same = live & by_base.get(base, 0)
+                while same:
+                    low = same & -same
+                    same ^= low
+                    others.append(names[low.bit_length() - 1])
+                copy_src = instr.a if instr.op is Op.ASSIGN else None
+                for other in others:
+                    if other != copy_src:
+                        edges.setdefault(d, set()).add(other)
+                        edges.setdefault(other, set()).add(d)
+            for u in instr.uses():
+                bit = bits.get(u)
+                if bit is None:
+                    local.setdefault(u.partition('.')[0], set()).add(u)
+                else:
+                    live |= bit
+    groups: Dict[str, list] = {}
+    for instr in region.instructions():
+        for name in [instr.dest] + instr.uses():
+            if name is not None and '.' in name:
+                groups.setdefault(name.partition('.')[0], []).append(name)
+    rename = {}
+    for base, names in groups.items():
+        members = {base}
+        for name in dict.fromkeys(names):
+            conflicts = edges.get(name, ())
+            if members.isdisjoint(conflicts):
+                members.add(name)
+                rename[name] = type(name)(base)
+    if not rename:
+        return
+    for b in region.blocks:
+        kept = []
+        for instr in b.instrs:
+            if instr.dest in rename:
+                instr.dest = rename[instr.dest]
+            if instr.a in rename and is_name(instr.a):
+                instr.a = rename[instr.a]
+            if instr.b in rename and is_name(instr.b):
+                instr.b = rename[instr.b]
+            if instr.op is Op.ASSIGN and instr.dest == instr.a and is_name(instr.a):
+                continue
+            kept.append(instr)
+        b.instrs = kept
+
+
+def _region_from_ssa(region: FunctionCFG, program: ProgramCFG):
+    if not region.blocks:
+        return
+    _remove_phis(region, program)
+    _fix_reads(region)
+    _coalesce(region)
@@ -1,6 +1,7 @@
+from array import array
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Optional
+from typing import Dict, Iterator, Optional
 
 
 class TokenType(Enum):
@@ -54,6 +55,8 @@ class TokenType(Enum):
 
 @dataclass
 class Token:
+    __slots__ = ('type', 'value', 'line', 'column')
+
     type: TokenType
     value: Optional[str]
     line: int
@@ -61,3 +64,64 @@ class Token:
 
     def __repr__(self) -> str:
         return f"Token({self.type.name}, {self.value!r}, {self.line}:{self.column})"
+
+
+# type code (TokenType.value) -> TokenType
+_TYPES_BY_CODE = [None] * (max(t.value for t in TokenType) + 1)
+for _t in TokenType:
+    _TYPES_BY_CODE[_t.value] = _t
+
+
+class TokenStream:
+    """Compact token sequence stored in parallel arrays.
+
+    Each token costs one type code byte, two offsets and a line/column pair;
+    its `value` is sliced from `source` only when the token is requested (string
+    literals keep their unescaped value, since it differs from the lexeme).
+    Indexing returns a regular `Token`, so `Parser` can consume the stream like
+    a list; `parser.CompactParser` is faster, reading the arrays by index.
+    """
+    __slots__ = ('source', 'kinds', 'starts', 'ends', 'lines', 'columns', 'strings')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.strings: Dict[int, str] = {}  # token index -> unescaped string literal
+
+    def append(self, type: TokenType, value: Optional[str], line: int, column: int, start: int, end: int):
+        if type is TokenType.STRING:
+            self.strings[len(self.kinds)] = value
+        self.kinds.append(type.value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def type(self, i: int) -> TokenType:
+        return _TYPES_BY_CODE[self.kinds[i]]
+
+    def value(self, i: int) -> Optional[str]:
+        typ = _TYPES_BY_CODE[self.kinds[i]]
+        if typ is TokenType.STRING:
+            return self.strings[i % len(self.kinds)]
+        if typ is TokenType.EOF:
+            return None
+        return self.source[self.starts[i]:self.ends[i]]
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(self.type(i), self.value(i), self.lines[i], self.columns[i])
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self.kinds)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        """Bytes used by the token arrays (the source text is not included)."""
+        return sum(a.itemsize * len(a) for a in (self.kinds, self.starts, self.ends, self.lines, self.columns))
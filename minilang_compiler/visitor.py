@@ -0,0 +1,85 @@
+"""Recorridos del AST sin recursión en la pila de Python.
+
+Los manejadores de sentencias se escriben como generadores: en lugar de llamar
+recursivamente al manejador de un hijo, hacen `yield hijo_generador`.
+`trampoline` ejecuta esos generadores con una pila explícita, de modo que la
+profundidad de anidamiento solo está limitada por la memoria y no por
+`sys.getrecursionlimit()`.
+
+`Visitor` es la base común de las pasadas sobre el AST: resuelve el manejador
+de cada clase de nodo una sola vez y lo guarda en una tabla de despacho.
+"""
+from typing import Callable, Generator
+
+
+def trampoline(gen: Generator):
+    """Run `gen` to completion, driving the generators it yields.
+
+    Each yielded value must be another generator; it runs to completion
+    before its parent resumes. Nothing is sent back: handlers communicate
+    results through their side effects (e.g. appending to a list they were
+    given), which keeps completion free of `StopIteration` objects.
+    Exceptions propagate out of `trampoline` unchanged.
+    """
+    stack = [gen]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            pop()
+        else:
+            push(child)
+
+
+class DispatchTable(dict):
+    """Maps a node class to the visitor's `<prefix><ClassName>` bound method.
+
+    Misses are resolved once per class along its MRO (so e.g. arena views use
+    the handler of the node class they subclass) and then cached; classes
+    without a handler map to `default`.
+    """
+    __slots__ = ('visitor', 'prefix', 'default')
+
+    def __init__(self, visitor, prefix: str, default: Callable):
+        super().__init__()
+        self.visitor = visitor
+        self.prefix = prefix
+        self.default = default
+
+    def __missing__(self, cls):
+        for klass in cls.__mro__:
+            method = getattr(self.visitor, self.prefix + klass.__name__, None)
+            if method is not None:
+                break
+        else:
+            method = self.default
+        self[cls] = method
+        return method
+
+
+class Visitor:
+    """Base class for passes over the AST.
+
+    A pass defines one method per node class and family, e.g. `stmt_If` and
+    `expr_BinaryOp`, and looks them up with `dispatch_table('stmt_', ...)`:
+    each node then costs one dict lookup (`table[type(node)]`) instead of a
+    chain of isinstance checks. Statement handlers that contain nested blocks
+    are generators run by `trampoline`; the others return None.
+    """
+
+    def dispatch_table(self, prefix: str, default: Callable) -> DispatchTable:
+        return DispatchTable(self, prefix, default)
+
+    def run_stmt(self, table: DispatchTable, node):
+        """Run the handler for statement `node` (and any nested blocks)."""
+        child = table[type(node)](node)
+        if child is not None:
+            trampoline(child)
+
+    def run_block(self, table: DispatchTable, stmts):
+        """Generator running the handlers of `stmts` in order; `yield` it."""
+        for node in stmts:
+            child = table[type(node)](node)
+            if child is not None:
+                yield child